@@ -0,0 +1,230 @@
+"""
+分页商品接口的异步版本（asyncio），路由与返回格式与 Paged/paged_api.py 相同：
+    GET  /api/paged_products
+    POST /api/paged_products/batch_add | batch_delete | batch_update
+
+- 事件循环只负责网络读写，SQLite 查询交给专用的数据库线程池，连接池大小与线程数相同；
+  sqlite3 执行查询期间释放 GIL，多个读查询可以真正并行
+- 总数查询与分页查询作为两个任务并发执行（asyncio.gather），不再先 COUNT 再取页
+- 写操作走单独的单线程执行器：SQLite 同一时间只允许一个写事务，写请求排队而不占用读线程
+- 自带基于 asyncio.start_server 的精简 HTTP/1.1 服务（keep-alive，请求体按 Content-Length 读取），
+  每个连接只是一个协程，单进程即可维持数千个并发连接，不依赖额外的包
+
+用法：python -m Paged.paged_async --port 5001 --db-threads 8
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import create_engine, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from db import engine as default_engine
+from models import PagedProduct
+from modules.serialization import dumps
+
+TABLE = PagedProduct.__table__
+SORT_COLUMNS = ("paged_price", "paged_popularity", "paged_name")
+
+
+class AsyncPagedStore:
+    """paged_products 表的异步访问：读查询在线程池中执行，写操作串行执行"""
+
+    def __init__(self, url: Optional[str] = None, db_threads: int = 8):
+        url = url or default_engine.url
+        self.engine = create_engine(url, pool_size=db_threads, max_overflow=0)
+        self._readers = ThreadPoolExecutor(db_threads, thread_name_prefix="paged-db")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="paged-db-write")
+
+    def close(self):
+        self._readers.shutdown()
+        self._writer.shutdown()
+        self.engine.dispose()
+
+    async def _run(self, executor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    # ---------------- 查询 ----------------
+
+    @staticmethod
+    def _conditions(category=None, min_price=None, max_price=None) -> list:
+        conditions = []
+        if category:
+            conditions.append(TABLE.c.paged_category == category)
+        if min_price:
+            conditions.append(TABLE.c.paged_price >= float(min_price))
+        if max_price:
+            conditions.append(TABLE.c.paged_price <= float(max_price))
+        return conditions
+
+    def _count(self, conditions) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(TABLE).where(*conditions)).scalar_one()
+
+    def _page(self, conditions, sort_by, offset, limit) -> List[dict]:
+        stmt = select(TABLE).where(*conditions)
+        if sort_by in SORT_COLUMNS:
+            stmt = stmt.order_by(TABLE.c[sort_by].desc())
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(stmt.offset(offset).limit(limit))]
+
+    async def get_paged_products(self, page=1, page_size=20, sort_by="paged_popularity", category=None,
+                                 min_price=None, max_price=None) -> Tuple[int, List[dict]]:
+        if page < 1 or page_size < 1:
+            raise ValueError("page 与 page_size 必须为正整数")
+        conditions = self._conditions(category, min_price, max_price)
+        # 两个查询互不依赖，分别占用一个数据库线程同时执行
+        return await asyncio.gather(
+            self._run(self._readers, self._count, conditions),
+            self._run(self._readers, self._page, conditions, sort_by, (page - 1) * page_size, page_size))
+
+    # ---------------- 批量写入 ----------------
+
+    def _execute(self, statements) -> None:
+        """在一个事务中依次执行，statements 为 (语句, 参数) 列表，参数为 None 表示无参数"""
+        with self.engine.begin() as conn:
+            for stmt, params in statements:
+                conn.execute(stmt, params)
+
+    @staticmethod
+    def _check_columns(rows: List[dict]) -> None:
+        """每条记录必须是对象且字段都是表中的列；insert / update 对多余的键不报错，会被静默丢弃"""
+        for row in rows:
+            if not isinstance(row, dict):
+                raise ValueError("每条记录必须是 JSON 对象")
+            unknown = row.keys() - TABLE.c.keys()
+            if unknown:
+                raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+
+    async def batch_add(self, products: List[dict]) -> int:
+        self._check_columns(products)
+        if products:
+            await self._run(self._writer, self._execute, [(insert(TABLE), products)])
+        return len(products)
+
+    async def batch_delete(self, ids: List[str]) -> int:
+        await self._run(self._writer, self._execute, [(delete(TABLE).where(TABLE.c.paged_id.in_(ids)), None)])
+        return len(ids)
+
+    async def batch_update(self, updates: List[dict]) -> int:
+        self._check_columns(updates)
+        statements = [(update(TABLE).where(TABLE.c.paged_id == upd["paged_id"]).values(**upd), None)
+                      for upd in updates]
+        await self._run(self._writer, self._execute, statements)
+        return len(updates)
+
+
+class AsyncPagedServer:
+    """精简的 asyncio HTTP/1.1 服务，只处理分页商品的四个接口"""
+
+    def __init__(self, store: AsyncPagedStore):
+        self.store = store
+        self.routes = {
+            ("GET", "/api/paged_products"): self.get_paged_products,
+            ("POST", "/api/paged_products/batch_add"): self.batch_add,
+            ("POST", "/api/paged_products/batch_delete"): self.batch_delete,
+            ("POST", "/api/paged_products/batch_update"): self.batch_update,
+        }
+
+    # ---------------- 接口 ----------------
+
+    async def get_paged_products(self, args: Dict[str, str], body: bytes):
+        total, products = await self.store.get_paged_products(
+            int(args.get("page", 1)), int(args.get("page_size", 20)), args.get("sort_by", "paged_popularity"),
+            args.get("category"), args.get("min_price"), args.get("max_price"))
+        return HTTPStatus.OK, {"total": total, "products": products}
+
+    async def batch_add(self, args, body):
+        count = await self.store.batch_add(_json(body)["products"])
+        return HTTPStatus.OK, {"status": "success", "count": count}
+
+    async def batch_delete(self, args, body):
+        count = await self.store.batch_delete(_json(body)["ids"])
+        return HTTPStatus.OK, {"status": "success", "count": count}
+
+    async def batch_update(self, args, body):
+        count = await self.store.batch_update(_json(body)["updates"])
+        return HTTPStatus.OK, {"status": "success", "count": count}
+
+    async def dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {"status": "error", "msg": "接口不存在"}
+        args = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            return await handler(args, body)
+        except KeyError as e:
+            return HTTPStatus.BAD_REQUEST, {"status": "error", "msg": f"缺少字段 {e}"}
+        except (ValueError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"status": "error", "msg": str(e)}
+        except IntegrityError as e:  # 主键重复、非空列缺值等，整个事务已回滚
+            return HTTPStatus.BAD_REQUEST, {"status": "error", "msg": f"数据不合法: {e.orig}"}
+        except SQLAlchemyError as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"status": "error", "msg": f"数据库错误: {e}"}
+
+    # ---------------- HTTP ----------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """一个连接一个协程，keep-alive 时在同一连接上依次处理多个请求"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, target, body)
+                data = dumps(payload)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # 客户端断开或请求格式错误，直接关闭连接
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int, backlog: int = 4096):
+        server = await asyncio.start_server(self.handle, host, port, backlog=backlog)
+        print(f"异步分页接口监听 http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def _json(body: bytes):
+    return json.loads(body or b"null") or {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分页商品接口的异步服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--db-threads", type=int, default=8, help="数据库线程池大小")
+    args = parser.parse_args()
+    store = AsyncPagedStore(db_threads=args.db_threads)
+    try:
+        asyncio.run(AsyncPagedServer(store).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
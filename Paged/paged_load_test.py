@@ -0,0 +1,145 @@
+"""
+分页接口压测：分别启动同步版本（Flask 蓝图 paged_api + werkzeug 多线程服务）与异步版本
+（Paged.paged_async），用 asyncio 客户端保持 --concurrency 个并发连接，
+随机请求不同页码、类别与排序，统计吞吐量、延迟分位数与失败数。
+
+用法：python -m Paged.paged_load_test --concurrency 2000 --requests 20000
+      python -m Paged.paged_load_test --only async --concurrency 5000
+"""
+import argparse
+import asyncio
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+CATEGORIES = ["", "Books", "Clothing", "Electronics", "Toys"]
+SORTS = ["paged_popularity", "paged_price", "paged_name"]
+
+
+def _serve_flask(port: int):
+    """同步版本：只挂载分页蓝图，避免导入 app 时生成演示数据"""
+    from flask import Flask
+    from werkzeug.serving import make_server
+
+    from Paged.paged_api import paged_api
+
+    flask_app = Flask(__name__)
+    flask_app.register_blueprint(paged_api)
+    make_server("127.0.0.1", port, flask_app, threaded=True).serve_forever()
+
+
+def _start(mode: str, port: int, db_threads: int) -> subprocess.Popen:
+    if mode == "flask":
+        cmd = [sys.executable, "-m", "Paged.paged_load_test", "--serve-flask", str(port)]
+    else:
+        cmd = [sys.executable, "-m", "Paged.paged_async", "--port", str(port), "--db-threads", str(db_threads)]
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _target(rng: random.Random) -> str:
+    query = f"/api/paged_products?page={rng.randint(1, 20)}&page_size=20&sort_by={rng.choice(SORTS)}"
+    category = rng.choice(CATEGORIES)
+    return query + (f"&category={category}" if category else "")
+
+
+async def _connection(port: int, n: int, rng: random.Random, latencies: list, failures: list):
+    """一个 keep-alive 连接上依次发送 n 个请求；连接断开时重连"""
+    reader = writer = None
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {_target(rng)} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length, keep_alive = 0, True
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+                elif name.lower() == "connection":
+                    keep_alive = value.strip().lower() != "close"
+            await reader.readexactly(length)
+            if status != 200:
+                failures.append(status)
+            latencies.append(time.perf_counter() - start)
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            failures.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port: int, concurrency: int, total: int, seed: int = 0):
+    rng = random.Random(seed)
+    latencies, failures = [], []
+    per_connection = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_connection(port, n, random.Random(rng.random()), latencies, failures)
+                           for n in per_connection if n))
+    return time.perf_counter() - start, latencies, failures
+
+
+async def _wait_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"端口 {port} 上的服务未启动")
+
+
+def run(mode: str, port: int, concurrency: int, total: int, db_threads: int):
+    server = _start(mode, port, db_threads)
+    try:
+        asyncio.run(_wait_ready(port))
+        asyncio.run(load(port, min(concurrency, 50), 200))  # 预热
+        return asyncio.run(load(port, concurrency, total))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分页接口同步/异步版本压测")
+    parser.add_argument("--concurrency", type=int, default=1000, help="并发连接数")
+    parser.add_argument("--requests", type=int, default=10000, help="总请求数")
+    parser.add_argument("--db-threads", type=int, default=8, help="异步版本的数据库线程数")
+    parser.add_argument("--only", choices=["flask", "async"], default=None)
+    parser.add_argument("--port", type=int, default=5101)
+    parser.add_argument("--serve-flask", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve_flask:
+        _serve_flask(args.serve_flask)
+        return
+
+    # 每个连接占一个文件描述符，客户端与服务端都需要放宽上限
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.concurrency * 2 + 256)), hard))
+
+    print(f"{'版本':<8}{'并发':>8}{'请求':>8}{'失败':>8}{'req/s':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for i, mode in enumerate([args.only] if args.only else ["flask", "async"]):
+        elapsed, latencies, failures = run(mode, args.port + i, args.concurrency, args.requests, args.db_threads)
+        p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if latencies else (0, 0)
+        print(f"{mode:<8}{args.concurrency:>8}{len(latencies):>8}{len(failures):>8}"
+              f"{len(latencies) / elapsed:>10.0f}{p50:>10.1f}{p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
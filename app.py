@@ -1,10 +1,21 @@
 from flask import Flask, render_template, request, jsonify
 from data_generator import DataGenerator
 from models import Product, Customer, CustomerRelation, MarketingTask, PagedProduct
-from modules.task_scheduler import TaskScheduler
+from modules.task_scheduler import DependencyCycleError, TaskScheduler
+from modules.task_executor import TaskExecutor, simulated_job
 from modules.customer_network import CustomerNetwork
 from modules.product_index import ProductIndex
+from modules.product_graph import ProductGraphStore
+from modules.serialization import CUSTOMER_JSON, PRODUCT_JSON, TASK_JSON, compose, json_response, loads, raw
+from modules.response_cache import ResponseCache
+from modules.rwlock import reading, writing
+from modules.snapshot import (LazyEngine, Snapshot, restore_customer_network, restore_product_index,
+                              restore_task_scheduler, save_engines)
 from datetime import datetime
+from functools import partial
+import os
+import threading
+from itertools import islice
 from flask import Flask, request, jsonify, render_template
 from db import Session
 from Paged.paged_api import paged_api
@@ -14,29 +25,30 @@ app = Flask(__name__)
 
 app.register_blueprint(paged_api)
 
-generator = DataGenerator()
-data = generator.generate_all_data()
-
-task_scheduler = TaskScheduler()
-customer_network = CustomerNetwork()
-product_index = ProductIndex()
-
-for product in data["products"]:
-    product_index.insert(Product(**product))
-
-for customer in data["customers"]:
-    customer_network.add_customer(Customer(**customer))
-
-for relation in data["relations"]:
-    customer_network.add_relation(CustomerRelation(**relation))
-
-for task in data["tasks"]:
-    task_scheduler.insert(MarketingTask(**task))
+# 快照文件存在时 mmap 映射并惰性恢复三个引擎（第一次使用时才建索引），否则现场生成演示数据
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "state.snap")
+# COLUMNAR_PRODUCTS=1 时商品本体使用列式存储（见 modules.product_store）
+COLUMNAR_PRODUCTS = os.environ.get("COLUMNAR_PRODUCTS") == "1"
+product_graph_store = ProductGraphStore()
+# 读接口响应缓存：键含各引擎的 generation，数据未变时轮询直接返回 304
+response_cache = ResponseCache()
+
+if os.path.exists(SNAPSHOT_PATH):
+    snapshot = Snapshot(SNAPSHOT_PATH)
+    task_scheduler = LazyEngine(lambda: restore_task_scheduler(snapshot))
+    customer_network = LazyEngine(lambda: restore_customer_network(snapshot))
+    product_index = LazyEngine(lambda: restore_product_index(snapshot, COLUMNAR_PRODUCTS))
+else:
+    generator = DataGenerator()
+    data = generator.generate_all_data()
 
-for before_id, after_id in data["dependencies"]:
-    task_scheduler.add_dependency(before_id, after_id)
+    # 批量构建：排序一次、建堆一次、一次拓扑排序查环，不再逐条插入
+    task_scheduler = TaskScheduler.from_records(data["tasks"], data["dependencies"])
+    customer_network = CustomerNetwork.from_records(data["customers"], data["relations"])
+    product_index = ProductIndex.from_records(data["products"], columnar=COLUMNAR_PRODUCTS)
 
 @app.route("/")
+@reading(lambda: [product_index, customer_network, task_scheduler])
 def index():
     return render_template(
         "index.html",
@@ -47,6 +59,7 @@ def index():
     )
 
 @app.route("/products")
+@reading(lambda: [product_index])
 def products():
     """商品管理页面"""
     return render_template(
@@ -55,7 +68,22 @@ def products():
         categories=product_index.category_index.keys()
     )
 
+def _int_arg(name, default=None, minimum=0):
+    """读取整数查询参数；不是整数或小于 minimum 时抛出 ValueError，由视图返回 400"""
+    value = request.args.get(name, "")
+    if value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 必须为整数") from None
+    if value < minimum:
+        raise ValueError(f"参数 {name} 不能小于 {minimum}")
+    return value
+
 @app.route("/products/search")
+@reading(lambda: [product_index])
+@response_cache.cached(lambda: [product_index])
 def search_products():
     """商品搜索接口"""
     query = request.args.get("q", "").strip()
@@ -63,49 +91,123 @@ def search_products():
     min_price_str = request.args.get("min_price", "")
     max_price_str = request.args.get("max_price", "")
     sort_by = request.args.get("sort_by", "popularity")  # 支持按热度、价格等排序
+    try:
+        # 可选分页参数 offset / limit，不传 limit 时返回全部结果
+        offset = _int_arg("offset", 0)
+        limit = _int_arg("limit")
+        min_price = float(min_price_str) if min_price_str else 0
+        max_price = float(max_price_str) if max_price_str else float("inf")
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+    stop = offset + limit if limit is not None else None
+    has_price = min_price > 0 or max_price < float("inf")
 
-    min_price = float(min_price_str) if min_price_str else 0
-    max_price = float(max_price_str) if max_price_str else float("inf")
-
-    # 多条件组合查询
-        # 初始结果用所有商品ID
-    results = set(product_index.products.keys())
-
-    if query:
-        results &= set(p.id for p in product_index.search_by_prefix(query))
-    if category:
-        results &= set(p.id for p in product_index.search_by_category(category))
-    if min_price > 0 or max_price < float("inf"):
-        results &= set(p.id for p in product_index.search_by_price_range(min_price, max_price))
-
-    # 排序
-    products = [product_index.products[pid] for pid in results]
     if sort_by == "price":
-        products.sort(key=lambda x: x.price)
+        sort_key = lambda x: x.price
     elif sort_by == "name":
-        products.sort(key=lambda x: x.name)
+        sort_key = lambda x: x.name
+    else:
+        sort_key = product_index.popularity_index.sort_key
+
+    if query:
+        # 前缀查询最多返回 Top-K 个候选，再用类别 / 价格过滤
+        products = [p for p in product_index.search_by_prefix(query)
+                    if (not category or p.category == category)
+                    and min_price <= p.price <= max_price]
+        products = sorted(products, key=sort_key)[offset:stop]
+    elif category and sort_by != "name":
+        # 类别 + 价格 / 热度查询直接走类别二级索引，不做集合求交
+        products = product_index.search_by_category(
+            category, sort_by="price" if sort_by == "price" else "popularity",
+            min_price=min_price if has_price else None,
+            max_price=max_price if has_price else None,
+            offset=offset, limit=limit)
+    elif category:
+        products = product_index.search_by_category(
+            category, min_price=min_price if has_price else None,
+            max_price=max_price if has_price else None)
+        products = sorted(products, key=sort_key)[offset:stop]
+    elif sort_by not in ("price", "name") and not has_price:
+        # 不过滤时直接从热度榜分页读取，不再整体排序
+        pids = product_index.popularity_index.iter_ids(None, offset)
+        products = [product_index.products[pid] for pid in islice(pids, limit)]
     else:
-        products.sort(key=lambda x: x.popularity, reverse=True)
+        products = (product_index.search_by_price_range(min_price, max_price) if has_price
+                    else list(product_index.products.values()))
+        products = sorted(products, key=sort_key)[offset:stop]
 
+    return PRODUCT_JSON.response(products)
+
+@app.route("/products/leaderboard")
+@reading(lambda: [product_index])
+@response_cache.cached(lambda: [product_index])
+def product_leaderboard():
+    """热度榜 Top-K，可按类别过滤"""
+    try:
+        k = _int_arg("k", 10)
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+    category = request.args.get("category") or None
     return jsonify([
-        {
-            "id": p.id,
-            "name": p.name,
-            "brand": getattr(p, "brand", ""),
-            "category": p.category,
-            "price": p.price,
-            "description": getattr(p, "description", ""),
-            "image_url": getattr(p, "image_url", ""),
-            "status": getattr(p, "status", ""),
-            "sales": getattr(p, "sales", 0),
-            "rating": getattr(p, "rating", 0),
-            "popularity": p.popularity,
-            "stock": p.stock
-        }
+        {"rank": i, "id": p.id, "name": p.name, "category": p.category,
+         "popularity": p.popularity, "sales": p.sales}
+        for i, p in enumerate(product_index.top_popular(k, category), 1)
+    ])
+
+@app.route("/products/analytics")
+@reading(lambda: [product_index])
+@response_cache.cached(lambda: [product_index])
+def product_analytics():
+    """目录统计：全局与分类汇总、价格分位数、价格直方图，可按类别过滤分位数与直方图"""
+    category = request.args.get("category") or None
+    try:
+        bins = int(request.args.get("bins", 20))
+        percentiles = [float(q) for q in request.args.get("percentiles", "25,50,75,90,99").split(",") if q]
+        analytics = product_index.analytics
+        return jsonify({
+            "summary": analytics.summary(),
+            "percentiles": analytics.price_percentiles(percentiles, category),
+            "category_medians": analytics.category_percentiles([50]),
+            "histogram": analytics.price_histogram(bins, category, request.args.get("log") == "1"),
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+
+@app.route("/products/<product_id>/rank")
+@reading(lambda: [product_index])
+def product_rank(product_id):
+    """查询商品的热度名次（全局及类别内）"""
+    product = product_index.search_by_id(product_id)
+    if not product:
+        return jsonify({"status": "error", "msg": "商品不存在"}), 404
+    return jsonify({
+        "id": product_id,
+        "rank": product_index.popularity_rank(product_id),
+        "category": product.category,
+        "category_rank": product_index.popularity_rank(product_id, product.category),
+        "total": len(product_index.popularity_index)
+    })
+
+@app.route("/products/<product_id>/similar")
+@reading(lambda: [product_index])
+def similar_products(product_id):
+    """相似商品推荐（近似最近邻）"""
+    try:
+        k = _int_arg("k", 10)
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+    try:
+        products = product_index.similar_products(product_id, k)
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 404
+    return jsonify([
+        {"id": p.id, "name": p.name, "category": p.category, "brand": p.brand,
+         "price": p.price, "rating": p.rating, "popularity": p.popularity}
         for p in products
     ])
 
 @app.route("/products/<product_id>")
+@reading(lambda: [product_index])
 def product_detail(product_id):
     """商品详情页面"""
     product = product_index.search_by_id(product_id)
@@ -114,6 +216,7 @@ def product_detail(product_id):
     return render_template("product_detail.html", product=product)
 
 @app.route("/products/add", methods=["POST"])
+@writing(lambda: [product_index])
 def add_product():
     data = request.json
     try:
@@ -124,23 +227,28 @@ def add_product():
         return jsonify({"success": False, "error": str(e)}), 400
 
 @app.route("/products/<product_id>/delete", methods=["POST"])
+@writing(lambda: [product_index])
 def delete_product(product_id):
     try:
         product_index.delete(product_id)
+        PRODUCT_JSON.invalidate(product_id)
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 @app.route("/products/<product_id>/update", methods=["POST"])
+@writing(lambda: [product_index])
 def update_product(product_id):
     data = request.json
     try:
         product_index.update(product_id, **data)
+        PRODUCT_JSON.invalidate(product_id)
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 @app.route("/customers")
+@writing(lambda: [customer_network])
 def customers():
     return render_template(
         "customers.html",
@@ -149,12 +257,14 @@ def customers():
         segments=customer_network.get_customer_segments()
     )
 
-@app.route("/customers", methods=["GET"])
+@app.route("/api/customers")
+@reading(lambda: [customer_network])
 def get_customers():
-    """获取所有客户信息"""
-    return jsonify([c.__dict__ for c in customer_network.customers.values()])
+    """获取所有客户信息（JSON）；GET /customers 是客户管理页面"""
+    return CUSTOMER_JSON.response(list(customer_network.customers.values()))
 
 @app.route("/customers", methods=["POST"])
+@writing(lambda: [customer_network])
 def add_customer():
     """新增客户"""
     data = request.json
@@ -162,32 +272,80 @@ def add_customer():
     customer_network.add_customer(customer)
     return jsonify({"status": "success"})
 
+# 批量接口的响应中最多列出的错误行数，其余只计数
+BATCH_ERROR_LIMIT = 1000
+
+def _batch_rows(key):
+    """
+    解析批量接口的请求体：JSON 数组（或 {key: [...]}），Content-Type 为 application/x-ndjson 时每行一条。
+    返回 (记录列表, 各记录在请求中的行号, 解析错误)；NDJSON 中无法解析的行记为该行的错误，其余行照常处理。
+    整个请求体不是合法 JSON 时抛出 ValueError
+    """
+    body = request.get_data()
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        rows, positions, errors = [], [], []
+        for row, line in enumerate(line for line in body.splitlines() if line.strip()):
+            try:
+                rows.append(loads(line))
+                positions.append(row)
+            except ValueError:
+                errors.append((row, "不是合法的 JSON"))
+        return rows, positions, errors
+    data = loads(body)
+    if isinstance(data, dict):
+        data = data.get(key)
+    if not isinstance(data, list):
+        raise ValueError(f"请求体应为 JSON 数组或 {{\"{key}\": [...]}}")
+    return data, range(len(data)), []
+
+def _batch_import(key, apply):
+    """批量导入：解析、由 apply 一次性校验并写入，汇总逐行错误"""
+    try:
+        rows, positions, errors = _batch_rows(key)
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": f"请求体不合法: {e}"}), 400
+    total = len(rows) + len(errors)
+    errors += [(positions[i], msg) for i, msg in apply(rows)]
+    errors.sort()
+    return jsonify({
+        "status": "success" if not errors else "partial",
+        "total": total,
+        "added": total - len(errors),
+        "error_count": len(errors),
+        "errors": [{"row": row, "msg": msg} for row, msg in errors[:BATCH_ERROR_LIMIT]],
+    })
+
+@app.route("/customers/batch", methods=["POST"])
+@writing(lambda: [customer_network])
+def add_customers_batch():
+    """批量新增客户：整批只加一次锁、generation 只递增一次，逐行报告错误"""
+    return _batch_import("customers", customer_network.add_customers)
+
 @app.route("/customers/<customer_id>", methods=["PUT"])
+@writing(lambda: [customer_network])
 def update_customer(customer_id):
     """修改客户信息"""
     data = request.json
-    customer = customer_network.customers.get(customer_id)
-    if not customer:
-        return jsonify({"status": "error", "msg": "客户不存在"}), 404
-    for k, v in data.items():
-        if hasattr(customer, k):
-            setattr(customer, k, v)
+    try:
+        customer_network.update_customer(customer_id, **data)
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 404
+    CUSTOMER_JSON.invalidate(customer_id)
     return jsonify({"status": "success"})
 
 @app.route("/customers/<customer_id>", methods=["DELETE"])
+@writing(lambda: [customer_network])
 def delete_customer(customer_id):
     """删除客户"""
-    if customer_id not in customer_network.customers:
-        return jsonify({"status": "error", "msg": "客户不存在"}), 404
-    customer_network.customers.pop(customer_id)
-    customer_network.adjacency_matrix.pop(customer_id, None)
-    # 删除所有客户关系
-    customer_network.relations = [rel for rel in customer_network.relations if rel.from_customer != customer_id and rel.to_customer != customer_id]
-    for adj in customer_network.adjacency_matrix.values():
-        adj.pop(customer_id, None)
+    try:
+        customer_network.delete_customer(customer_id)  # 同时删除该客户的全部关系
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 404
+    CUSTOMER_JSON.invalidate(customer_id)
     return jsonify({"status": "success"})
 
 @app.route("/relations", methods=["POST"])
+@writing(lambda: [customer_network])
 def add_relation():
     """新增客户关系"""
     data = request.json
@@ -195,35 +353,43 @@ def add_relation():
     customer_network.add_relation(relation)
     return jsonify({"status": "success"})
 
+@app.route("/relations/batch", methods=["POST"])
+@writing(lambda: [customer_network])
+def add_relations_batch():
+    """批量新增客户关系，两端客户必须已存在"""
+    return _batch_import("relations", customer_network.add_relations)
+
 @app.route("/relations", methods=["DELETE"])
+@writing(lambda: [customer_network])
 def delete_relation():
     """删除客户关系"""
     data = request.json
-    from_id = data["from_customer"]
-    to_id = data["to_customer"]
-    customer_network.relations = [rel for rel in customer_network.relations if not (rel.from_customer == from_id and rel.to_customer == to_id)]
-    if from_id in customer_network.adjacency_matrix:
-        customer_network.adjacency_matrix[from_id].pop(to_id, None)
+    customer_network.delete_relation(data["from_customer"], data["to_customer"])
     return jsonify({"status": "success"})
 
 @app.route("/customers/graph")
+@reading(lambda: [customer_network])
+@response_cache.cached(lambda: [customer_network])
 def get_customer_graph():
     """获取客户网络图数据（节点+边）"""
     return jsonify(customer_network.get_graph_data())
 
 @app.route("/customers/pagerank")
+@writing(lambda: [customer_network])
 def get_customer_pagerank():
     """获取客户PageRank影响力评分"""
     pr = customer_network.calculate_customer_importance(method="pagerank")
     return jsonify(pr)
 
 @app.route("/customers/centrality")
+@reading(lambda: [customer_network])
 def get_customer_centrality():
     """获取客户度中心性评分"""
     centrality = customer_network.calculate_customer_importance(method="degree")
     return jsonify(centrality)
 
 @app.route("/customers/propagation")
+@reading(lambda: [customer_network])
 def get_customer_propagation():
     """影响力传播模拟"""
     source_id = request.args.get("source_id")
@@ -233,6 +399,8 @@ def get_customer_propagation():
     return jsonify(list(result))
 
 @app.route("/customers/statistics")
+@reading(lambda: [customer_network])
+@response_cache.cached(lambda: [customer_network])
 def get_customer_statistics():
     """获取客户网络统计信息"""
     return jsonify(customer_network.get_network_statistics())
@@ -243,41 +411,76 @@ def get_customer_statistics():
 def customer_network_page():
     return render_template("customer_network.html")
 
-@app.route("/tasks", methods=["POST"])
-def add_task():
-    """插入任务"""
-    data = request.json
-    task = MarketingTask(
+def _task_from_json(data) -> MarketingTask:
+    """由请求中的任务字典构造任务，优先级 = 紧急度 × 影响力"""
+    urgency, influence = float(data["urgency"]), float(data["influence"])
+    return MarketingTask(
         id=data["id"],
         name=data["name"],
-        urgency=float(data["urgency"]),
-        influence=float(data["influence"]),
-        priority=float(data["urgency"]) * float(data["influence"]),
+        type=data.get("type", "其他"),
+        urgency=urgency,
+        influence=influence,
+        priority=urgency * influence,
         created_date=data.get("created_date", datetime.now().strftime("%Y-%m-%d"))
     )
+
+@app.route("/tasks", methods=["POST"])
+@writing(lambda: [task_scheduler])
+def add_task():
+    """插入任务"""
+    data = request.json
+    task = _task_from_json(data)
     task_scheduler.insert(task)
     return jsonify({"status": "success"})
 
+@app.route("/tasks/batch", methods=["POST"])
+@writing(lambda: [task_scheduler])
+def import_tasks():
+    """
+    批量导入任务计划：{"tasks": [...], "dependencies": [{"before_id": .., "after_id": ..}, ...]}，
+    依赖也可以写成 [before_id, after_id]。整批校验、一次拓扑排序查环，任何错误都整批拒绝
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "msg": "请求体应为 JSON 对象"}), 400
+    try:
+        tasks = [_task_from_json(t) for t in data.get("tasks", [])]
+        dependencies = [(d["before_id"], d["after_id"]) if isinstance(d, dict) else tuple(d)
+                        for d in data.get("dependencies", [])]
+        result = task_scheduler.import_plan(tasks, dependencies)
+    except DependencyCycleError as e:
+        return jsonify({"status": "error", "msg": str(e), "cycle": e.cycle}), 400
+    except KeyError as e:
+        return jsonify({"status": "error", "msg": f"任务计划缺少字段 {e}"}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "msg": f"任务计划不合法: {e}"}), 400
+    return jsonify({"status": "success", **result})
+
 @app.route("/tasks/<task_id>", methods=["DELETE"])
+@writing(lambda: [task_scheduler])
 def delete_task(task_id):
     """删除任务"""
     try:
         task_scheduler.delete(task_id)
+        TASK_JSON.invalidate(task_id)
         return jsonify({"status": "success"})
     except Exception as e:
         return jsonify({"status": "error", "msg": str(e)}), 400
 
 @app.route("/tasks/<task_id>", methods=["PUT"])
+@writing(lambda: [task_scheduler])
 def update_task(task_id):
     """修改任务"""
     data = request.json
     try:
         task_scheduler.update(task_id, **data)
+        TASK_JSON.invalidate(task_id)
         return jsonify({"status": "success"})
     except Exception as e:
         return jsonify({"status": "error", "msg": str(e)}), 400
 
 @app.route("/tasks/<task_id>/dependencies", methods=["POST"])
+@writing(lambda: [task_scheduler])
 def set_dependency(task_id):
     """设置依赖"""
     data = request.json
@@ -289,6 +492,7 @@ def set_dependency(task_id):
         return jsonify({"status": "error", "msg": str(e)}), 400
 
 @app.route("/tasks/<task_id>/dependencies", methods=["DELETE"])
+@writing(lambda: [task_scheduler])
 def remove_dependency(task_id):
     """移除依赖"""
     data = request.json
@@ -300,24 +504,80 @@ def remove_dependency(task_id):
         return jsonify({"status": "error", "msg": str(e)}), 400
 
 @app.route("/tasks/topk")
+@reading(lambda: [task_scheduler])
+@response_cache.cached(lambda: [task_scheduler])
 def topk_tasks():
     """查看前k个任务"""
     k = int(request.args.get("k", 5))
     tasks = task_scheduler.top_k_tasks(k)
-    return jsonify([task.__dict__ for task in tasks])
+    return TASK_JSON.response(tasks)
 
 @app.route("/tasks/execute", methods=["POST"])
+@writing(lambda: [task_scheduler])
 def execute_task():
     """执行优先级最高的可执行任务"""
     task = task_scheduler.execute_highest_priority()
     if task:
         # 返回最新的可执行任务列表
-        tasks = [t.__dict__ for t in task_scheduler.top_k_tasks(10)]
-        return jsonify({"status": "success", "executed_task": task.__dict__, "tasks": tasks})
+        tasks = TASK_JSON.encode_list(task_scheduler.top_k_tasks(10))
+        return json_response(compose({"status": "success", "executed_task": raw(TASK_JSON.fragment(task)),
+                                      "tasks": raw(tasks)}))
     else:
         return jsonify({"status": "no_task"})
 
+# 后台执行引擎：同一时间只运行一轮，报告保留到下一轮开始
+MAX_TASK_WORKERS = (os.cpu_count() or 1) * 4
+# 状态只在本进程内存中；多进程服务（modules.cluster）下 GET /tasks/run 也转发给写进程回答
+task_runs = {"executor": None, "report": None}
+task_runs_lock = threading.Lock()
+
+@app.route("/tasks/run", methods=["POST"])
+def run_tasks():
+    """
+    用 N 个工作者并发执行所有可执行的任务（演示任务按影响力计时），立即返回。
+    参数 workers（1 到 MAX_TASK_WORKERS）、mode（thread / process）、seconds（单个任务的基准耗时，不能为负）；
+    进度与报告见 GET /tasks/run
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        workers = int(data.get("workers", 4))
+        seconds = float(data.get("seconds", 0.5))
+        if not 1 <= workers <= MAX_TASK_WORKERS:
+            raise ValueError(f"workers 必须在 1 到 {MAX_TASK_WORKERS} 之间")
+        if not 0 <= seconds < float("inf"):
+            raise ValueError("seconds 必须为非负数")
+        runner = partial(simulated_job, seconds=seconds)
+        executor = TaskExecutor(task_scheduler, runner, workers, data.get("mode", "thread"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+    with task_runs_lock:
+        if task_runs["executor"] is not None:
+            return jsonify({"status": "error", "msg": "已有一轮任务在执行"}), 409
+        task_runs["executor"], task_runs["report"] = executor, None
+
+    def work():
+        try:
+            report = executor.run()
+        except Exception as e:
+            report = {"error": str(e)}
+        with task_runs_lock:
+            task_runs["executor"], task_runs["report"] = None, report
+
+    threading.Thread(target=work, daemon=True).start()
+    return jsonify({"status": "started", "workers": workers, "mode": executor.mode})
+
+@app.route("/tasks/run")
+def task_run_status():
+    """执行进度（运行中的任务及其工作者）与上一轮的报告"""
+    with task_runs_lock:
+        executor, report = task_runs["executor"], task_runs["report"]
+    if executor is not None:
+        return jsonify({"status": "running", **executor.progress()})
+    return jsonify({"status": "idle", "report": report})
+
 @app.route("/tasks/dag")
+@reading(lambda: [task_scheduler])
+@response_cache.cached(lambda: [task_scheduler])
 def get_dag():
     """获取DAG数据用于前端可视化"""
     return jsonify(task_scheduler.get_dependencies_graph())
@@ -325,6 +585,7 @@ def get_dag():
 # ------------------ 任务管理页面渲染 ------------------
 
 @app.route("/tasks")
+@reading(lambda: [task_scheduler])
 def tasks():
     """任务管理页面"""
     k = int(request.args.get("k", 10))
@@ -391,10 +652,44 @@ def recommend_tree():
     n = data.get('n', 20)
     mode = data.get('mode', 'min')
     k = data.get('k', None)
-    generator = DataGenerator()
-    result = generator.generate_product_edges_and_mst(n=n, mode=mode, k=k)
+    ks = data.get('ks', None)  # exact 模式下一次求解多个 k，'all' 表示整个可行区间
+    seed = data.get('seed', 0)
+    # 同样的 (n, seed) 复用缓存的商品关系图，只重新运行生成树阶段；get 自行加锁，建图不阻塞其他请求
+    try:
+        graph = product_graph_store.get(n, seed, similarity=(mode == 'similarity'))
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+    result = DataGenerator().generate_product_edges_and_mst(mode=mode, k=k, ks=ks, graph=graph)
     return jsonify(result)
 
+@app.route('/api/recommend_tree/delta', methods=['POST'])
+def recommend_tree_delta():
+    """
+    在缓存的商品关系图上增量更新生成树：
+    {"n", "seed", "mode", "reset", "add_products", "remove_products", "add_edges", "remove_edges"}
+    """
+    data = request.json or {}
+    try:
+        # 先在会话锁之外取到（或建好）关系图，持锁期间 dynamic 只会命中缓存
+        product_graph_store.get(data.get('n', 20), data.get('seed', 0))
+    except ValueError as e:
+        return jsonify({"status": "error", "msg": str(e)}), 400
+    with product_graph_store.lock:
+        try:
+            tree = product_graph_store.dynamic(data.get('n', 20), data.get('seed', 0),
+                                               data.get('mode', 'min'), reset=bool(data.get('reset')))
+            changes = tree.apply(data)
+        except (ValueError, KeyError, TypeError) as e:
+            return jsonify({"status": "error", "msg": str(e)}), 400
+        return jsonify(tree.to_result(changes))
+
+@app.route('/admin/snapshot', methods=['POST'])
+@reading(lambda: [product_index, customer_network, task_scheduler])
+def save_snapshot():
+    """把当前三个引擎的数据写成快照，下次启动直接从快照恢复"""
+    size = save_engines(SNAPSHOT_PATH, product_index, customer_network, task_scheduler)
+    return jsonify({"status": "success", "path": SNAPSHOT_PATH, "bytes": size})
+
 @app.route('/recommand')
 def recommand():
     return render_template('recommand.html')
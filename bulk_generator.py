@@ -0,0 +1,554 @@
+"""
+列式批量数据生成器（压测用）：用 NumPy 按列一次生成整批数据，显式 seed，结果可复现。
+
+每批为 ColumnBatch（struct-of-arrays：列名 -> NumPy 数组），字符串列以词表下标存储，
+只在导出时拼接。可以直接消费批次，也可以流式写入 NDJSON / SQLite，内存只占一个批次。
+与 DataGenerator 的字段和取值分布一致，日期相对固定的 reference_date 计算，不依赖当前时间。
+
+用法：python bulk_generator.py --products 10000000 --customers 1000000 --relations 5000000 \
+          --tasks 100000 --format sqlite --out bench.db --seed 42
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from data_generator import DataGenerator
+
+DEFAULT_REFERENCE_DATE = date(2025, 1, 1)
+DEFAULT_BATCH_SIZE = 1_000_000
+
+PRODUCT_STATUSES = ["在售", "下架", "预售"]
+PRODUCT_TAGS = ["限时特价", "新品上市", "爆款热卖"]
+ELECTRONICS_MODELS = ["Pro", "Max", "Lite", "Plus", "Elite"]
+CLOTHING_STYLES = ["Classic", "Modern", "Vintage", "Casual", "Formal"]
+CLOTHING_ITEMS = ["Shirt", "Dress", "Jacket", "Pants"]
+FIRST_NAMES = ['张', '李', '王', '赵', '刘', '陈', '杨', '黄', '周', '吴']
+LAST_NAMES = ['伟', '芳', '娜', '敏', '静', '丽', '强', '磊', '军', '洋']
+EMAIL_DOMAINS = ['@qq.com', '@163.com', '@gmail.com', '@outlook.com']
+REGIONS = ['北京', '上海', '广州', '深圳', '杭州', '成都', '重庆', '南京', '苏州', '武汉']
+GENDERS = ['男', '女']
+RELATION_TYPES = ["推荐", "合作", "共同购买", "评价互动", "好友", "同地区"]
+# 客户类型 -> (购买力区间, 活跃度区间)，顺序与 DataGenerator.customer_types 一致
+CUSTOMER_RANGES = {
+    "Regular": ((0.3, 0.7), (0.2, 0.6)),
+    "Premium": ((0.6, 0.9), (0.5, 0.8)),
+    "VIP": ((0.8, 1.0), (0.7, 1.0)),
+    "Wholesale": ((0.3, 0.7), (0.2, 0.6)),
+}
+
+
+class ColumnBatch:
+    """
+    一批数据的列式表示：columns 为等长 NumPy 数组，start 为该批第一行的全局序号，
+    keys 为导出时的字段名，render 把列数组逐行展开为与 keys 对应的值元组
+    """
+
+    def __init__(self, kind: str, start: int, columns: Dict[str, np.ndarray], keys: Sequence[str], render):
+        self.kind = kind
+        self.start = start
+        self.columns = columns
+        self.keys = tuple(keys)
+        self._render = render
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def records(self) -> List[dict]:
+        """展开为与 DataGenerator 相同格式的 dict 列表"""
+        keys = self.keys
+        return [dict(zip(keys, values)) for values in self._render(self)]
+
+    def rows(self) -> Iterator[tuple]:
+        """逐行产出字段值元组（顺序同 keys），用于写入 SQLite"""
+        return self._render(self)
+
+    def ndjson(self) -> str:
+        """
+        整批导出为 NDJSON 文本。字符串值都由固定词表和数字拼成，不含需要转义的字符，
+        因此按首行的字段类型生成一个 % 格式模板逐行填充，比逐行 json.dumps 快数倍
+        """
+        rows = self._render(self)
+        first = next(rows, None)
+        if first is None:
+            return ""
+        template = "{" + ", ".join(
+            f'"{k}": "%s"' if isinstance(v, str) else f'"{k}": %s' for k, v in zip(self.keys, first)) + "}\n"
+        return template % first + "".join([template % values for values in rows])
+
+
+def concat(batches: Sequence[ColumnBatch]) -> ColumnBatch:
+    """把同类的多个批次合并为一个批次"""
+    first = batches[0]
+    columns = {name: np.concatenate([b.columns[name] for b in batches]) for name in first.columns}
+    return ColumnBatch(first.kind, first.start, columns, first.keys, first._render)
+
+
+class PackedPairSet:
+    """
+    有向边去重集合：(u, v) 打包为 u << 32 | v 的 int64，存放在 NumPy 开放寻址哈希表中
+    （乘法哈希 + 线性探测，装载因子不超过 1/2）。按批插入，整批向量化探测，
+    1000 万条边约占 256MB，远小于同等规模的 Python set。
+    """
+
+    _EMPTY = -1
+    _MULT = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(self, capacity: int = 1024):
+        self.bits = max(4, int(2 * capacity - 1).bit_length())
+        self.table = np.full(1 << self.bits, self._EMPTY, dtype=np.int64)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _slots(self, keys: np.ndarray) -> np.ndarray:
+        with np.errstate(over="ignore"):
+            return ((keys.astype(np.uint64) * self._MULT) >> np.uint64(64 - self.bits)).astype(np.int64)
+
+    def _grow(self):
+        old = self.table[self.table != self._EMPTY]
+        self.bits += 1
+        self.table = np.full(1 << self.bits, self._EMPTY, dtype=np.int64)
+        self.count = 0
+        self._insert_unique(old)
+
+    def _insert_unique(self, keys: np.ndarray) -> np.ndarray:
+        """插入互不相同的 keys，返回其中原先不在集合中的掩码"""
+        table, mask = self.table, (1 << self.bits) - 1
+        slots = self._slots(keys)
+        added = np.zeros(len(keys), dtype=bool)
+        pending = np.arange(len(keys))
+        while len(pending):
+            s = slots[pending]
+            current = table[s]
+            found = current == keys[pending]
+            empty = current == self._EMPTY
+            # 同一空槽被多个键争用时只让第一个写入，其余下一轮重新探测
+            claim = pending[empty]
+            _, first = np.unique(s[empty], return_index=True)
+            winners = claim[first]
+            table[slots[winners]] = keys[winners]
+            added[winners] = True
+            done = found.copy()
+            done[np.flatnonzero(empty)[first]] = True
+            occupied = ~empty & ~found
+            slots[pending[occupied]] = (s[occupied] + 1) & mask
+            pending = pending[~done]
+        self.count += int(added.sum())
+        return added
+
+    def add(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """批量插入边，返回与输入等长的掩码：True 表示该边首次出现（批内重复只保留第一次）"""
+        keys = (np.asarray(u, dtype=np.int64) << 32) | np.asarray(v, dtype=np.int64)
+        unique, first = np.unique(keys, return_index=True)
+        while 2 * (self.count + len(unique)) > len(self.table):
+            self._grow()
+        added = self._insert_unique(unique)
+        result = np.zeros(len(keys), dtype=bool)
+        result[first[added]] = True
+        return result
+
+
+class BulkDataGenerator:
+    """
+    列式批量生成器。同样的 (seed, batch_size) 总是产出同样的数据；
+    每类数据使用独立的随机流，生成顺序不影响彼此的结果。
+    """
+
+    def __init__(self, seed: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+                 reference_date: date = DEFAULT_REFERENCE_DATE):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.reference_date = reference_date
+        vocab = DataGenerator()
+        self.categories = vocab.product_categories
+        self.brands = [vocab.product_brands[c] for c in self.categories]  # 每类 5 个品牌
+        self.customer_types = vocab.customer_types
+        # 品牌价格翻倍（与 DataGenerator 中名称含 Apple/Tiffany 的规则对应）
+        self._premium_brand = np.array([[b in ("Apple", "Tiffany") for b in row] for row in self.brands])
+        self._max_days = 1000
+        self._dates = [(reference_date - timedelta(days=d)).strftime("%Y-%m-%d") for d in range(self._max_days + 1)]
+
+    def _rng(self, kind: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, kind])
+
+    def _batches(self, n: int):
+        for start in range(0, n, self.batch_size):
+            yield start, min(self.batch_size, n - start)
+
+    # ---------------- 商品 ----------------
+
+    def products(self, n: int) -> Iterator[ColumnBatch]:
+        rng = self._rng(1)
+        for start, size in self._batches(n):
+            category = rng.integers(0, len(self.categories), size, dtype=np.uint8)
+            brand = rng.integers(0, 5, size, dtype=np.uint8)
+            price = rng.uniform(10.0, 1000.0, size)
+            price = np.round(np.where(self._premium_brand[category, brand], price * 2, price), 2)
+            columns = {
+                "index": np.arange(start, start + size, dtype=np.int64),
+                "category": category,
+                "brand": brand,
+                "name_a": rng.integers(0, 5, size, dtype=np.uint8),  # 型号 / 风格
+                "name_b": rng.integers(0, 4, size, dtype=np.uint8),  # 服装品类
+                "name_num": rng.integers(1000, 10000, size, dtype=np.int32),
+                "price": price,
+                "popularity": (1000 / (price + 1) * rng.uniform(0.5, 2.0, size)).astype(np.int64),
+                "stock": rng.integers(0, 1001, size, dtype=np.int32),
+                "status": rng.integers(0, len(PRODUCT_STATUSES), size, dtype=np.uint8),
+                "sales": rng.integers(0, 5001, size, dtype=np.int32),
+                "rating": np.round(rng.uniform(3.0, 5.0, size), 2),
+                "tag": rng.integers(0, len(PRODUCT_TAGS), size, dtype=np.uint8),
+                "days": rng.integers(0, 366, size, dtype=np.int16),
+            }
+            yield ColumnBatch("products", start, columns, self._PRODUCT_KEYS, self._render_products)
+
+    def _product_names(self, batch: ColumnBatch) -> List[str]:
+        categories, brands = self.categories, self.brands
+        names = []
+        for c, b, a, k, num in zip(batch["category"].tolist(), batch["brand"].tolist(), batch["name_a"].tolist(),
+                                   batch["name_b"].tolist(), batch["name_num"].tolist()):
+            brand = brands[c][b]
+            if c == 0:
+                names.append(f"{brand} {ELECTRONICS_MODELS[a]} {num}")
+            elif c == 1:
+                names.append(f"{brand} {CLOTHING_STYLES[a]} {CLOTHING_ITEMS[k]}")
+            else:
+                names.append(f"{brand} {categories[c]} Item {num % 1000 + 1}")
+        return names
+
+    _PRODUCT_KEYS = ("id", "name", "brand", "category", "price", "popularity", "stock", "status",
+                     "sales", "rating", "description", "image_url", "created_date")
+
+    def _render_products(self, batch: ColumnBatch):
+        categories, brands, dates = self.categories, self.brands, self._dates
+        for i, name, c, b, price, pop, stock, status, sales, rating, tag, days in zip(
+                batch["index"].tolist(), self._product_names(batch), batch["category"].tolist(),
+                batch["brand"].tolist(), batch["price"].tolist(), batch["popularity"].tolist(),
+                batch["stock"].tolist(), batch["status"].tolist(), batch["sales"].tolist(),
+                batch["rating"].tolist(), batch["tag"].tolist(), batch["days"].tolist()):
+            brand, category = brands[c][b], categories[c]
+            yield (f"PROD{i:05d}", name, brand, category, price, pop, stock, PRODUCT_STATUSES[status],
+                         sales, rating, f"{brand} {category}，高品质，热销推荐，{PRODUCT_TAGS[tag]}。",
+                         f"https://dummyimage.com/200x200/cccccc/000000&text={brand}", dates[days])
+
+    # ---------------- 客户 ----------------
+
+    def customers(self, n: int) -> Iterator[ColumnBatch]:
+        rng = self._rng(2)
+        ranges = np.array([CUSTOMER_RANGES[t] for t in self.customer_types])  # (类型, 2, 2)
+        for start, size in self._batches(n):
+            ctype = rng.integers(0, len(self.customer_types), size, dtype=np.uint8)
+            power_low, power_high = ranges[ctype, 0, 0], ranges[ctype, 0, 1]
+            act_low, act_high = ranges[ctype, 1, 0], ranges[ctype, 1, 1]
+            columns = {
+                "index": np.arange(start, start + size, dtype=np.int64),
+                "type": ctype,
+                "gender": rng.integers(0, 2, size, dtype=np.uint8),
+                "age": rng.integers(18, 61, size, dtype=np.int16),
+                "first_name": rng.integers(0, len(FIRST_NAMES), size, dtype=np.uint8),
+                "last_name": rng.integers(0, len(LAST_NAMES), size, dtype=np.uint8),
+                "phone": rng.integers(0, 10 ** 10, size, dtype=np.int64),
+                "email_num": rng.integers(100, 1000, size, dtype=np.int16),
+                "email_domain": rng.integers(0, len(EMAIL_DOMAINS), size, dtype=np.uint8),
+                "region": rng.integers(0, len(REGIONS), size, dtype=np.uint8),
+                "purchase_power": np.round(power_low + (power_high - power_low) * rng.random(size), 2),
+                "activity_level": np.round(act_low + (act_high - act_low) * rng.random(size), 2),
+                "days": rng.integers(0, self._max_days + 1, size, dtype=np.int16),
+            }
+            yield ColumnBatch("customers", start, columns, self._CUSTOMER_KEYS, self._render_customers)
+
+    _CUSTOMER_KEYS = ("id", "name", "gender", "age", "phone", "email", "region", "type",
+                      "purchase_power", "activity_level", "join_date")
+
+    def _render_customers(self, batch: ColumnBatch):
+        types, dates = self.customer_types, self._dates
+        for i, first, last, gender, age, phone, num, domain, region, ctype, power, activity, days in zip(
+                batch["index"].tolist(), batch["first_name"].tolist(), batch["last_name"].tolist(),
+                batch["gender"].tolist(), batch["age"].tolist(), batch["phone"].tolist(),
+                batch["email_num"].tolist(), batch["email_domain"].tolist(), batch["region"].tolist(),
+                batch["type"].tolist(), batch["purchase_power"].tolist(), batch["activity_level"].tolist(),
+                batch["days"].tolist()):
+            name = FIRST_NAMES[first] + LAST_NAMES[last]
+            yield (f"CUST{i:04d}", name, GENDERS[gender], age, f"1{phone:010d}",
+                         f"{name.lower()}{num}{EMAIL_DOMAINS[domain]}", REGIONS[region], types[ctype],
+                         power, activity, dates[days])
+
+    # ---------------- 客户关系 ----------------
+
+    def relations(self, customers: ColumnBatch, n: int) -> Iterator[ColumnBatch]:
+        """
+        在 customers（全部客户合并成的一个批次，见 concat）上均匀随机抽取 n 对客户，
+        去掉自环，权重规则同 DataGenerator.generate_relations
+        """
+        rng = self._rng(3)
+        m = len(customers)
+        for start, size in self._batches(n):
+            src = rng.integers(0, m, size, dtype=np.int64)
+            dst = rng.integers(0, m, size, dtype=np.int64)
+            keep = src != dst
+            yield self._relation_batch(customers, src[keep], dst[keep], rng, start)
+
+    def _relation_batch(self, customers: ColumnBatch, src: np.ndarray, dst: np.ndarray,
+                        rng: np.random.Generator, start: int) -> ColumnBatch:
+        """由客户下标对计算关系权重与类型（规则同 DataGenerator.generate_relations）"""
+        activity, region = customers["activity_level"], customers["region"]
+        vip = customers["type"] == self.customer_types.index("VIP")
+        base = (activity[src] + activity[dst]) / 2 + 0.1 * (region[src] == region[dst]) \
+            + 0.1 * (vip[src] | vip[dst])
+        columns = {
+            "from": customers["index"][src],
+            "to": customers["index"][dst],
+            "weight": np.minimum(np.round(base * rng.uniform(0.8, 1.2, len(src)), 2), 1.0),
+            "relation_type": rng.integers(0, len(RELATION_TYPES), len(src), dtype=np.uint8),
+        }
+        return ColumnBatch("relations", start, columns, self._RELATION_KEYS, self._render_relations)
+
+    def communities(self, customers: ColumnBatch) -> np.ndarray:
+        """客户所属社区：(地区, 客户类型) 组合，共 len(REGIONS) * len(customer_types) 个"""
+        return customers["region"].astype(np.int64) * len(self.customer_types) + customers["type"]
+
+    def relations_preferential(self, customers: ColumnBatch, edges_per_node: int = 5, p_in: float = 0.6,
+                               batch_nodes: int = 10_000) -> Iterator[ColumnBatch]:
+        """
+        偏好连接（Barabási–Albert）关系图，度分布为幂律：
+        客户按顺序加入，每人向 edges_per_node 个已加入的客户建立关系，目标按当前度数成比例抽取。
+        每条边以 p_in 的概率只在同社区（同地区、同类型）的已加入客户中按度数抽取，否则在全体中抽取。
+        新客户按批向量化生成，批大小不超过已加入人数（且不超过 batch_nodes），
+        批内新客户之间不互连；有向边 (u, v) 打包后经 PackedPairSet 去重。总边数约 n * edges_per_node。
+        """
+        rng = self._rng(5)
+        n = len(customers)
+        community = self.communities(customers)
+        order = np.argsort(community, kind="stable")
+        bounds = np.searchsorted(community[order], np.arange(community.max() + 2))
+        seen = PackedPairSet(n * edges_per_node)
+        degree = np.zeros(n, dtype=np.float64)
+        # 初始核心：前 edges_per_node + 1 个客户连成一条链
+        core = min(n, edges_per_node + 1)
+        src = np.arange(1, core, dtype=np.int64)
+        dst = src - 1
+        seen.add(src, dst)
+        np.add.at(degree, np.concatenate([src, dst]), 1)
+        start = 0
+        if len(src):
+            yield self._relation_batch(customers, src, dst, rng, start)
+            start += len(src)
+        first = core
+        while first < n:
+            last = min(n, first + min(batch_nodes, first))
+            src = np.repeat(np.arange(first, last, dtype=np.int64), edges_per_node)
+            # 全局抽样：已加入客户按度数的累积和
+            cum = np.cumsum(degree[:first])
+            glob = np.searchsorted(cum, rng.random(len(src)) * cum[-1], side="right")
+            # 社区内抽样：按社区排序后的累积度数（未加入的客户度数为 0，不会被抽中）
+            cum_sorted = np.cumsum(degree[order])
+            block = community[src]
+            low = np.where(bounds[block] > 0, cum_sorted[np.maximum(bounds[block] - 1, 0)], 0.0)
+            high = cum_sorted[np.maximum(bounds[block + 1] - 1, 0)]
+            point = low + rng.random(len(src)) * (high - low)
+            local = order[np.minimum(np.searchsorted(cum_sorted, point, side="right"), n - 1)]
+            inside = (rng.random(len(src)) < p_in) & (high > low)
+            dst = np.minimum(np.where(inside, local, glob), first - 1)
+            keep = seen.add(src, dst)
+            src, dst = src[keep], dst[keep]
+            np.add.at(degree, np.concatenate([src, dst]), 1)
+            if len(src):
+                yield self._relation_batch(customers, src, dst, rng, start)
+                start += len(src)
+            first = last
+
+    def relations_sbm(self, customers: ColumnBatch, n_edges: int, p_in: float = 0.8,
+                      exponent: float = 2.5) -> Iterator[ColumnBatch]:
+        """
+        度修正随机块模型（degree-corrected SBM）关系图：
+        - 社区为 (地区, 客户类型)，每条边以 p_in 的概率落在源客户所在社区内，否则跨社区
+        - 每个客户有一个 Pareto 分布的权重 θ（幂指数 exponent），端点按 θ 成比例抽取，
+          度分布呈幂律，少数客户是关系中心
+        全部用累积权重 + searchsorted 向量化抽样，按批产出，有向边经 PackedPairSet 去重，
+        去重与去自环后实际边数略少于 n_edges。
+        """
+        rng = self._rng(6)
+        n = len(customers)
+        community = self.communities(customers)
+        theta = rng.pareto(exponent - 1, n) + 1.0
+        cum = np.cumsum(theta)
+        # 按社区排序后的累积权重，用于社区内抽样
+        order = np.argsort(community, kind="stable")
+        cum_sorted = np.cumsum(theta[order])
+        bounds = np.searchsorted(community[order], np.arange(community.max() + 2))
+        block_low = np.where(bounds[:-1] > 0, cum_sorted[np.maximum(bounds[:-1] - 1, 0)], 0.0)
+        block_high = cum_sorted[np.maximum(bounds[1:] - 1, 0)]
+        seen = PackedPairSet(n_edges)
+        for start, size in self._batches(n_edges):
+            src = np.minimum(np.searchsorted(cum, rng.random(size) * cum[-1], side="right"), n - 1)
+            inside = rng.random(size) < p_in
+            block = community[src]
+            point = block_low[block] + rng.random(size) * (block_high[block] - block_low[block])
+            local = order[np.minimum(np.searchsorted(cum_sorted, point, side="right"), n - 1)]
+            glob = np.minimum(np.searchsorted(cum, rng.random(size) * cum[-1], side="right"), n - 1)
+            dst = np.where(inside, local, glob)
+            keep = src != dst
+            src, dst = src[keep], dst[keep]
+            keep = seen.add(src, dst)
+            yield self._relation_batch(customers, src[keep], dst[keep], rng, start)
+
+    _RELATION_KEYS = ("from_customer", "to_customer", "weight", "relation_type")
+
+    def _render_relations(self, batch: ColumnBatch):
+        for src, dst, weight, rtype in zip(batch["from"].tolist(), batch["to"].tolist(),
+                                           batch["weight"].tolist(), batch["relation_type"].tolist()):
+            yield (f"CUST{src:04d}", f"CUST{dst:04d}", weight, RELATION_TYPES[rtype])
+
+    # ---------------- 任务与依赖 ----------------
+
+    def tasks(self, n: int) -> ColumnBatch:
+        """
+        一次生成 n 个任务及依赖（依赖只指向编号更小的任务，保证无环）：
+        每个任务 80% 概率依赖 2~4 个前置任务（只有 1 个可选时依赖 1 个）。
+        依赖以 dep_from / dep_to 两列放在返回批次的 dependencies 属性中。
+        """
+        rng = self._rng(4)
+        templates = DataGenerator.task_templates()
+        n_types = len(templates)
+        ranges = np.array([DataGenerator.task_ranges(t) for t, _ in templates])  # (类型, 2, 2)
+        ttype = rng.integers(0, n_types, n, dtype=np.uint8)
+        urgency = ranges[ttype, 0, 0] + (ranges[ttype, 0, 1] - ranges[ttype, 0, 0]) * rng.random(n)
+        influence = ranges[ttype, 1, 0] + (ranges[ttype, 1, 1] - ranges[ttype, 1, 0]) * rng.random(n)
+        columns = {
+            "index": np.arange(n, dtype=np.int64),
+            "type": ttype,
+            "name": rng.integers(0, 4, n, dtype=np.uint8),
+            "urgency": np.round(urgency, 2),
+            "influence": np.round(influence, 2),
+            "priority": np.round(urgency * influence, 2),
+            "days": rng.integers(0, 31, n, dtype=np.int16),
+        }
+        batch = ColumnBatch("tasks", 0, columns, self._TASK_KEYS, self._render_tasks)
+        # 依赖：每行最多 4 个候选，按行截断到 num_deps，行内重复的候选重新抽样
+        idx = np.arange(n)
+        has_deps = (idx > 0) & (rng.random(n) < 0.8)
+        max_deps = np.minimum(4, idx)
+        num_deps = np.where(max_deps >= 2, 2 + (rng.random(n) * np.maximum(max_deps - 1, 1)).astype(np.int64), 1)
+        num_deps = np.where(has_deps, num_deps, 0)
+        cand = (rng.random((n, 4)) * np.maximum(idx, 1)[:, None]).astype(np.int64)
+        active = np.arange(4)[None, :] < num_deps[:, None]
+        while True:
+            ordered = np.sort(np.where(active, cand, -1 - np.arange(4)[None, :]), axis=1)
+            dup_rows = np.nonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))[0]
+            if len(dup_rows) == 0:
+                break
+            cand[dup_rows] = (rng.random((len(dup_rows), 4)) * idx[dup_rows][:, None]).astype(np.int64)
+        rows, slots = np.nonzero(active)
+        batch.dependencies = {"dep_from": cand[rows, slots], "dep_to": rows.astype(np.int64)}
+        return batch
+
+    _TASK_KEYS = ("id", "name", "type", "urgency", "influence", "priority", "created_date")
+
+    def _render_tasks(self, batch: ColumnBatch):
+        templates, dates = DataGenerator.task_templates(), self._dates
+        for i, ttype, name, urgency, influence, priority, days in zip(
+                batch["index"].tolist(), batch["type"].tolist(), batch["name"].tolist(),
+                batch["urgency"].tolist(), batch["influence"].tolist(), batch["priority"].tolist(),
+                batch["days"].tolist()):
+            task_type, names = templates[ttype]
+            yield (f"TASK{i:04d}", names[name], task_type, urgency, influence, priority, dates[days])
+
+    @staticmethod
+    def dependency_pairs(batch: ColumnBatch) -> List[tuple]:
+        """tasks() 返回批次中的依赖，展开为 (before_id, after_id) 列表"""
+        deps = batch.dependencies
+        return [(f"TASK{a:04d}", f"TASK{b:04d}") for a, b in zip(deps["dep_from"].tolist(), deps["dep_to"].tolist())]
+
+
+# ---------------- 流式导出 ----------------
+
+def write_ndjson(batches, path: str) -> int:
+    """逐批写入 NDJSON 文件，返回行数"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in batches:
+            f.write(batch.ndjson())
+            count += len(batch)
+    return count
+
+
+def write_sqlite(batches, path: str, table: Optional[str] = None) -> int:
+    """逐批 executemany 写入 SQLite 表（表不存在时按第一批的字段建表），返回行数"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    count = 0
+    try:
+        for batch in batches:
+            name = table or batch.kind
+            if count == 0:
+                cols = ", ".join(f'"{k}"' for k in batch.keys)
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{name}" ({cols})')
+            marks = ", ".join("?" * len(batch.keys))
+            conn.executemany(f'INSERT INTO "{name}" VALUES ({marks})', batch.rows())
+            conn.commit()
+            count += len(batch)
+    finally:
+        conn.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列式批量生成压测数据")
+    parser.add_argument("--products", type=int, default=0)
+    parser.add_argument("--customers", type=int, default=0)
+    parser.add_argument("--relations", type=int, default=0)
+    parser.add_argument("--graph", choices=["uniform", "preferential", "sbm"], default="uniform",
+                        help="客户关系图模型；preferential 时边数约为 客户数 x --edges-per-node")
+    parser.add_argument("--edges-per-node", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--format", choices=["ndjson", "sqlite", "none"], default="ndjson",
+                        help="none 只生成列数组不导出，用于测量生成本身的速度")
+    parser.add_argument("--out", default="bulk_data", help="ndjson 为输出目录，sqlite 为数据库文件")
+    args = parser.parse_args()
+
+    gen = BulkDataGenerator(args.seed, args.batch_size)
+    if args.format == "ndjson":
+        os.makedirs(args.out, exist_ok=True)
+
+    def export(kind, batches):
+        start = time.perf_counter()
+        if args.format == "ndjson":
+            rows = write_ndjson(batches, os.path.join(args.out, f"{kind}.ndjson"))
+        elif args.format == "sqlite":
+            rows = write_sqlite(batches, args.out, kind)
+        else:
+            rows = sum(len(b) for b in batches)
+        print(f"{kind:<10}{rows:>12,} 行 {time.perf_counter() - start:>8.2f}s")
+
+    if args.products:
+        export("products", gen.products(args.products))
+    if args.customers:
+        customers = concat(list(gen.customers(args.customers)))
+        export("customers", [customers])
+        if args.graph == "preferential":
+            export("relations", gen.relations_preferential(customers, args.edges_per_node))
+        elif args.graph == "sbm" and args.relations:
+            export("relations", gen.relations_sbm(customers, args.relations))
+        elif args.relations:
+            export("relations", gen.relations(customers, args.relations))
+    if args.tasks:
+        tasks = gen.tasks(args.tasks)
+        export("tasks", [tasks])
+        deps = tasks.dependencies
+        print(f"{'依赖':<10}{len(deps['dep_from']):>12,} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
+import math
 import random
 from datetime import datetime, timedelta
 import string
 
 
 class DataGenerator:
-    def __init__(self):
+    def __init__(self, seed=None):
+        # 独立的随机数生成器：传入 seed 时生成结果可复现，且不影响全局 random 状态
+        self.rng = random.Random(seed)
         # 预定义一些电商相关的数据
         self.product_categories = [
             "Electronics", "Clothing", "Home & Garden", "Sports", "Books",
@@ -30,33 +33,33 @@ class DataGenerator:
 
     def generate_product_name(self, category):
         """生成真实的商品名称"""
-        brand = random.choice(self.product_brands[category])
+        brand = self.rng.choice(self.product_brands[category])
         if category == "Electronics":
             models = ["Pro", "Max", "Lite", "Plus", "Elite"]
-            return f"{brand} {random.choice(models)} {random.randint(1000, 9999)}"
+            return f"{brand} {self.rng.choice(models)} {self.rng.randint(1000, 9999)}"
         elif category == "Clothing":
             styles = ["Classic", "Modern", "Vintage", "Casual", "Formal"]
-            return f"{brand} {random.choice(styles)} {random.choice(['Shirt', 'Dress', 'Jacket', 'Pants'])}"
+            return f"{brand} {self.rng.choice(styles)} {self.rng.choice(['Shirt', 'Dress', 'Jacket', 'Pants'])}"
         else:
-            return f"{brand} {category} Item {random.randint(1, 1000)}"
+            return f"{brand} {category} Item {self.rng.randint(1, 1000)}"
 
     def generate_products(self, n=50):
         """生成丰富的商品数据"""
         products = []
         for i in range(n):
-            category = random.choice(self.product_categories)
-            brand = random.choice(self.product_brands[category])
+            category = self.rng.choice(self.product_categories)
+            brand = self.rng.choice(self.product_brands[category])
             name = self.generate_product_name(category)
-            base_price = random.uniform(10.0, 1000.0)
+            base_price = self.rng.uniform(10.0, 1000.0)
             if "Apple" in name or "Tiffany" in name:
                 base_price *= 2
             price = round(base_price, 2)
-            popularity = int(1000 / (price + 1) * random.uniform(0.5, 2.0))
-            stock = random.randint(0, 1000)
-            status = random.choice(["在售", "下架", "预售"])
-            sales = random.randint(0, 5000)
-            rating = round(random.uniform(3.0, 5.0), 2)
-            description = f"{brand} {category}，高品质，热销推荐，{random.choice(['限时特价', '新品上市', '爆款热卖'])}。"
+            popularity = int(1000 / (price + 1) * self.rng.uniform(0.5, 2.0))
+            stock = self.rng.randint(0, 1000)
+            status = self.rng.choice(["在售", "下架", "预售"])
+            sales = self.rng.randint(0, 5000)
+            rating = round(self.rng.uniform(3.0, 5.0), 2)
+            description = f"{brand} {category}，高品质，热销推荐，{self.rng.choice(['限时特价', '新品上市', '爆款热卖'])}。"
             image_url = f"https://dummyimage.com/200x200/cccccc/000000&text={brand}"
             products.append({
                 "id": f"PROD{i:05d}",
@@ -71,7 +74,7 @@ class DataGenerator:
                 "rating": rating,
                 "description": description,
                 "image_url": image_url,
-                "created_date": (datetime.now() - timedelta(days=random.randint(0, 365))).strftime("%Y-%m-%d")
+                "created_date": (datetime.now() - timedelta(days=self.rng.randint(0, 365))).strftime("%Y-%m-%d")
             })
         return products
     
@@ -82,13 +85,13 @@ class DataGenerator:
             products.append({
                 "paged_id": f"PROD{i:05d}",
                 "paged_name": f"Product {i}",
-                "paged_category": random.choice(["Electronics", "Clothing", "Books", "Toys"]),
-                "paged_price": round(random.uniform(10, 1000), 2),
-                "paged_popularity": random.randint(1, 1000),
-                "paged_stock": random.randint(0, 1000),
-                "paged_status": random.choice(["在售", "下架"]),
-                "paged_sales": random.randint(0, 5000),
-                "paged_rating": round(random.uniform(3.0, 5.0), 2),
+                "paged_category": self.rng.choice(["Electronics", "Clothing", "Books", "Toys"]),
+                "paged_price": round(self.rng.uniform(10, 1000), 2),
+                "paged_popularity": self.rng.randint(1, 1000),
+                "paged_stock": self.rng.randint(0, 1000),
+                "paged_status": self.rng.choice(["在售", "下架"]),
+                "paged_sales": self.rng.randint(0, 5000),
+                "paged_rating": round(self.rng.uniform(3.0, 5.0), 2),
                 "paged_description": f"Description for product {i}",
                 "paged_image_url": ""
             })
@@ -97,40 +100,40 @@ class DataGenerator:
     def random_name(self):
         first_names = ['张', '李', '王', '赵', '刘', '陈', '杨', '黄', '周', '吴']
         last_names = ['伟', '芳', '娜', '敏', '静', '丽', '强', '磊', '军', '洋']
-        return random.choice(first_names) + random.choice(last_names)
+        return self.rng.choice(first_names) + self.rng.choice(last_names)
 
     def random_phone(self):
-        return "1" + "".join([str(random.randint(0, 9)) for _ in range(10)])
+        return "1" + "".join([str(self.rng.randint(0, 9)) for _ in range(10)])
 
     def random_email(self,name):
         domains = ['@qq.com', '@163.com', '@gmail.com', '@outlook.com']
-        return f"{name.lower()}{random.randint(100,999)}{random.choice(domains)}"
+        return f"{name.lower()}{self.rng.randint(100,999)}{self.rng.choice(domains)}"
 
     def random_region(self):
         regions = ['北京', '上海', '广州', '深圳', '杭州', '成都', '重庆', '南京', '苏州', '武汉']
-        return random.choice(regions)
+        return self.rng.choice(regions)
 
     def generate_customers(self, n=30):
         """生成更真实的客户数据"""
         customers = []
         for i in range(n):
-            customer_type = random.choice(self.customer_types)
-            gender = random.choice(['男', '女'])
-            age = random.randint(18, 60)
+            customer_type = self.rng.choice(self.customer_types)
+            gender = self.rng.choice(['男', '女'])
+            age = self.rng.randint(18, 60)
             name = self.random_name()
             phone = self.random_phone()
             email = self.random_email(name)
             region = self.random_region()
             # 影响力相关属性
             if customer_type == "VIP":
-                purchase_power = random.uniform(0.8, 1.0)
-                activity_level = random.uniform(0.7, 1.0)
+                purchase_power = self.rng.uniform(0.8, 1.0)
+                activity_level = self.rng.uniform(0.7, 1.0)
             elif customer_type == "Premium":
-                purchase_power = random.uniform(0.6, 0.9)
-                activity_level = random.uniform(0.5, 0.8)
+                purchase_power = self.rng.uniform(0.6, 0.9)
+                activity_level = self.rng.uniform(0.5, 0.8)
             else:
-                purchase_power = random.uniform(0.3, 0.7)
-                activity_level = random.uniform(0.2, 0.6)
+                purchase_power = self.rng.uniform(0.3, 0.7)
+                activity_level = self.rng.uniform(0.2, 0.6)
             customers.append({
                 "id": f"CUST{i:04d}",
                 "name": name,
@@ -142,7 +145,7 @@ class DataGenerator:
                 "type": customer_type,
                 "purchase_power": round(purchase_power, 2),
                 "activity_level": round(activity_level, 2),
-                "join_date": (datetime.now() - timedelta(days=random.randint(0, 1000))).strftime("%Y-%m-%d")
+                "join_date": (datetime.now() - timedelta(days=self.rng.randint(0, 1000))).strftime("%Y-%m-%d")
             })
         return customers
 
@@ -151,8 +154,8 @@ class DataGenerator:
         relations = []
         relation_types = ["推荐", "合作", "共同购买", "评价互动", "好友", "同地区"]
         for _ in range(n_relations):
-            from_cust = random.choice(customers)
-            to_cust = random.choice(customers)
+            from_cust = self.rng.choice(customers)
+            to_cust = self.rng.choice(customers)
             if from_cust != to_cust:
                 # 影响力权重可结合购买力、活跃度、客户类型等
                 base_weight = (from_cust["activity_level"] + to_cust["activity_level"]) / 2
@@ -160,18 +163,19 @@ class DataGenerator:
                     base_weight += 0.1  # 同地区关系更强
                 if from_cust["type"] == "VIP" or to_cust["type"] == "VIP":
                     base_weight += 0.1
-                weight = min(round(base_weight * random.uniform(0.8, 1.2), 2), 1.0)
+                weight = min(round(base_weight * self.rng.uniform(0.8, 1.2), 2), 1.0)
                 relations.append({
                     "from_customer": from_cust["id"],
                     "to_customer": to_cust["id"],
                     "weight": weight,
-                    "relation_type": random.choice(relation_types)
+                    "relation_type": self.rng.choice(relation_types)
                 })
         return relations
 
-    def generate_tasks_with_dependencies(self,n=20):
-        """生成带有依赖关系的电商营销任务数据"""
-        task_templates = [
+    @staticmethod
+    def task_templates():
+        """任务类型及各类型下的任务名称"""
+        return [
             ("大促活动", [
                 "618大促首页Banner投放",
                 "双11预热邮件营销",
@@ -216,27 +220,33 @@ class DataGenerator:
             ])
         ]
 
+    @staticmethod
+    def task_ranges(task_type):
+        """任务类型 -> (紧急度区间, 影响力区间)"""
+        if task_type in ["大促活动", "新用户拉新"]:
+            return (0.8, 1.0), (0.7, 1.0)
+        elif task_type in ["库存补货", "价格调整"]:
+            return (0.6, 0.9), (0.5, 0.8)
+        elif task_type == "客户关怀":
+            return (0.5, 0.8), (0.4, 0.7)
+        elif task_type == "商品上新":
+            return (0.5, 0.8), (0.5, 0.8)
+        else:  # 售后服务
+            return (0.6, 0.9), (0.4, 0.7)
+
+    def generate_tasks_with_dependencies(self,n=20):
+        """生成带有依赖关系的电商营销任务数据"""
+        task_templates = self.task_templates()
+
         tasks = []
         dependencies = []  # (before_id, after_id) 依赖对
 
         for i in range(n):
-            task_type, name_list = random.choice(task_templates)
-            name = random.choice(name_list)
-            if task_type in ["大促活动", "新用户拉新"]:
-                base_urgency = random.uniform(0.8, 1.0)
-                base_influence = random.uniform(0.7, 1.0)
-            elif task_type in ["库存补货", "价格调整"]:
-                base_urgency = random.uniform(0.6, 0.9)
-                base_influence = random.uniform(0.5, 0.8)
-            elif task_type == "客户关怀":
-                base_urgency = random.uniform(0.5, 0.8)
-                base_influence = random.uniform(0.4, 0.7)
-            elif task_type == "商品上新":
-                base_urgency = random.uniform(0.5, 0.8)
-                base_influence = random.uniform(0.5, 0.8)
-            else:  # 售后服务
-                base_urgency = random.uniform(0.6, 0.9)
-                base_influence = random.uniform(0.4, 0.7)
+            task_type, name_list = self.rng.choice(task_templates)
+            name = self.rng.choice(name_list)
+            urgency_range, influence_range = self.task_ranges(task_type)
+            base_urgency = self.rng.uniform(*urgency_range)
+            base_influence = self.rng.uniform(*influence_range)
 
             task_id = f"TASK{i:04d}"
             tasks.append({
@@ -246,21 +256,21 @@ class DataGenerator:
                 "urgency": round(base_urgency, 2),
                 "influence": round(base_influence, 2),
                 "priority": round(base_urgency * base_influence, 2),
-                "created_date": (datetime.now() - timedelta(days=random.randint(0, 30))).strftime("%Y-%m-%d")
+                "created_date": (datetime.now() - timedelta(days=self.rng.randint(0, 30))).strftime("%Y-%m-%d")
             })
 
             # 依赖生成逻辑：每个任务有80%概率依赖2~4个前面的任务
-            if i > 0 and random.random() < 0.8:
+            if i > 0 and self.rng.random() < 0.8:
                 max_deps = min(4, i)
                 if max_deps >= 2:
-                    num_deps = random.randint(2, max_deps)
-                    dep_indices = random.sample(range(i), num_deps)
+                    num_deps = self.rng.randint(2, max_deps)
+                    dep_indices = self.rng.sample(range(i), num_deps)
                     for dep_idx in dep_indices:
                         before_id = f"TASK{dep_idx:04d}"
                         dependencies.append((before_id, task_id))
                 else:
                     # 只有1个可选前置任务时，最多依赖1个
-                    dep_indices = random.sample(range(i), 1)
+                    dep_indices = self.rng.sample(range(i), 1)
                     for dep_idx in dep_indices:
                         before_id = f"TASK{dep_idx:04d}"
                         dependencies.append((before_id, task_id))
@@ -282,33 +292,67 @@ class DataGenerator:
             "dependencies": dependencies
         }
 
-    def generate_product_edges_and_mst(self, n=20, mode='min', k=None, max_edges_per_node=3):
+    @staticmethod
+    def product_distance(p1, p2):
+        """商品间的差异度（实数边权，越小越相似）：价格取对数比较，再叠加类别、品牌、评分、热度的差异"""
+        price_gap = abs(math.log1p(p1['price']) - math.log1p(p2['price'])) / math.log1p(2000)
+        category_gap = 0.0 if p1['category'] == p2['category'] else 1.0
+        brand_gap = 0.0 if p1['brand'] == p2['brand'] else 0.5
+        rating_gap = abs(p1['rating'] - p2['rating']) / 2.0
+        popularity_gap = abs(math.log1p(p1['popularity']) - math.log1p(p2['popularity'])) / 10.0
+        return round(price_gap + category_gap + brand_gap + rating_gap + popularity_gap, 6)
+
+    @staticmethod
+    def tree_node(i, product):
+        """生成树节点的前端格式"""
+        return {
+            "id": i,
+            "label": product['name'],
+            "category": product['category'],
+            "image": product['image_url'],
+            "title": f"{product['name']}<br>价格: {product['price']}<br>品牌: {product['brand']}"
+        }
+
+    @staticmethod
+    def tree_edges(tree):
+        """生成树边 (u, v, color) 的前端格式"""
+        return [
+            {
+                "from": u,
+                "to": v,
+                "color": "red" if color == "red" else "blue",
+                "width": 2 if color == "red" else 1
+            }
+            for (u, v, color) in tree
+        ]
+
+    def build_product_graph(self, n=20, max_edges_per_node=3, similarity=False):
         """
-        生成商品数据、商品关系边，并融合生成树算法，返回前端可用的节点和边
-        mode: 'min'（相关性优先）、'max'（多样性优先）、'exact'（恰好k条蓝色边）
+        生成 n 个商品及其关系边（向量化构建，见 modules.product_graph）
+        similarity: 为 True 时改用近似 k 近邻相似图（k = max_edges_per_node），边权为特征距离
         """
+        from modules.product_graph import ProductGraph, build_product_edges, build_similarity_edges
         products = self.generate_products(n)
-        edges = []
-        for i in range(n):
-            count = 0
-            for j in range(n):
-                if i == j:
-                    continue
-                p1, p2 = products[i], products[j]
-                # 强相关：同类别
-                if p1['category'] == p2['category']:
-                    color = 'red'
-                else:
-                    color = 'blue'
-                # 控制每个商品的边数，避免全连接
-                if color == 'red' and random.random() < 0.5:
-                    edges.append((i, j, color))
-                    count += 1
-                elif color == 'blue' and random.random() < 0.1:
-                    edges.append((i, j, color))
-                    count += 1
-                if count >= max_edges_per_node:
-                    break
+        if similarity:
+            edges, distances = build_similarity_edges(products, max_edges_per_node, seed=self.rng.getrandbits(32))
+            return ProductGraph(products, edges, distances)
+        category_codes = [self.product_categories.index(p['category']) for p in products]
+        edges = build_product_edges(category_codes, max_edges_per_node, seed=self.rng.getrandbits(32))
+        return ProductGraph(products, edges)
+
+    def generate_product_edges_and_mst(self, n=20, mode='min', k=None, max_edges_per_node=3, ks=None, graph=None):
+        """
+        生成商品数据、商品关系边，并融合生成树算法，返回前端可用的节点和边
+        mode: 'min'（相关性优先）、'max'（多样性优先）、'exact'（恰好k条蓝色边）、
+              'weighted'（按商品相似度加权的最小生成树，边权越小越相似）、
+              'similarity'（在近似 k 近邻相似图上求加权最小生成树，需传入 similarity 图，否则自动构建）
+        ks: 仅 exact 模式，额外求解的蓝边数列表；'all' 表示可行区间内的全部 k，
+            结果放在 trees 中，前端切换 k 时无需重新请求
+        graph: 已生成的 ProductGraph（如来自 ProductGraphStore 缓存），传入时只运行生成树阶段
+        """
+        if graph is None:
+            graph = self.build_product_graph(n, max_edges_per_node, similarity=(mode == 'similarity'))
+        products, edges, n = graph.products, graph.edges, graph.n
         # 选择生成树算法
         if mode == 'min':
             from spanning_tree_algorithms import kruskal_min_blue_edges
@@ -317,37 +361,34 @@ class DataGenerator:
             from spanning_tree_algorithms import kruskal_max_blue_edges
             mst, blue_count = kruskal_max_blue_edges(n, edges)
         elif mode == 'exact':
-            from spanning_tree_algorithms import kruskal_two_stage
-            mst = kruskal_two_stage(n, edges, k)
+            from spanning_tree_algorithms import ExactBlueSpanningTree
+            engine = ExactBlueSpanningTree(n, edges)
+            wanted = None if ks == 'all' else list(ks or [])
+            trees = engine.solve_many(wanted)
+            mst = engine.solve(k) or []
             blue_count = k if mst else 0
+        elif mode in ('weighted', 'similarity'):
+            from spanning_tree_algorithms import kruskal_weighted
+            weighted_mst, total_weight = kruskal_weighted(n, edges, graph.edge_distances())
+            mst = [(u, v, color) for u, v, color, _ in weighted_mst]
+            blue_count = sum(1 for _, _, color in mst if color == 'blue')
         else:
             raise ValueError('Invalid mode')
-        # 节点
-        nodes = [
-            {
-                "id": i,
-                "label": products[i]['name'],
-                "category": products[i]['category'],
-                "image": products[i]['image_url'],
-                "title": f"{products[i]['name']}<br>价格: {products[i]['price']}<br>品牌: {products[i]['brand']}"
-            }
-            for i in range(n)
-        ]
-        # 边（只用生成树中的边）
-        edges_for_frontend = [
-            {
-                "from": u,
-                "to": v,
-                "color": "red" if color == "red" else "blue",
-                "width": 2 if color == "red" else 1
-            }
-            for (u, v, color) in mst
-        ]
-        return {
+        # 节点；边只用生成树中的边
+        nodes = [self.tree_node(i, products[i]) for i in range(n)]
+        result = {
             "nodes": nodes,
-            "edges": edges_for_frontend,
+            "edges": self.tree_edges(mst),
             "blue_count": blue_count
         }
+        if mode in ('weighted', 'similarity'):
+            result["total_weight"] = round(total_weight, 4)
+        if mode == 'exact':
+            feasible = engine.feasible_range()
+            result["min_blue"], result["max_blue"] = feasible if feasible else (None, None)
+            result["message"] = engine.diagnose(k)
+            result["trees"] = {str(kk): self.tree_edges(tree) for kk, tree in trees.items()}
+        return result
 
 # 测试代码
 if __name__ == "__main__":
@@ -76,6 +76,25 @@ class Customer:
         self.region = region
         self.score = score
 
+# Product 的 __slots__ 版本：字段相同，但没有逐实例的 __dict__，大批量常驻内存时使用
+@dataclass(slots=True)
+class SlottedProduct:
+    id: str
+    name: str
+    brand: str
+    category: str
+    price: float
+    popularity: int
+    stock: int
+    status: str
+    sales: int
+    rating: float
+    description: str
+    image_url: str
+    created_date: str
+
+    __repr__ = Product.__repr__
+
 @dataclass
 class CustomerRelation:
     from_customer: str
@@ -0,0 +1,286 @@
+import heapq
+import math
+from typing import Collection, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+def _field(item, name):
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def product_vocabulary(products: Sequence) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """类别、品牌到 one-hot 列号的编码表（按名称排序编号）"""
+    categories = sorted({_field(p, 'category') for p in products})
+    brands = sorted({_field(p, 'brand') for p in products})
+    return {c: i for i, c in enumerate(categories)}, {b: i for i, b in enumerate(brands)}
+
+
+def product_feature_matrix(products: Sequence,
+                           vocabulary: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None) -> np.ndarray:
+    """
+    商品特征向量（float32，每行一个商品），欧氏距离越小越相似：
+    对数价格、评分、对数热度三个数值特征，加上类别 one-hot 与品牌 one-hot（品牌权重减半）。
+    products 可以是 dict 或 Product 对象。
+    vocabulary: product_vocabulary 的结果，给定时按它编码（类别或品牌不在表中抛出 KeyError），
+    用于给已建好的索引计算单个商品的特征
+    """
+    categories, brands = vocabulary or product_vocabulary(products)
+    price = np.array([_field(p, 'price') for p in products], dtype=np.float64)
+    rating = np.array([_field(p, 'rating') for p in products], dtype=np.float64)
+    popularity = np.array([_field(p, 'popularity') for p in products], dtype=np.float64)
+    category = np.array([categories[_field(p, 'category')] for p in products], dtype=np.int64)
+    brand = np.array([brands[_field(p, 'brand')] for p in products], dtype=np.int64)
+    n, n_cat, n_brand = len(products), len(categories), len(brands)
+    features = np.zeros((n, 3 + n_cat + n_brand), dtype=np.float32)
+    features[:, 0] = np.log1p(price) / math.log1p(2000)
+    features[:, 1] = rating / 5.0
+    features[:, 2] = np.log1p(popularity) / 10.0
+    rows = np.arange(n)
+    features[rows, 3 + category] = 1.0
+    features[rows, 3 + n_cat + brand] = 0.5
+    return features
+
+
+class RandomProjectionForest:
+    """
+    随机投影树森林（Annoy 风格）近似最近邻索引，纯 NumPy 实现：
+    - 每棵树在每个节点随机取两个点，用它们的中垂面把点集一分为二，直到叶子不超过 leaf_size
+    - 查询时在所有树上按到分割面的间隔做优先级搜索，收集 search_k 个候选后精确重排
+    - knn_graph 直接在叶子内批量求两两距离，多棵树的结果合并去重，得到全体 k 近邻图
+    """
+
+    def __init__(self, n_trees: int = 8, leaf_size: int = 32, seed: Optional[int] = None):
+        self.n_trees = n_trees
+        self.leaf_size = leaf_size
+        self.rng = np.random.default_rng(seed)
+        self.data: Optional[np.ndarray] = None
+        self.trees: List[dict] = []
+
+    def __len__(self):
+        return 0 if self.data is None else len(self.data)
+
+    def fit(self, data: np.ndarray) -> "RandomProjectionForest":
+        self.data = np.ascontiguousarray(data, dtype=np.float32)
+        self.trees = [self._build_tree() for _ in range(self.n_trees)]
+        return self
+
+    def _build_tree(self) -> dict:
+        data, rng, leaf_size = self.data, self.rng, self.leaf_size
+        normals, offsets, children = [], [], []  # 内部节点
+        leaves: List[np.ndarray] = []
+        # 子节点编码：>= 0 为内部节点编号，< 0 为 ~叶子编号
+        root_slot = [None]
+        stack = [(np.arange(len(data)), None, 0)]  # (点下标, 父节点, 左/右)
+        while stack:
+            idx, parent, side = stack.pop()
+            node = None
+            if len(idx) > leaf_size:
+                a, b = data[rng.choice(idx, 2, replace=False)]
+                normal = a - b
+                offset = float(normal @ (a + b)) / 2.0
+                side_mask = data[idx] @ normal > offset
+                left, right = idx[~side_mask], idx[side_mask]
+                if len(left) == 0 or len(right) == 0:
+                    # 两点重合等退化情况：随机对半切
+                    perm = rng.permutation(idx)
+                    left, right = perm[:len(idx) // 2], perm[len(idx) // 2:]
+                    normal = np.zeros_like(normal)
+                    offset = 0.0
+                node = len(normals)
+                normals.append(normal)
+                offsets.append(offset)
+                children.append([0, 0])
+                stack.append((left, node, 0))
+                stack.append((right, node, 1))
+            else:
+                node = ~len(leaves)
+                leaves.append(idx)
+            if parent is None:
+                root_slot[0] = node
+            else:
+                children[parent][side] = node
+        return {
+            "root": root_slot[0],
+            "normals": np.array(normals, dtype=np.float32).reshape(-1, data.shape[1]),
+            "offsets": np.array(offsets, dtype=np.float32),
+            "children": np.array(children, dtype=np.int64).reshape(-1, 2),
+            "leaves": leaves,
+        }
+
+    def query(self, vector: np.ndarray, k: int = 10, search_k: Optional[int] = None,
+              exclude: Union[int, Collection[int], None] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (下标数组, 距离数组)，按距离升序；exclude 为要排除的下标（查询点自身、已删除的点）"""
+        vector = np.asarray(vector, dtype=np.float32)
+        search_k = search_k or k * self.n_trees * 4
+        heap = [(-math.inf, t, tree["root"]) for t, tree in enumerate(self.trees)]
+        candidates = []
+        seen = 0
+        while heap and seen < search_k:
+            priority, t, node = heapq.heappop(heap)
+            tree = self.trees[t]
+            while node >= 0:
+                margin = float(tree["normals"][node] @ vector) - float(tree["offsets"][node])
+                left, right = tree["children"][node]
+                # 另一侧按间隔入队，间隔越小越可能还有近邻
+                near, far = (right, left) if margin > 0 else (left, right)
+                heapq.heappush(heap, (max(priority, abs(margin)), t, int(far)))
+                node = int(near)
+            leaf = tree["leaves"][~node]
+            candidates.append(leaf)
+            seen += len(leaf)
+        ids = np.unique(np.concatenate(candidates)) if candidates else np.empty(0, dtype=np.int64)
+        if isinstance(exclude, (int, np.integer)):
+            ids = ids[ids != exclude]
+        elif exclude is not None and len(exclude):
+            ids = ids[~np.isin(ids, exclude)]
+        dist = np.sqrt(((self.data[ids] - vector) ** 2).sum(axis=1))
+        top = np.argsort(dist)[:k]
+        return ids[top], dist[top]
+
+    def knn_graph(self, k: int = 10, refine: int = 1, chunk: int = 2048) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        全体点的近似 k 近邻，返回 (neighbors, distances)，形状均为 (n, k)，不足 k 个时以 -1 / inf 填充。
+        refine: 在森林结果上再做几轮“邻居的邻居”修正，提高召回
+        """
+        n = len(self.data)
+        best_ids = np.full((n, k), -1, dtype=np.int64)
+        best_dist = np.full((n, k), np.inf, dtype=np.float32)
+        for tree in self.trees:
+            leaves = tree["leaves"]
+            for start in range(0, len(leaves), chunk):
+                group = leaves[start:start + chunk]
+                width = max(len(leaf) for leaf in group)
+                idx = np.full((len(group), width), -1, dtype=np.int64)
+                for row, leaf in enumerate(group):
+                    idx[row, :len(leaf)] = leaf
+                valid = idx >= 0
+                pts = self.data[np.where(valid, idx, 0)]  # (叶子数, width, d)
+                sq = (pts ** 2).sum(axis=2)
+                dist = sq[:, :, None] + sq[:, None, :] - 2 * np.einsum('lid,ljd->lij', pts, pts)
+                np.maximum(dist, 0, out=dist)
+                dist[~valid[:, None, :].repeat(width, axis=1)] = np.inf
+                dist[:, np.arange(width), np.arange(width)] = np.inf  # 排除自身
+                kk = min(k, width)
+                part = np.argpartition(dist, kk - 1, axis=2)[:, :, :kk] if width > kk else \
+                    np.broadcast_to(np.arange(width), dist.shape).copy()
+                cand_dist = np.take_along_axis(dist, part, axis=2)
+                cand_ids = np.take_along_axis(idx[:, None, :].repeat(width, axis=1), part, axis=2)
+                cand_ids[~np.isfinite(cand_dist)] = -1
+                points = idx[valid]
+                cand_ids, cand_dist = cand_ids[valid], np.sqrt(cand_dist[valid])
+                self._merge(best_ids, best_dist, points, cand_ids, cand_dist, k)
+        for _ in range(refine):
+            self._refine(best_ids, best_dist, k, chunk)
+        return best_ids, best_dist
+
+    def _refine(self, best_ids, best_dist, k, chunk):
+        """一轮 NN-descent：邻居的邻居作为新候选（近邻的近邻大概率也是近邻）"""
+        n = len(best_ids)
+        sq = (self.data ** 2).sum(axis=1)
+        for start in range(0, n, chunk):
+            points = np.arange(start, min(start + chunk, n))
+            hop = best_ids[points]
+            cand_ids = np.where(hop[:, :, None] >= 0, best_ids[np.maximum(hop, 0)], -1).reshape(len(points), -1)
+            valid = (cand_ids >= 0) & (cand_ids != points[:, None])
+            safe = np.maximum(cand_ids, 0)
+            dot = np.einsum('pcd,pd->pc', self.data[safe], self.data[points])
+            dist = np.sqrt(np.maximum(sq[safe] + sq[points][:, None] - 2 * dot, 0))
+            cand_dist = np.where(valid, dist, np.inf)
+            cand_ids = np.where(valid, cand_ids, -1)
+            self._merge(best_ids, best_dist, points, cand_ids, cand_dist, k)
+
+    @staticmethod
+    def _merge(best_ids, best_dist, points, cand_ids, cand_dist, k):
+        """把新候选并入各点当前的 k 近邻，按 id 去重后保留最近的 k 个"""
+        ids = np.concatenate([best_ids[points], cand_ids], axis=1)
+        dist = np.concatenate([best_dist[points], cand_dist.astype(np.float32)], axis=1)
+        order = np.argsort(ids, axis=1, kind='stable')
+        ids = np.take_along_axis(ids, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+        dup = np.zeros_like(ids, dtype=bool)
+        dup[:, 1:] = ids[:, 1:] == ids[:, :-1]
+        dist[dup | (ids < 0)] = np.inf
+        top = np.argsort(dist, axis=1, kind='stable')[:, :k]
+        new_dist = np.take_along_axis(dist, top, axis=1)
+        new_ids = np.take_along_axis(ids, top, axis=1)
+        new_ids[~np.isfinite(new_dist)] = -1
+        best_ids[points] = new_ids
+        best_dist[points] = new_dist
+
+
+class SimilarProductIndex:
+    """
+    商品相似检索：在商品特征向量上建随机投影森林，按商品ID查询最相似的商品。
+    建好后可以增量维护，不必每次商品变动都重建：
+    - 已有商品改了价格、热度等，直接覆盖它的特征行，树结构不变（点仍在原叶子里，查询时按新向量精确重排）
+    - 删除的商品只做标记，查询时排除
+    - 新商品放在森林之外的小表里，查询时与森林结果一起暴力比较
+    改动累计超过 REBUILD_FRACTION（或遇到编码表中没有的类别、品牌）时 stale 为真，由调用方丢弃重建。
+    """
+
+    REBUILD_FRACTION = 0.1
+    REBUILD_MIN = 256
+
+    def __init__(self, products: Sequence, n_trees: int = 8, leaf_size: int = 32, seed: Optional[int] = 0):
+        self.ids = [_field(p, 'id') for p in products]
+        self.positions = {pid: i for i, pid in enumerate(self.ids)}
+        self.vocabulary = product_vocabulary(products)
+        self.forest = RandomProjectionForest(n_trees, leaf_size, seed).fit(
+            product_feature_matrix(products, self.vocabulary))
+        self.removed: set = set()  # 已删除商品在森林中的下标
+        self.extra: Dict[str, np.ndarray] = {}  # 建好之后新增的商品 -> 特征向量
+        self.changes = 0
+        self._excluded: Optional[np.ndarray] = None
+
+    @property
+    def stale(self) -> bool:
+        return self.changes > max(self.REBUILD_MIN, len(self.ids) * self.REBUILD_FRACTION)
+
+    def upsert(self, product) -> bool:
+        """新增或修改一个商品的特征；类别或品牌不在编码表中时返回 False，此时索引需要重建"""
+        try:
+            row = product_feature_matrix([product], self.vocabulary)[0]
+        except KeyError:
+            return False
+        product_id = _field(product, 'id')
+        pos = self.positions.get(product_id)
+        if pos is None:
+            self.extra[product_id] = row
+        else:
+            self.forest.data[pos] = row
+            if pos in self.removed:
+                self.removed.discard(pos)
+                self._excluded = None
+        self.changes += 1
+        return True
+
+    def remove(self, product_id: str):
+        if self.extra.pop(product_id, None) is None:
+            pos = self.positions.get(product_id)
+            if pos is not None:
+                self.removed.add(pos)
+                self._excluded = None
+        self.changes += 1
+
+    def similar(self, product_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """返回 [(商品ID, 距离)]，不包括商品自身；商品不存在返回空列表"""
+        pos = self.positions.get(product_id)
+        vector = self.extra.get(product_id)
+        if vector is None:
+            if pos is None or pos in self.removed:
+                return []
+            vector = self.forest.data[pos]
+        if self._excluded is None:
+            self._excluded = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+        exclude = self._excluded if pos is None else np.append(self._excluded, pos)
+        ids, dist = self.forest.query(vector, k, exclude=exclude)
+        result = [(self.ids[i], float(d)) for i, d in zip(ids, dist)]
+        if self.extra:
+            extra_ids = [pid for pid in self.extra if pid != product_id]
+            if extra_ids:
+                rows = np.stack([self.extra[pid] for pid in extra_ids])
+                extra_dist = np.sqrt(((rows - vector) ** 2).sum(axis=1))
+                result += [(pid, float(d)) for pid, d in zip(extra_ids, extra_dist)]
+                result = heapq.nsmallest(k, result, key=lambda item: item[1])
+        return result
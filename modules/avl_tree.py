@@ -1,43 +1,116 @@
 class AVLNode:
+    __slots__ = ("key", "value", "left", "right", "height", "size")
+
     def __init__(self, key, value):
         self.key = key
         self.value = value
         self.left = None
         self.right = None
         self.height = 1
+        self.size = 1  # 子树节点数，用于 rank/select 顺序统计
 
 class AVLTree:
     def __init__(self):
         self.root = None
 
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    @classmethod
+    def from_sorted(cls, items):
+        """
+        由按键严格升序的 (key, value) 序列直接构建完全平衡的树，O(n)，
+        取中点作根递归建左右子树，高度与大小自底向上一次算好，不做任何旋转
+        """
+        items = items if isinstance(items, list) else list(items)
+        tree = cls()
+
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = AVLNode(*items[mid])
+            node.left = build(lo, mid)
+            node.right = build(mid + 1, hi)
+            left_h = node.left.height if node.left else 0
+            right_h = node.right.height if node.right else 0
+            node.height = 1 + (left_h if left_h > right_h else right_h)
+            node.size = hi - lo
+            return node
+
+        tree.root = build(0, len(items))
+        return tree
+
     def insert(self, key, value):
-        self.root = self._insert(self.root, key, value)
+        # 迭代下行并记录路径 (节点, 是否走左子树)，插入后自底向上回溯平衡
+        path = []
+        node = self.root
+        while node:
+            if key < node.key:
+                path.append((node, True))
+                node = node.left
+            elif key > node.key:
+                path.append((node, False))
+                node = node.right
+            else:
+                node.value = value
+                return
+        self._rebalance_path(path, AVLNode(key, value))
 
-    def _insert(self, node, key, value):
+    def delete(self, key):
+        """删除 key，返回是否删除成功"""
+        path = []
+        node = self.root
+        while node and node.key != key:
+            if key < node.key:
+                path.append((node, True))
+                node = node.left
+            else:
+                path.append((node, False))
+                node = node.right
         if not node:
-            return AVLNode(key, value)
-        if key < node.key:
-            node.left = self._insert(node.left, key, value)
-        elif key > node.key:
-            node.right = self._insert(node.right, key, value)
+            return False
+        if node.left and node.right:
+            # 双子节点：用右子树最小节点（后继）替换，再删除后继
+            path.append((node, False))
+            succ = node.right
+            while succ.left:
+                path.append((succ, True))
+                succ = succ.left
+            node.key, node.value = succ.key, succ.value
+            replacement = succ.right
         else:
-            node.value = value
-            return node
-        node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
-        balance = self._get_balance(node)
-        # 左左
-        if balance > 1 and key < node.left.key:
-            return self._right_rotate(node)
-        # 右右
-        if balance < -1 and key > node.right.key:
-            return self._left_rotate(node)
-        # 左右
-        if balance > 1 and key > node.left.key:
-            node.left = self._left_rotate(node.left)
+            replacement = node.left or node.right
+        self._rebalance_path(path, replacement)
+        return True
+
+    def _rebalance_path(self, path, child):
+        """把 child 挂回路径末端，并沿路径向上更新高度/大小、旋转失衡节点"""
+        for parent, is_left in reversed(path):
+            if is_left:
+                parent.left = child
+            else:
+                parent.right = child
+            child = self._rebalance(parent)
+        self.root = child
+
+    def _rebalance(self, node):
+        # 热路径：就地计算高度与大小，避免多次方法调用
+        left, right = node.left, node.right
+        lh = left.height if left else 0
+        rh = right.height if right else 0
+        node.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+        node.height = 1 + (lh if lh > rh else rh)
+        balance = lh - rh
+        if balance > 1:
+            # 左右：先把左子树左旋成左左
+            if self._get_balance(node.left) < 0:
+                node.left = self._left_rotate(node.left)
             return self._right_rotate(node)
-        # 右左
-        if balance < -1 and key < node.right.key:
-            node.right = self._right_rotate(node.right)
+        if balance < -1:
+            # 右左：先把右子树右旋成右右
+            if self._get_balance(node.right) > 0:
+                node.right = self._right_rotate(node.right)
             return self._left_rotate(node)
         return node
 
@@ -53,37 +126,86 @@ class AVLTree:
         return None
 
     def range_query(self, low, high):
-        result = []
-        self._range_query(self.root, low, high, result)
-        return result
+        return [value for _, value in self.iter_range(low, high)]
 
-    def _range_query(self, node, low, high, result):
-        if not node:
-            return
-        if low < node.key:
-            self._range_query(node.left, low, high, result)
-        if low <= node.key <= high:
-            result.append(node.value)
-        if node.key < high:
-            self._range_query(node.right, low, high, result)
+    def iter_range(self, low=None, high=None):
+        """按键升序惰性产出 [low, high] 内的 (key, value)，None 表示不设界"""
+        stack = []
+        node = self.root
+        while node:
+            if low is not None and node.key < low:
+                node = node.right
+            else:
+                stack.append(node)
+                node = node.left
+        while stack:
+            node = stack.pop()
+            if high is not None and node.key > high:
+                return
+            yield node.key, node.value
+            node = node.right
+            while node:
+                stack.append(node)
+                node = node.left
 
-    def delete(self, key):
-        # 可选：实现删除
-        pass
+    def items(self):
+        return self.iter_range()
+
+    def rank(self, key):
+        """小于 key 的键个数（即 key 的 0 基排名）"""
+        rank = 0
+        node = self.root
+        while node:
+            if key <= node.key:
+                node = node.left
+            else:
+                rank += self._get_size(node.left) + 1
+                node = node.right
+        return rank
+
+    def select(self, index):
+        """第 index 小（0 基）的 (key, value)，越界返回 None"""
+        if index < 0 or index >= len(self):
+            return None
+        node = self.root
+        while node:
+            left_size = self._get_size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key, node.value
+            else:
+                index -= left_size + 1
+                node = node.right
+        return None
+
+    def iter_from_rank(self, index):
+        """从第 index 小的键开始按升序惰性遍历"""
+        item = self.select(index)
+        if item is None:
+            return iter(())
+        return self.iter_range(item[0])
 
     def _get_height(self, node):
         return node.height if node else 0
 
+    def _get_size(self, node):
+        return node.size if node else 0
+
     def _get_balance(self, node):
         return self._get_height(node.left) - self._get_height(node.right) if node else 0
 
+    def _update(self, node):
+        node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
+        node.size = 1 + self._get_size(node.left) + self._get_size(node.right)
+
     def _left_rotate(self, z):
         y = z.right
         T2 = y.left
         y.left = z
         z.right = T2
-        z.height = 1 + max(self._get_height(z.left), self._get_height(z.right))
-        y.height = 1 + max(self._get_height(y.left), self._get_height(y.right))
+        self._update(z)
+        self._update(y)
         return y
 
     def _right_rotate(self, z):
@@ -91,6 +213,6 @@ class AVLTree:
         T3 = y.right
         y.right = z
         z.left = T3
-        z.height = 1 + max(self._get_height(z.left), self._get_height(z.right))
-        y.height = 1 + max(self._get_height(y.left), self._get_height(y.right))
+        self._update(z)
+        self._update(y)
         return y
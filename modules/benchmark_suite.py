@@ -0,0 +1,134 @@
+"""
+有序索引后端对比基准：用相同的工作负载驱动 AVLTree / BPlusTree / BTree / LSMTree，
+输出 JSON Lines（每行一个 后端 x 规模 x 负载 的结果），便于机器读取与对比。
+
+工作负载：bulk_insert（批量插入）、point_lookup（随机点查）、range_scan（区间扫描）、
+          mixed（80% 读 / 20% 写）、delete（随机删除）
+指标：ops_per_sec、p50_us、p99_us，以及该后端在该规模下整个进程的 peak_rss_kb
+
+每个 (后端, 规模) 在独立子进程中运行，峰值内存互不干扰。
+
+用法：python -m modules.benchmark_suite --sizes 1000 10000 100000 --output bench.jsonl
+      （规模可一直到 10000000，耗时与内存随之增长）
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from modules.ordered_map import BACKENDS, create_ordered_map
+
+WORKLOADS = ["bulk_insert", "point_lookup", "range_scan", "mixed", "delete"]
+
+
+def _percentile(sorted_ns, q):
+    if not sorted_ns:
+        return 0.0
+    idx = min(len(sorted_ns) - 1, int(q * len(sorted_ns)))
+    return sorted_ns[idx] / 1000.0
+
+
+def _timed(ops):
+    """逐个执行 ops（无参可调用对象），返回 (总秒数, 每次操作纳秒数列表)"""
+    clock = time.perf_counter_ns
+    latencies = []
+    start = clock()
+    for op in ops:
+        t0 = clock()
+        op()
+        latencies.append(clock() - t0)
+    return (clock() - start) / 1e9, latencies
+
+
+def _report(backend, size, workload, seconds, latencies):
+    latencies.sort()
+    return {
+        "backend": backend,
+        "size": size,
+        "workload": workload,
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / seconds, 1) if seconds else None,
+        "p50_us": round(_percentile(latencies, 0.50), 3),
+        "p99_us": round(_percentile(latencies, 0.99), 3),
+    }
+
+
+def run_backend(backend, size, ops=100000, range_width=100, seed=42):
+    """在当前进程内跑完一个后端、一个规模下的全部工作负载"""
+    rng = random.Random(seed)
+    keys = rng.sample(range(size * 4), size)
+    tree = create_ordered_map(backend)
+    results = []
+
+    seconds, lat = _timed(lambda k=k: tree.insert(k, k) for k in keys)
+    results.append(_report(backend, size, "bulk_insert", seconds, lat))
+
+    n_ops = min(ops, size)
+    probes = [rng.choice(keys) for _ in range(n_ops)]
+    seconds, lat = _timed(lambda k=k: tree.search(k) for k in probes)
+    results.append(_report(backend, size, "point_lookup", seconds, lat))
+
+    n_scans = max(1, n_ops // 10)
+    starts = [rng.randrange(size * 4) for _ in range(n_scans)]
+    seconds, lat = _timed(lambda lo=lo: tree.range_query(lo, lo + range_width) for lo in starts)
+    results.append(_report(backend, size, "range_scan", seconds, lat))
+
+    def mixed_ops():
+        for _ in range(n_ops):
+            k = rng.randrange(size * 4)
+            if rng.random() < 0.8:
+                yield lambda k=k: tree.search(k)
+            else:
+                yield lambda k=k: tree.insert(k, k)
+    seconds, lat = _timed(mixed_ops())
+    results.append(_report(backend, size, "mixed", seconds, lat))
+
+    victims = rng.sample(keys, n_ops)
+    seconds, lat = _timed(lambda k=k: tree.delete(k) for k in victims)
+    results.append(_report(backend, size, "delete", seconds, lat))
+
+    # Linux 下 ru_maxrss 单位为 KB
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for row in results:
+        row["peak_rss_kb"] = peak_rss_kb
+        row["seed"] = seed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="有序索引后端基准测试")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ops", type=int, default=100000, help="每个读/写负载的最大操作数")
+    parser.add_argument("--range-width", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="结果写入的 JSON Lines 文件，默认输出到 stdout")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # 子进程：只跑一个后端、一个规模
+        for row in run_backend(args.backends[0], args.sizes[0], args.ops, args.range_width, args.seed):
+            print(json.dumps(row, ensure_ascii=False))
+        return
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for size in args.sizes:
+            for backend in args.backends:
+                cmd = [sys.executable, "-m", "modules.benchmark_suite", "--worker",
+                       "--backends", backend, "--sizes", str(size), "--ops", str(args.ops),
+                       "--range-width", str(args.range_width), "--seed", str(args.seed)]
+                proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+                out.write(proc.stdout)
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,172 +1,376 @@
+import bisect
+from array import array
+
+# 默认最小度数：每个节点最多 2t-1 个键。t=3 时扇出太小、树太深，
+# 查找要在很多层节点之间来回跳转；t=64 时百万级数据也只有三四层。
+DEFAULT_T = 64
+
+
+def _new_keys(typecode):
+    """节点键数组：指定 typecode 时用 array 紧凑存储数值键，否则用 list"""
+    return array(typecode) if typecode else []
+
+
 class BPlusTreeNode:
-    def __init__(self, leaf=False):
+    __slots__ = ("leaf", "keys", "values", "next")
+
+    def __init__(self, leaf=False, typecode=None):
         self.leaf = leaf
-        self.keys = []
+        self.keys = _new_keys(typecode)
         self.values = []  # 叶子节点存储值，内部节点存储子节点
+        self.next = None  # 叶子节点链表
+
 
 class BPlusTree:
-    def __init__(self, t=3):
-        self.root = BPlusTreeNode(leaf=True)
-        self.t = t  # 阶数，最小度数
+    def __init__(self, t=DEFAULT_T, key_typecode=None):
+        """
+        t: 最小度数（阶数），至少为 2
+        key_typecode: 可选的 array typecode（如 'd'、'q'），键为数值时节点键用数组存储
+        """
+        if t < 2:
+            raise ValueError("B+树的最小度数至少为2")
+        self.t = t
+        self.key_typecode = key_typecode
+        self.root = BPlusTreeNode(leaf=True, typecode=key_typecode)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def from_sorted(cls, items, t=DEFAULT_T, key_typecode=None):
+        """
+        由按键严格升序的 (key, value) 序列自底向上批量构建，O(n)：
+        先把叶子按 2t-2 个键装满并串成链表，再逐层向上建内部节点，
+        每个节点都留一个空位，之后的插入不会立刻触发分裂
+        """
+        tree = cls(t, key_typecode)
+        items = items if isinstance(items, list) else list(items)
+        if not items:
+            return tree
+        fill = 2 * t - 2
+        level, firsts = [], []  # 当前层节点及各自子树的最小键
+        prev = None
+        for start in range(0, len(items), fill):
+            chunk = items[start:start + fill]
+            leaf = BPlusTreeNode(leaf=True, typecode=key_typecode)
+            leaf.keys.extend(k for k, _ in chunk)
+            leaf.values = [v for _, v in chunk]
+            if prev is not None:
+                prev.next = leaf
+            prev = leaf
+            level.append(leaf)
+            firsts.append(chunk[0][0])
+        # 内部节点最多 2t 个孩子，同样留一个空位
+        fanout = 2 * t - 1
+        while len(level) > 1:
+            parents, parent_firsts = [], []
+            for start in range(0, len(level), fanout):
+                node = BPlusTreeNode(typecode=key_typecode)
+                node.values = level[start:start + fanout]
+                # 分隔键取右侧子树的最小键，与叶子分裂时上提的键一致
+                node.keys.extend(firsts[start + 1:start + len(node.values)])
+                parents.append(node)
+                parent_firsts.append(firsts[start])
+            level, firsts = parents, parent_firsts
+        tree.root = level[0]
+        tree._size = len(items)
+        return tree
 
     def search(self, key, node=None):
         node = node or self.root
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
-        if node.leaf:
-            if i < len(node.keys) and node.keys[i] == key:
-                return node.values[i]
-            return None
-        else:
-            return self.search(key, node.values[i])
+        # 内部节点：分隔键等于 key 时 key 位于右子树，因此用 bisect_right
+        while not node.leaf:
+            node = node.values[bisect.bisect_right(node.keys, key)]
+        i = bisect.bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return node.values[i]
+        return None
 
     def insert(self, key, value):
         root = self.root
         if len(root.keys) == 2 * self.t - 1:
-            new_root = BPlusTreeNode()
+            new_root = BPlusTreeNode(typecode=self.key_typecode)
             new_root.values.append(self.root)
             self._split_child(new_root, 0)
             self.root = new_root
-        self._insert_non_full(self.root, key, value)
+        if self._insert_non_full(self.root, key, value):
+            self._size += 1
 
     def _insert_non_full(self, node, key, value):
-        i = len(node.keys) - 1
-        if node.leaf:
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            node.keys.insert(i + 1, key)
-            node.values.insert(i + 1, value)
-        else:
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            i += 1
-            child = node.values[i]
-            if len(child.keys) == 2 * self.t - 1:
+        """插入或覆盖，返回是否新增了键"""
+        full = 2 * self.t - 1
+        while not node.leaf:
+            i = bisect.bisect_right(node.keys, key)
+            if len(node.values[i].keys) == full:
                 self._split_child(node, i)
-                if key > node.keys[i]:
+                if key >= node.keys[i]:
                     i += 1
-            self._insert_non_full(node.values[i], key, value)
+            node = node.values[i]
+        i = bisect.bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            node.values[i] = value  # 键已存在则覆盖
+            return False
+        node.keys.insert(i, key)
+        node.values.insert(i, value)
+        return True
+
+    def delete(self, key):
+        """删除 key，返回是否删除成功。
+        只从叶子中移除，不做节点合并（惰性删除）：分隔键仍能正确路由，
+        空叶子在区间扫描时被跳过。"""
+        node = self.root
+        while not node.leaf:
+            node = node.values[bisect.bisect_right(node.keys, key)]
+        i = bisect.bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            del node.keys[i]
+            del node.values[i]
+            self._size -= 1
+            return True
+        return False
 
     def _split_child(self, parent, i):
         t = self.t
         node = parent.values[i]
-        new_node = BPlusTreeNode(leaf=node.leaf)
+        new_node = BPlusTreeNode(leaf=node.leaf, typecode=self.key_typecode)
         parent.keys.insert(i, node.keys[t - 1])
         parent.values.insert(i + 1, new_node)
-        new_node.keys = node.keys[t:]
-        node.keys = node.keys[:t - 1]
         if node.leaf:
-            new_node.values = node.values[t:]
+            # 叶子节点保留全部键，分隔键同时作为右叶子的第一个键
+            new_node.keys = node.keys[t - 1:]
+            new_node.values = node.values[t - 1:]
+            node.keys = node.keys[:t - 1]
             node.values = node.values[:t - 1]
-            # 叶子节点链表
-            new_node.next = getattr(node, 'next', None)
+            new_node.next = node.next
             node.next = new_node
         else:
+            new_node.keys = node.keys[t:]
             new_node.values = node.values[t:]
+            node.keys = node.keys[:t - 1]
             node.values = node.values[:t]
 
     def range_query(self, low, high):
-        result = []
+        return [value for _, value in self.iter_range(low, high)]
+
+    def iter_range(self, low=None, high=None):
+        """沿叶子链表按键升序惰性产出 [low, high] 内的 (key, value)，None 表示不设界"""
         node = self.root
-        # 找到最左的叶子节点
+        # 直接定位到 low 所在的叶子节点，而不是从最左叶子开始扫描
         while not node.leaf:
-            node = node.values[0]
+            node = node.values[0 if low is None else bisect.bisect_right(node.keys, low)]
+        i = 0 if low is None else bisect.bisect_left(node.keys, low)
         while node:
-            for k, v in zip(node.keys, node.values):
-                if low <= k <= high:
-                    result.append(v)
-                elif k > high:
-                    return result
-            node = getattr(node, 'next', None)
-        return result 
+            keys, values = node.keys, node.values
+            while i < len(keys):
+                if high is not None and keys[i] > high:
+                    return
+                yield keys[i], values[i]
+                i += 1
+            node = node.next
+            i = 0
+
+    def items(self):
+        return self.iter_range()
+
+    def height(self):
+        """树的层数（叶子层为1）"""
+        depth, node = 1, self.root
+        while not node.leaf:
+            node = node.values[0]
+            depth += 1
+        return depth
 
 # ----------------- BTree 实现 -----------------
 class BTreeNode:
-    def __init__(self, t, leaf=False):
+    __slots__ = ("t", "leaf", "keys", "values", "children")
+
+    def __init__(self, t, leaf=False, typecode=None):
         self.t = t
         self.leaf = leaf
-        self.keys = []
-        self.values = []  # 叶子节点存储值，内部节点存储子节点
+        self.keys = _new_keys(typecode)
+        self.values = []  # 与 keys 一一对应的值（内部节点同样存值）
+        self.children = []  # 内部节点的子节点
 
 class BTree:
-    def __init__(self, t=3):
-        self.root = BTreeNode(t, leaf=True)
+    def __init__(self, t=DEFAULT_T, key_typecode=None):
+        if t < 2:
+            raise ValueError("B树的最小度数至少为2")
         self.t = t
+        self.key_typecode = key_typecode
+        self.root = BTreeNode(t, leaf=True, typecode=key_typecode)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
 
     def search(self, key, node=None):
         node = node or self.root
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
-        if i < len(node.keys) and key == node.keys[i]:
-            if node.leaf:
+        while True:
+            i = bisect.bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
                 return node.values[i]
-            else:
-                return self.search(key, node.values[i+1])
-        if node.leaf:
-            return None
-        else:
-            return self.search(key, node.values[i])
+            if node.leaf:
+                return None
+            node = node.children[i]
 
     def insert(self, key, value):
         root = self.root
         if len(root.keys) == 2 * self.t - 1:
-            new_root = BTreeNode(self.t)
-            new_root.values.append(self.root)
+            new_root = BTreeNode(self.t, typecode=self.key_typecode)
+            new_root.children.append(self.root)
             self._split_child(new_root, 0)
             self.root = new_root
-        self._insert_non_full(self.root, key, value)
+        if self._insert_non_full(self.root, key, value):
+            self._size += 1
 
     def _insert_non_full(self, node, key, value):
-        i = len(node.keys) - 1
-        if node.leaf:
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            node.keys.insert(i + 1, key)
-            node.values.insert(i + 1, value)
-        else:
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            i += 1
-            child = node.values[i]
-            if len(child.keys) == 2 * self.t - 1:
+        """插入或覆盖，返回是否新增了键"""
+        full = 2 * self.t - 1
+        while True:
+            i = bisect.bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                node.values[i] = value  # 键已存在则覆盖
+                return False
+            if node.leaf:
+                node.keys.insert(i, key)
+                node.values.insert(i, value)
+                return True
+            if len(node.children[i].keys) == full:
                 self._split_child(node, i)
+                if key == node.keys[i]:
+                    node.values[i] = value
+                    return False
                 if key > node.keys[i]:
                     i += 1
-            self._insert_non_full(node.values[i], key, value)
+            node = node.children[i]
 
     def _split_child(self, parent, i):
         t = self.t
-        node = parent.values[i]
-        new_node = BTreeNode(t, leaf=node.leaf)
+        node = parent.children[i]
+        new_node = BTreeNode(t, leaf=node.leaf, typecode=self.key_typecode)
+        # 中位键连同它的值一起上移到父节点
         parent.keys.insert(i, node.keys[t - 1])
-        parent.values.insert(i + 1, new_node)
+        parent.values.insert(i, node.values[t - 1])
+        parent.children.insert(i + 1, new_node)
         new_node.keys = node.keys[t:]
+        new_node.values = node.values[t:]
         node.keys = node.keys[:t - 1]
-        if node.leaf:
-            new_node.values = node.values[t:]
-            node.values = node.values[:t - 1]
-        else:
-            new_node.values = node.values[t:]
-            node.values = node.values[:t]
+        node.values = node.values[:t - 1]
+        if not node.leaf:
+            new_node.children = node.children[t:]
+            node.children = node.children[:t]
+
+    def delete(self, key):
+        """删除 key，返回是否删除成功（单趟自顶向下，下行前保证子节点至少有 t 个键）"""
+        t = self.t
+        node = self.root
+        found = False
+        while True:
+            i = bisect.bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                found = True
+                if node.leaf:
+                    del node.keys[i]
+                    del node.values[i]
+                    break
+                left, right = node.children[i], node.children[i + 1]
+                if len(left.keys) >= t:
+                    # 用前驱替换，再到左子树删除前驱
+                    pred = left
+                    while not pred.leaf:
+                        pred = pred.children[-1]
+                    key = pred.keys[-1]
+                    node.keys[i], node.values[i] = key, pred.values[-1]
+                    node = left
+                elif len(right.keys) >= t:
+                    # 用后继替换，再到右子树删除后继
+                    succ = right
+                    while not succ.leaf:
+                        succ = succ.children[0]
+                    key = succ.keys[0]
+                    node.keys[i], node.values[i] = key, succ.values[0]
+                    node = right
+                else:
+                    self._merge_children(node, i)
+                    node = left
+                continue
+            if node.leaf:
+                break
+            child = node.children[i]
+            if len(child.keys) == t - 1:
+                if i > 0 and len(node.children[i - 1].keys) >= t:
+                    self._borrow_from_left(node, i)
+                elif i + 1 < len(node.children) and len(node.children[i + 1].keys) >= t:
+                    self._borrow_from_right(node, i)
+                elif i + 1 < len(node.children):
+                    self._merge_children(node, i)
+                else:
+                    self._merge_children(node, i - 1)
+                    child = node.children[i - 1]
+            node = child
+        # 根节点被合并空后降低树高
+        if not self.root.keys and not self.root.leaf:
+            self.root = self.root.children[0]
+        if found:
+            self._size -= 1
+        return found
+
+    def _merge_children(self, parent, i):
+        """把 parent.keys[i] 和右兄弟合并进 children[i]"""
+        left = parent.children[i]
+        right = parent.children.pop(i + 1)
+        left.keys.append(parent.keys.pop(i))
+        left.values.append(parent.values.pop(i))
+        left.keys.extend(right.keys)
+        left.values.extend(right.values)
+        left.children.extend(right.children)
+
+    def _borrow_from_left(self, parent, i):
+        child, sibling = parent.children[i], parent.children[i - 1]
+        child.keys.insert(0, parent.keys[i - 1])
+        child.values.insert(0, parent.values[i - 1])
+        parent.keys[i - 1] = sibling.keys.pop()
+        parent.values[i - 1] = sibling.values.pop()
+        if not sibling.leaf:
+            child.children.insert(0, sibling.children.pop())
+
+    def _borrow_from_right(self, parent, i):
+        child, sibling = parent.children[i], parent.children[i + 1]
+        child.keys.append(parent.keys[i])
+        child.values.append(parent.values[i])
+        parent.keys[i] = sibling.keys.pop(0)
+        parent.values[i] = sibling.values.pop(0)
+        if not sibling.leaf:
+            child.children.append(sibling.children.pop(0))
 
     def range_query(self, low, high):
-        result = []
-        self._range_query(self.root, low, high, result)
-        return result
+        return [value for _, value in self.iter_range(low, high)]
 
-    def _range_query(self, node, low, high, result):
-        i = 0
-        while i < len(node.keys) and node.keys[i] < low:
-            i += 1
-        while i < len(node.keys) and node.keys[i] <= high:
-            if node.leaf:
-                result.append(node.values[i])
-            else:
-                self._range_query(node.values[i], low, high, result)
-                # result.append(node.keys[i])  # 如果只存key可以加这行
+    def iter_range(self, low=None, high=None):
+        """中序遍历，按键升序惰性产出 [low, high] 内的 (key, value)，None 表示不设界"""
+        yield from self._iter_range(self.root, low, high)
+
+    def _iter_range(self, node, low, high):
+        # 只进入与 [low, high] 相交的子树
+        i = 0 if low is None else bisect.bisect_left(node.keys, low)
+        while i < len(node.keys):
+            if not node.leaf:
+                yield from self._iter_range(node.children[i], low, high)
+            if high is not None and node.keys[i] > high:
+                return
+            yield node.keys[i], node.values[i]
             i += 1
-        if not node.leaf and i < len(node.values):
-            self._range_query(node.values[i], low, high, result) 
-    
+        if not node.leaf:
+            yield from self._iter_range(node.children[i], low, high)
+
+    def items(self):
+        return self.iter_range()
+
+    def height(self):
+        """树的层数（叶子层为1）"""
+        depth, node = 1, self.root
+        while not node.leaf:
+            node = node.children[0]
+            depth += 1
+        return depth
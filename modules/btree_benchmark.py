@@ -0,0 +1,68 @@
+"""
+B树/B+树扇出对比基准：比较不同最小度数 t 下的树高、插入吞吐量和点查延迟，并与 AVLTree 对照。
+
+用法：python -m modules.btree_benchmark --n 200000 --t 3 16 64 128
+"""
+import argparse
+import random
+import time
+
+from modules.avl_tree import AVLTree
+from modules.bplustree import BPlusTree, BTree
+
+
+def _avl_height(tree):
+    return tree.root.height if tree.root else 0
+
+
+def bench_one(name, tree, keys, lookups, height_fn):
+    start = time.perf_counter()
+    for k in keys:
+        tree.insert(k, k)
+    insert_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for k in lookups:
+        tree.search(k)
+    lookup_secs = time.perf_counter() - start
+
+    return {
+        "structure": name,
+        "height": height_fn(tree),
+        "insert_ops_per_sec": len(keys) / insert_secs if insert_secs else float("inf"),
+        "lookup_us": lookup_secs / len(lookups) * 1e6 if lookups else 0.0,
+    }
+
+
+def run(n, t_values, lookups=100000, seed=42, typecode=None):
+    rng = random.Random(seed)
+    keys = rng.sample(range(n * 10), n)
+    probes = [rng.choice(keys) for _ in range(lookups)]
+    rows = []
+    for t in t_values:
+        rows.append(bench_one(f"BPlusTree(t={t})", BPlusTree(t=t, key_typecode=typecode),
+                              keys, probes, BPlusTree.height))
+        rows.append(bench_one(f"BTree(t={t})", BTree(t=t, key_typecode=typecode),
+                              keys, probes, BTree.height))
+    rows.append(bench_one("AVLTree", AVLTree(), keys, probes, _avl_height))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="B树扇出基准测试")
+    parser.add_argument("--n", type=int, default=100000, help="插入的键数量")
+    parser.add_argument("--t", type=int, nargs="+", default=[3, 16, 64, 128], help="待比较的最小度数")
+    parser.add_argument("--lookups", type=int, default=100000, help="随机点查次数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--typecode", default=None, help="节点键数组的 array typecode，如 q")
+    args = parser.parse_args()
+
+    rows = run(args.n, args.t, args.lookups, args.seed, args.typecode)
+    print(f"{'结构':<20}{'树高':>6}{'插入(ops/s)':>16}{'点查(us)':>12}")
+    for row in rows:
+        print(f"{row['structure']:<20}{row['height']:>6}"
+              f"{row['insert_ops_per_sec']:>16,.0f}{row['lookup_us']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+批量构建基准：比较逐条插入与 from_records 批量构建三个引擎的耗时。
+数据由 bulk_generator.BulkDataGenerator 生成，对象构造不计入耗时。
+
+逐条构建任务调度器每次都要 DFS 查环并重建就绪堆，整体 O(n^2)，
+因此任务的逐条对照只在前 --task-rows 个任务（及其内部依赖）上进行。
+
+用法：python -m modules.bulk_load_benchmark --products 1000000 --customers 1000000 --relations 1000000
+"""
+import argparse
+import time
+
+from bulk_generator import BulkDataGenerator, concat
+from models import Customer, CustomerRelation, MarketingTask, Product
+from modules.customer_network import CustomerNetwork
+from modules.product_index import ProductIndex
+from modules.task_scheduler import TaskScheduler
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def _row_products(products):
+    index = ProductIndex()
+    for product in products:
+        index.insert(product)
+    return index
+
+
+def _row_network(customers, relations):
+    network = CustomerNetwork()
+    for customer in customers:
+        network.add_customer(customer)
+    for relation in relations:
+        network.add_relation(relation)
+    return network
+
+
+def _row_scheduler(tasks, dependencies):
+    scheduler = TaskScheduler()
+    for task in tasks:
+        scheduler.insert(task)
+    for before_id, after_id in dependencies:
+        scheduler.add_dependency(before_id, after_id)
+    return scheduler
+
+
+def _check(name, row, bulk, fields):
+    for field in fields:
+        if len(getattr(row, field)) != len(getattr(bulk, field)):
+            raise AssertionError(f"{name}: {field} 数量不一致")
+
+
+def run(n_products, n_customers, n_relations, n_tasks, task_rows, seed=0):
+    gen = BulkDataGenerator(seed)
+    rows = []
+
+    products = [Product(**r) for b in gen.products(n_products) for r in b.records()]
+    row, row_secs = _timed(lambda: _row_products(products))
+    bulk, bulk_secs = _timed(lambda: ProductIndex.from_records(products))
+    _check("products", row, bulk, ("products", "price_index", "popularity_index"))
+    rows.append(("ProductIndex", n_products, row_secs, bulk_secs))
+    del products, row, bulk
+
+    customer_batch = concat(list(gen.customers(n_customers)))
+    customers = [Customer(**r) for r in customer_batch.records()]
+    relations = [CustomerRelation(**r) for b in gen.relations(customer_batch, n_relations) for r in b.records()]
+    row, row_secs = _timed(lambda: _row_network(customers, relations))
+    bulk, bulk_secs = _timed(lambda: CustomerNetwork.from_records(customers, relations))
+    _check("customers", row, bulk, ("customers", "relations"))
+    rows.append(("CustomerNetwork", n_customers + len(relations), row_secs, bulk_secs))
+    del customers, relations, row, bulk
+
+    task_batch = gen.tasks(n_tasks)
+    tasks = [MarketingTask(**r) for r in task_batch.records()]
+    dependencies = gen.dependency_pairs(task_batch)
+    prefix = tasks[:task_rows]
+    prefix_ids = {t.id for t in prefix}
+    prefix_deps = [(a, b) for a, b in dependencies if a in prefix_ids and b in prefix_ids]
+    row, row_secs = _timed(lambda: _row_scheduler(prefix, prefix_deps))
+    bulk, bulk_secs = _timed(lambda: TaskScheduler.from_records(prefix, prefix_deps))
+    _check("tasks", row, bulk, ("task_map", "ready_heap"))
+    rows.append(("TaskScheduler", len(prefix), row_secs, bulk_secs))
+    _, full_secs = _timed(lambda: TaskScheduler.from_records(tasks, dependencies))
+    rows.append(("TaskScheduler", n_tasks, None, full_secs))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="逐条插入与批量构建的加载耗时对比")
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--customers", type=int, default=1000000)
+    parser.add_argument("--relations", type=int, default=1000000)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--task-rows", type=int, default=5000, help="任务逐条对照的规模")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = run(args.products, args.customers, args.relations, args.tasks, args.task_rows, args.seed)
+    print(f"{'引擎':<18}{'记录数':>10}{'逐条(s)':>12}{'批量(s)':>12}{'加速比':>10}")
+    for name, n, row_secs, bulk_secs in rows:
+        row_text = f"{row_secs:>12.2f}" if row_secs is not None else f"{'-':>12}"
+        speedup = f"{row_secs / bulk_secs:>9.1f}x" if row_secs is not None and bulk_secs else f"{'-':>10}"
+        print(f"{name:<18}{n:>10,}{row_text}{bulk_secs:>12.2f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
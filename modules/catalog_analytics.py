@@ -0,0 +1,218 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class CatalogAnalytics:
+    """
+    商品目录统计，与 ProductIndex 同步维护：
+    - 价格、库存、销量、评分、类别编号各一列 NumPy 数组，删除的行类别记为 -1，行号复用
+    - 每个类别的计数、价格和、库存和、销量和、销量×评分和为累计量，增删改时 O(1) 增量更新，
+      summary() 只需 O(类别数)
+    - 分位数与直方图在列上做一次向量化计算，O(n)
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._rows: Dict[str, int] = {}  # 商品ID -> 行号
+        self._free: List[int] = []
+        self._size = 0  # 已使用的行数（含空闲行）
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.stock = np.zeros(capacity, dtype=np.int64)
+        self.sales = np.zeros(capacity, dtype=np.int64)
+        self.rating = np.zeros(capacity, dtype=np.float64)
+        self.category = np.full(capacity, -1, dtype=np.int32)
+        self.categories: List[str] = []
+        self._codes: Dict[str, int] = {}
+        # 按类别编号索引的累计量
+        self._count = np.zeros(0, dtype=np.int64)
+        self._price_sum = np.zeros(0, dtype=np.float64)
+        self._stock_sum = np.zeros(0, dtype=np.int64)
+        self._sales_sum = np.zeros(0, dtype=np.int64)
+        self._weighted_rating = np.zeros(0, dtype=np.float64)  # sum(sales * rating)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @classmethod
+    def from_products(cls, products: Iterable) -> "CatalogAnalytics":
+        """批量构建：整列写入，累计量用 bincount 一次算出"""
+        products = list(products)
+        analytics = cls(max(len(products), 1024))
+        n = len(products)
+        analytics._rows = {p.id: i for i, p in enumerate(products)}
+        analytics._size = n
+        analytics.price[:n] = [p.price for p in products]
+        analytics.stock[:n] = [p.stock for p in products]
+        analytics.sales[:n] = [p.sales for p in products]
+        analytics.rating[:n] = [p.rating for p in products]
+        analytics.category[:n] = [analytics._code(p.category) for p in products]
+        analytics.refresh()
+        return analytics
+
+    def _code(self, category: str) -> int:
+        code = self._codes.get(category)
+        if code is None:
+            code = self._codes[category] = len(self.categories)
+            self.categories.append(category)
+            for name in ("_count", "_price_sum", "_stock_sum", "_sales_sum", "_weighted_rating"):
+                totals = getattr(self, name)
+                setattr(self, name, np.append(totals, totals.dtype.type(0)))
+        return code
+
+    def _grow(self):
+        capacity = len(self.price) * 2
+        for name in ("price", "stock", "sales", "rating", "category"):
+            column = getattr(self, name)
+            grown = np.full(capacity, -1 if name == "category" else 0, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _apply(self, row: int, sign: int):
+        """把第 row 行计入（sign=1）或移出（sign=-1）所属类别的累计量"""
+        code = self.category[row]
+        self._count[code] += sign
+        self._price_sum[code] += sign * self.price[row]
+        self._stock_sum[code] += sign * self.stock[row]
+        self._sales_sum[code] += sign * self.sales[row]
+        self._weighted_rating[code] += sign * self.sales[row] * self.rating[row]
+
+    def _write(self, row: int, product):
+        self.price[row] = product.price
+        self.stock[row] = product.stock
+        self.sales[row] = product.sales
+        self.rating[row] = product.rating
+        self.category[row] = self._code(product.category)
+
+    # ---------------- 增量维护 ----------------
+
+    def add(self, product):
+        if product.id in self._rows:
+            self.update(product)
+            return
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == len(self.price):
+                self._grow()
+            row = self._size
+            self._size += 1
+        self._rows[product.id] = row
+        self._write(row, product)
+        self._apply(row, 1)
+
+    def remove(self, product_id: str) -> bool:
+        row = self._rows.pop(product_id, None)
+        if row is None:
+            return False
+        self._apply(row, -1)
+        self.category[row] = -1
+        self._free.append(row)
+        return True
+
+    def update(self, product):
+        """价格、库存、销量、评分或类别变化后调用"""
+        row = self._rows.get(product.id)
+        if row is None:
+            self.add(product)
+            return
+        self._apply(row, -1)
+        self._write(row, product)
+        self._apply(row, 1)
+
+    def refresh(self):
+        """由列数据重新计算全部累计量（消除长期增减累积的浮点误差）"""
+        k = len(self.categories)
+        alive = self.category[:self._size] >= 0
+        codes = self.category[:self._size][alive]
+        price = self.price[:self._size][alive]
+        stock = self.stock[:self._size][alive]
+        sales = self.sales[:self._size][alive]
+        rating = self.rating[:self._size][alive]
+        self._count = np.bincount(codes, minlength=k).astype(np.int64)
+        self._price_sum = np.bincount(codes, price, minlength=k)
+        self._stock_sum = np.bincount(codes, stock, minlength=k).round().astype(np.int64)
+        self._sales_sum = np.bincount(codes, sales, minlength=k).round().astype(np.int64)
+        self._weighted_rating = np.bincount(codes, sales * rating, minlength=k)
+
+    # ---------------- 查询 ----------------
+
+    def summary(self) -> Dict:
+        """全局与各类别汇总，O(类别数)"""
+        categories = []
+        for code, category in enumerate(self.categories):
+            count = int(self._count[code])
+            if count:
+                categories.append(self._totals(category, count, self._price_sum[code], self._stock_sum[code],
+                                               self._sales_sum[code], self._weighted_rating[code]))
+        overall = self._totals(None, len(self._rows), self._price_sum.sum(), self._stock_sum.sum(),
+                               self._sales_sum.sum(), self._weighted_rating.sum())
+        overall.pop("category")
+        overall["categories"] = sorted(categories, key=lambda c: c["count"], reverse=True)
+        return overall
+
+    @staticmethod
+    def _totals(category, count, price_sum, stock_sum, sales_sum, weighted_rating) -> Dict:
+        return {
+            "category": category,
+            "count": int(count),
+            "average_price": round(float(price_sum) / count, 2) if count else 0,
+            "total_stock": int(stock_sum),
+            "total_sales": int(sales_sum),
+            # 销量加权评分：卖得越多的商品评分权重越大；无销量时为 0
+            "sales_weighted_rating": round(float(weighted_rating) / int(sales_sum), 3) if sales_sum else 0,
+        }
+
+    def _mask(self, category: Optional[str]) -> np.ndarray:
+        codes = self.category[:self._size]
+        if category is None:
+            return codes >= 0
+        code = self._codes.get(category)
+        if code is None:
+            raise ValueError(f"类别 {category} 不存在")
+        return codes == code
+
+    def price_percentiles(self, percentiles: Sequence[float] = (25, 50, 75, 90, 99),
+                          category: Optional[str] = None) -> Dict[str, float]:
+        """价格分位数，category 为 None 时统计全部商品"""
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("分位数必须在 0~100 之间")
+        prices = self.price[:self._size][self._mask(category)]
+        if len(prices) == 0:
+            return {}
+        values = np.percentile(prices, percentiles)
+        return {f"p{q:g}": round(float(v), 2) for q, v in zip(percentiles, values)}
+
+    def category_percentiles(self, percentiles: Sequence[float] = (50,)) -> Dict[str, Dict[str, float]]:
+        """各类别的价格分位数：按 (类别, 价格) 排序一次，再在每个类别的区间上插值"""
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("分位数必须在 0~100 之间")
+        codes = self.category[:self._size]
+        alive = codes >= 0
+        codes, prices = codes[alive], self.price[:self._size][alive]
+        order = np.lexsort((prices, codes))
+        codes, prices = codes[order], prices[order]
+        starts = np.searchsorted(codes, np.arange(len(self.categories)), side="left")
+        stops = np.searchsorted(codes, np.arange(len(self.categories)), side="right")
+        result = {}
+        for code, category in enumerate(self.categories):
+            segment = prices[starts[code]:stops[code]]
+            if len(segment):
+                values = np.percentile(segment, percentiles)
+                result[category] = {f"p{q:g}": round(float(v), 2) for q, v in zip(percentiles, values)}
+        return result
+
+    def price_histogram(self, bins: int = 20, category: Optional[str] = None,
+                        log: bool = False) -> Dict[str, list]:
+        """价格直方图，返回区间边界与各区间商品数；log 为 True 时按对数等分区间"""
+        if bins < 1:
+            raise ValueError("bins 必须为正整数")
+        prices = self.price[:self._size][self._mask(category)]
+        if len(prices) == 0:
+            return {"edges": [], "counts": []}
+        low, high = float(prices.min()), float(prices.max())
+        if log and low > 0:
+            edges = np.geomspace(low, high if high > low else low + 1, bins + 1)
+        else:
+            edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+        counts, edges = np.histogram(prices, edges)
+        return {"edges": [round(float(e), 2) for e in edges], "counts": counts.tolist()}
@@ -0,0 +1,43 @@
+from typing import Dict, Iterator
+
+from modules.ordered_map import OrderedMap, bulk_load, create_ordered_map
+
+
+class CategoryIndex:
+    """
+    单个类别的二级索引：
+    - ids: 成员集合（dict 保持插入顺序），增删 O(1)
+    - by_price: (price, id) -> id 的有序索引，类别内价格区间/价格排序 O(log n + k)
+    - by_popularity: 热度榜中该类别的分类榜（与热度榜共用同一结构，不重复维护）
+    """
+
+    def __init__(self, price_backend: str, by_popularity: OrderedMap):
+        self.ids: Dict[str, None] = {}
+        self.by_price: OrderedMap = create_ordered_map(price_backend)
+        self.by_popularity = by_popularity
+
+    @classmethod
+    def from_sorted(cls, price_backend: str, by_popularity: OrderedMap, ids, price_items) -> "CategoryIndex":
+        """批量构建：ids 为插入顺序的成员ID，price_items 为按 (price, id) 升序的 ((price, id), id)"""
+        index = cls.__new__(cls)
+        index.ids = dict.fromkeys(ids)
+        index.by_price = bulk_load(price_backend, price_items)
+        index.by_popularity = by_popularity
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __contains__(self, product_id: str):
+        return product_id in self.ids
+
+    def add(self, product):
+        self.ids[product.id] = None
+        self.by_price.insert((product.price, product.id), product.id)
+
+    def remove(self, product):
+        self.ids.pop(product.id, None)
+        self.by_price.delete((product.price, product.id))
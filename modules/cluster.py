@@ -0,0 +1,294 @@
+"""
+多进程服务：一个写进程 + N 个读进程。
+
+- 写进程持有唯一一份 ProductIndex / CustomerNetwork / TaskScheduler（启动时只生成或加载一次，
+  所有读进程看到的是同一份数据），执行全部写请求，并把引擎数据发布为快照文件
+  （modules.snapshot 的格式，默认放在 /dev/shm 即共享内存）。发布时先写临时文件再原子替换，
+  快照一经发布不再修改，已经映射旧快照的读进程不受影响。
+- 读进程共享同一个监听 socket，只服务 GET / HEAD：mmap 最新快照（/dev/shm 中的页各进程共用），
+  在后台线程里从快照重建引擎后替换，建好之前继续用旧引擎服务。重建索引是一次完整的拷贝，
+  所以只重建自上次加载以来内容变化过的引擎（写进程为每个引擎记录它最后变化的版本），其余沿用；
+  加载失败（快照损坏等）时保留旧引擎，下一次轮询重试。
+- 读进程收到的其他请求（POST / PUT / DELETE），以及状态只存在于写进程中的读接口（WRITER_ROUTES，
+  如后台执行引擎的进度），经本地队列转发给写进程执行，响应原样返回。
+  写进程有写入后最多每 publish_interval 秒合并发布一次快照，读进程的数据最多落后这么久。
+  响应头 X-Snapshot-Version：读请求为读进程当前的快照版本，转发的写请求为第一个包含这次写入的版本，
+  客户端需要读到自己的写入时，可以等到读响应的版本不小于它。
+
+用法：python -m modules.cluster --workers 4 --port 5000
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+from typing import Dict, List
+
+from werkzeug.http import HTTP_STATUS_CODES
+from werkzeug.wsgi import get_input_stream
+
+from modules.serialization import dumps
+
+# app 模块中的引擎全局变量，顺序与 SnapshotPublisher.changed 一致
+ENGINE_NAMES = ("product_index", "customer_network", "task_scheduler")
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# 读接口中只能由写进程回答的路径：数据是写进程的内存状态，不在快照里
+WRITER_ROUTES = frozenset({"/tasks/run"})
+# 写进程重新生成的响应头，不原样转发
+_HOP_HEADERS = frozenset({"content-length", "transfer-encoding", "connection"})
+
+
+def default_publish_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"ecommerce-{os.getpid()}.snap")
+
+
+# ---------------- 写进程 ----------------
+
+class SnapshotPublisher:
+    """
+    写进程中的快照发布：有写入时标记为脏，后台线程按间隔合并发布，并递增共享的版本号。
+    不经过请求的修改（如后台执行引擎更新任务状态）由引擎 generation 的变化发现
+    """
+
+    def __init__(self, path: str, version, changed, engines, interval: float = 0.2):
+        self.path = path
+        self.version = version  # multiprocessing.Value，读进程轮询它发现新快照
+        self.changed = changed  # multiprocessing.Array，各引擎最后一次变化所在的版本
+        self.interval = interval
+        self._engines = engines
+        self._dirty = threading.Event()
+        self._generations = None  # 上次发布时各引擎的 (对象, generation)
+        self.published = 0
+        self.last_seconds = 0.0
+
+    def mark_dirty(self):
+        self._dirty.set()
+
+    def publish(self):
+        from modules.rwlock import lock_all
+        from modules.snapshot import save_engines
+
+        engines = self._engines()
+        start = time.perf_counter()
+        with lock_all(engines, write=False):
+            save_engines(self.path, *engines)
+            generations = self._current(engines)
+            previous = self._generations or (None,) * len(engines)
+            # 在锁内递增：之后完成的写入一定不在这个版本里，写响应报告的版本才准确。
+            # 先写文件、再记录变化的引擎、最后递增版本，读进程按相反顺序读取，看到的记录一定有对应的文件
+            with self.version.get_lock():
+                published = self.version.value + 1
+                for i, (old, new) in enumerate(zip(previous, generations)):
+                    if old != new:
+                        self.changed[i] = published
+                self.version.value = published
+            self._generations = generations
+        self.published += 1
+        self.last_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _current(engines):
+        # 引擎对象被整体替换时 generation 可能相同，连同对象一起比较
+        return tuple((id(engine), engine.generation) for engine in engines)
+
+    def run(self):
+        while True:
+            if not self._dirty.wait(self.interval) and self._current(self._engines()) == self._generations:
+                continue
+            time.sleep(self.interval)  # 合并这段时间内的写入
+            self._dirty.clear()
+            self.publish()
+
+
+def serve_writes(flask_app, requests, responses, publisher: SnapshotPublisher):
+    """写进程主循环：依次执行读进程转发来的请求，结果按读进程编号送回"""
+    client = flask_app.test_client()
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        reader_id, request_id, method, path, query_string, body, content_type = item
+        try:
+            response = client.open(path, method=method, query_string=query_string, data=body,
+                                   content_type=content_type)
+            headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS]
+            payload = (response.status_code, headers, response.get_data())
+        except Exception as e:
+            payload = (500, [("Content-Type", "application/json")], dumps({"status": "error", "msg": str(e)}))
+        if method not in READ_METHODS:
+            publisher.mark_dirty()
+        responses[reader_id].put((request_id, payload, publisher.version.value + 1))
+
+
+# ---------------- 读进程 ----------------
+
+class ReaderApp:
+    """读进程的 WSGI 入口：读请求交给本进程的 Flask 应用，其余请求与 WRITER_ROUTES 转发给写进程"""
+
+    def __init__(self, server, reader_id: int, snapshot_version: int, loaded: List[int], publish_path: str,
+                 version, changed, requests, responses, timeout: float = 30.0, poll_interval: float = 0.05):
+        self.server = server  # 本进程导入的 app 模块，引擎是它的全局变量
+        self.reader_id = reader_id
+        self.snapshot_version = snapshot_version
+        self.loaded = loaded  # 本进程各引擎对应的变化版本（与 changed 相同则不必重建）
+        self.publish_path = publish_path
+        self.version = version
+        self.changed = changed
+        self.requests = requests
+        self.responses = responses  # 本读进程专用的响应队列
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._pending: Dict[int, futures.Future] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._parent = os.getppid()
+        self._failed = None  # 加载失败的版本，同一版本只报告一次
+        threading.Thread(target=self._receive, daemon=True).start()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def __call__(self, environ, start_response):
+        if environ["REQUEST_METHOD"] in READ_METHODS and environ.get("PATH_INFO") not in WRITER_ROUTES:
+            version = str(self.snapshot_version)
+
+            def tagged(status, headers, exc_info=None):
+                return start_response(status, headers + [("X-Snapshot-Version", version)], exc_info)
+            return self.server.app(environ, tagged)
+        return self._forward(environ, start_response)
+
+    def _forward(self, environ, start_response):
+        body = get_input_stream(environ).read()
+        request_id = next(self._ids)
+        future = futures.Future()
+        with self._pending_lock:
+            self._pending[request_id] = future
+        self.requests.put((self.reader_id, request_id, environ["REQUEST_METHOD"], environ.get("PATH_INFO", "/"),
+                           environ.get("QUERY_STRING", ""), body, environ.get("CONTENT_TYPE")))
+        try:
+            (status, headers, data), version = future.result(timeout=self.timeout)
+            headers = headers + [("X-Snapshot-Version", str(version))]
+        except futures.TimeoutError:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            status, headers = 504, [("Content-Type", "application/json")]
+            data = dumps({"status": "error", "msg": "写进程无响应"})
+        start_response(f"{status} {HTTP_STATUS_CODES.get(status, '')}", headers)
+        return [data]
+
+    def _receive(self):
+        """把写进程送回的响应交给等待中的请求线程"""
+        while True:
+            request_id, payload, version = self.responses.get()
+            with self._pending_lock:
+                future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_result((payload, version))
+
+    def _watch(self):
+        while True:
+            if os.getppid() != self._parent:  # 写进程已退出（包括被强制杀掉），读进程随之退出
+                os._exit(0)
+            published = self.version.value
+            if published != self.snapshot_version:
+                try:
+                    self.load(published)
+                except Exception as e:
+                    # 继续用旧引擎服务，下一次轮询重试（写进程之后发布的新快照也会重新触发）
+                    if self._failed != published:
+                        self._failed = published
+                        print(f"读进程 {self.reader_id} 加载快照版本 {published} 失败: {e!r}",
+                              file=sys.stderr, flush=True)
+            time.sleep(self.poll_interval)
+
+    def load(self, published: int):
+        """映射新快照，重建内容变化过的引擎，全部建好后再一次性替换 app 模块中的全局引擎"""
+        from modules.snapshot import (Snapshot, restore_customer_network, restore_product_index,
+                                      restore_task_scheduler)
+
+        server = self.server
+        changed = list(self.changed)  # 先于打开文件读取：打开的快照一定不旧于这份记录
+        snapshot = Snapshot(self.publish_path)
+        restore = (lambda: restore_product_index(snapshot, server.COLUMNAR_PRODUCTS),
+                   lambda: restore_customer_network(snapshot), lambda: restore_task_scheduler(snapshot))
+        engines = [factory() if changed[i] != self.loaded[i] else getattr(server, name)
+                   for i, (name, factory) in enumerate(zip(ENGINE_NAMES, restore))]
+        server.snapshot = snapshot
+        for name, engine in zip(ENGINE_NAMES, engines):
+            setattr(server, name, engine)
+        self.loaded = changed
+        # 新引擎的 generation 从 0 开始，旧的 ETag 与缓存必须作废
+        server.response_cache.new_epoch()
+        self.snapshot_version = published
+
+
+def _reader_main(reader_id, sock, publish_path, version, changed, requests, responses, timeout):
+    from werkzeug.serving import make_server
+
+    # app 模块导入时发现快照文件存在，就从它惰性恢复引擎，不再生成演示数据
+    os.environ["SNAPSHOT_PATH"] = publish_path
+    snapshot_version = version.value
+    loaded = list(changed)
+    import app as server
+
+    reader = ReaderApp(server, reader_id, snapshot_version, loaded, publish_path, version, changed,
+                       requests, responses, timeout)
+    host, port = sock.getsockname()[:2]
+    make_server(host, port, reader, threaded=True, fd=sock.fileno()).serve_forever()
+
+
+def serve(host: str = "127.0.0.1", port: int = 5000, workers: int = 4, publish_path: str = None,
+          publish_interval: float = 0.2, timeout: float = 30.0):
+    import app as server  # 写进程：唯一一份引擎
+
+    publish_path = publish_path or default_publish_path()
+    ctx = multiprocessing.get_context("spawn")  # 读进程重新导入 app，不继承写进程的引擎
+    version = ctx.Value("Q", 0)
+    changed = ctx.Array("Q", len(ENGINE_NAMES))
+    publisher = SnapshotPublisher(publish_path, version, changed,
+                                  lambda: [server.product_index, server.customer_network, server.task_scheduler],
+                                  publish_interval)
+    publisher.publish()
+    requests = ctx.Queue()
+    responses = [ctx.Queue() for _ in range(workers)]
+    sock = socket.create_server((host, port), backlog=1024)
+    readers = [ctx.Process(target=_reader_main, daemon=True,
+                           args=(i, sock, publish_path, version, changed, requests, responses[i], timeout))
+               for i in range(workers)]
+    for reader in readers:
+        reader.start()
+    threading.Thread(target=publisher.run, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"写进程 {os.getpid()}，{workers} 个读进程监听 http://{host}:{sock.getsockname()[1]}，"
+          f"快照 {publish_path}（首次发布 {publisher.last_seconds * 1000:.0f} ms）", flush=True)
+    try:
+        serve_writes(server.app, requests, responses, publisher)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for reader in readers:
+            reader.terminate()
+        sock.close()
+        if os.path.exists(publish_path):
+            os.remove(publish_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一写多读的多进程服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4, help="读进程数")
+    parser.add_argument("--publish-path", default=None, help="快照发布路径，默认 /dev/shm 下的临时文件")
+    parser.add_argument("--publish-interval", type=float, default=0.2, help="合并写入后发布快照的间隔（秒）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="转发写请求的超时（秒）")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.publish_path, args.publish_interval, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
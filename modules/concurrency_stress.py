@@ -0,0 +1,174 @@
+"""
+并发压力测试：多个线程各用一个 Flask 测试客户端，混合发送读写请求，
+结束后检查三个引擎的内部结构是否仍然一致（各索引与主表大小相同、邻接表与关系列表对应、
+就绪堆与重新计算的结果相同），并统计 5xx 响应与未捕获异常。
+默认把解释器的线程切换间隔调到 1 微秒，让线程在引擎操作中途频繁切换，竞态更容易暴露。
+
+用法：python -m modules.concurrency_stress --threads 16 --requests 2000
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+
+def _product(pid, rng):
+    return {"id": pid, "name": f"压测商品{rng.randrange(50)}", "brand": "StressBrand",
+            "category": rng.choice(["电子产品", "服装", "食品", "家居"]),
+            "price": round(rng.uniform(1, 5000), 2), "popularity": rng.randrange(10000),
+            "stock": rng.randrange(500), "status": "在售", "sales": rng.randrange(10000),
+            "rating": round(rng.uniform(1, 5), 1), "description": "", "image_url": "",
+            "created_date": "2024-01-01"}
+
+
+def _worker(app, worker_id, n_requests, write_ratio, product_ids, customer_ids, task_ids, results, errors):
+    rng = random.Random(worker_id)
+    client = app.test_client()
+    own_products = []
+    reads = [
+        lambda: client.get("/products/search", query_string={"q": "", "sort_by": rng.choice(["popularity", "price"]),
+                                                             "limit": 20}),
+        lambda: client.get("/products/search", query_string={"min_price": 100, "max_price": 2000}),
+        lambda: client.get("/products/leaderboard", query_string={"k": 10}),
+        lambda: client.get("/products/analytics"),
+        lambda: client.get(f"/products/{rng.choice(product_ids)}/rank"),
+        lambda: client.get("/customers/graph"),
+        lambda: client.get("/customers/statistics"),
+        lambda: client.get("/tasks/topk", query_string={"k": 5}),
+        lambda: client.get("/tasks/dag"),
+    ]
+
+    def add_product():
+        pid = f"S{worker_id}-{len(own_products)}"
+        own_products.append(pid)
+        return client.post("/products/add", json=_product(pid, rng))
+
+    def delete_product():
+        if not own_products:
+            return add_product()
+        return client.post(f"/products/{own_products.pop(rng.randrange(len(own_products)))}/delete")
+
+    def add_relation():
+        a, b = rng.sample(customer_ids, 2)
+        return client.post("/relations", json={"from_customer": a, "to_customer": b,
+                                               "weight": round(rng.random(), 2), "relation_type": "friend"})
+
+    def delete_relation():
+        a, b = rng.sample(customer_ids, 2)
+        return client.delete("/relations", json={"from_customer": a, "to_customer": b})
+
+    def add_dependency():
+        before, after = rng.sample(task_ids, 2)
+        return client.post(f"/tasks/{after}/dependencies", json={"before_id": before})  # 成环时返回 400
+
+    writes = [
+        add_product,
+        delete_product,
+        lambda: client.post(f"/products/{rng.choice(product_ids)}/update",
+                            json={"price": round(rng.uniform(1, 5000), 2), "stock": rng.randrange(500)}),
+        add_relation,
+        delete_relation,
+        lambda: client.put(f"/customers/{rng.choice(customer_ids)}", json={"activity_level": rng.random()}),
+        lambda: client.put(f"/tasks/{rng.choice(task_ids)}", json={"urgency": round(rng.uniform(1, 10), 1)}),
+        add_dependency,
+        lambda: client.delete(f"/tasks/{rng.choice(task_ids)}/dependencies",
+                              json={"before_id": rng.choice(task_ids)}),
+    ]
+    for _ in range(n_requests):
+        is_write = rng.random() < write_ratio
+        try:
+            response = rng.choice(writes if is_write else reads)()
+            response.get_data()  # 流式响应在这里才真正编码
+            results[("写" if is_write else "读", response.status_code // 100 * 100)] += 1
+        except Exception:
+            errors.append(traceback.format_exc())
+
+
+def check_invariants(product_index, customer_network, task_scheduler):
+    """返回发现的不一致描述，空列表表示一致"""
+    problems = []
+    n = len(product_index.products)
+    for name, size in (("price_index", len(product_index.price_index)),
+                       ("popularity_index", len(product_index.popularity_index)),
+                       ("analytics", len(product_index.analytics)),
+                       ("category_index", sum(len(b) for b in product_index.category_index.values()))):
+        if size != n:
+            problems.append(f"{name} 大小 {size} != 商品数 {n}")
+    for category, bucket in product_index.category_index.items():
+        if any(product_index.products[pid].category != category for pid in bucket):
+            problems.append(f"类别 {category} 的索引包含其他类别的商品")
+    summary = product_index.analytics.summary()
+    if summary["total_stock"] != sum(p.stock for p in product_index.products.values()):
+        problems.append("analytics 库存总和与商品表不一致")
+
+    edges = {(r.from_customer, r.to_customer) for r in customer_network.relations}
+    adjacency = {(a, b) for a, targets in customer_network.adjacency_matrix.items() for b in targets}
+    if edges != adjacency:
+        problems.append(f"邻接表 {len(adjacency)} 条边与关系列表 {len(edges)} 条不一致")
+
+    heap = sorted(task_scheduler.ready_heap)
+    task_scheduler._refresh_ready_heap()
+    if heap != sorted(task_scheduler.ready_heap):
+        problems.append("就绪堆与重新计算的结果不一致")
+    if task_scheduler._topological_remainder():
+        problems.append("任务依赖图出现环")
+    for after, befores in task_scheduler.dependencies.items():
+        if any(after not in task_scheduler.dependents[b] for b in befores):
+            problems.append(f"任务 {after} 的依赖与反向依赖不对称")
+            break
+    return problems
+
+
+def run(threads, n_requests, write_ratio, switch_interval=1e-6):
+    import app as server
+
+    product_ids = list(server.product_index.products)
+    customer_ids = list(server.customer_network.customers)
+    task_ids = list(server.task_scheduler.task_map)
+    results, errors = Counter(), []
+    workers = [threading.Thread(target=_worker, args=(server.app, i, n_requests, write_ratio, product_ids,
+                                                      customer_ids, task_ids, results, errors))
+               for i in range(threads)]
+    default_interval = sys.getswitchinterval()
+    sys.setswitchinterval(switch_interval)
+    try:
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.setswitchinterval(default_interval)
+    problems = check_invariants(server.product_index, server.customer_network, server.task_scheduler)
+    return results, errors, problems, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="引擎读写锁的并发压力测试")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="每个线程的请求数")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="写请求比例")
+    parser.add_argument("--switch-interval", type=float, default=1e-6, help="线程切换间隔（秒）")
+    args = parser.parse_args()
+
+    results, errors, problems, elapsed = run(args.threads, args.requests, args.write_ratio, args.switch_interval)
+    total = sum(results.values())
+    print(f"{total} 个请求，{elapsed:.1f}s，{total / elapsed:.0f} req/s")
+    for (kind, status), count in sorted(results.items()):
+        print(f"  {kind} {status}: {count}")
+    print(f"未捕获异常: {len(errors)}")
+    if errors:
+        print(errors[0])
+    print("一致性检查: " + ("通过" if not problems else "失败"))
+    for problem in problems:
+        print(f"  {problem}")
+    if errors or problems or any(status >= 500 for _, status in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
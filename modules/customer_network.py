@@ -1,17 +1,72 @@
-from typing import Dict, List, Set, Any
+from typing import Dict, Iterable, List, Set, Any, Tuple
 from models import Customer, CustomerRelation
+from modules.ordered_map import paused_gc
+from modules.rwlock import RWLock
 
 class CustomerNetwork:
     def __init__(self):
         self.customers: Dict[str, Customer] = {}  # 客户ID -> Customer对象
         self.relations: List[CustomerRelation] = []  # 所有关系
         self.adjacency_matrix: Dict[str, Dict[str, float]] = {}  # from_id -> {to_id: weight}
+        self.generation = 0  # 每次修改递增，响应缓存以它判断数据是否变化
+        self.lock = RWLock()  # 多线程服务时的读写锁，由调用方（如 app 的视图装饰器）持有
+
+    @classmethod
+    def from_records(cls, customers: Iterable, relations: Iterable = ()) -> "CustomerNetwork":
+        """
+        批量构建，customers / relations 为对象或字典。
+        先一遍校验所有关系端点都存在（任何一条不合法则整体拒绝，不留下半建好的网络），
+        再一遍填充关系列表与邻接表，省去逐条 add_relation 的重复检查。
+        """
+        with paused_gc():
+            network = cls()
+            members, adjacency = network.customers, network.adjacency_matrix
+            for record in customers:
+                customer = record if isinstance(record, Customer) else Customer(**record)
+                members[customer.id] = customer
+                adjacency[customer.id] = {}
+            rels = [r if isinstance(r, CustomerRelation) else CustomerRelation(**r) for r in relations]
+            missing = [r for r in rels if r.from_customer not in members or r.to_customer not in members]
+            if missing:
+                r = missing[0]
+                raise ValueError(f"客户不存在: {r.from_customer} -> {r.to_customer}（共 {len(missing)} 条关系不合法）")
+            for r in rels:
+                adjacency[r.from_customer][r.to_customer] = r.weight
+            network.relations = rels
+        return network
 
     # 客户管理
     def add_customer(self, customer: Customer):
         self.customers[customer.id] = customer
         if customer.id not in self.adjacency_matrix:
             self.adjacency_matrix[customer.id] = {}
+        self.generation += 1
+
+    def add_customers(self, records: Iterable) -> List[Tuple[int, str]]:
+        """
+        批量新增客户，records 为 Customer 对象或字典。
+        先一遍校验，不合法的行跳过并记录 (行号, 原因)，其余一次写入，generation 只递增一次。
+        与 add_customer 相同，已存在的ID会被覆盖（保留其关系）。
+        """
+        errors, valid = [], []
+        for row, record in enumerate(records):
+            try:
+                customer = record if isinstance(record, Customer) else Customer(**record)
+            except TypeError as e:
+                errors.append((row, f"字段不合法: {e}"))
+                continue
+            if not isinstance(customer.id, str) or not customer.id:
+                errors.append((row, "客户ID必须为非空字符串"))
+                continue
+            valid.append(customer)
+        if valid:
+            customers, adjacency = self.customers, self.adjacency_matrix
+            for customer in valid:
+                customers[customer.id] = customer
+                if customer.id not in adjacency:
+                    adjacency[customer.id] = {}
+            self.generation += 1
+        return errors
 
     def update_customer(self, customer_id: str, **kwargs):
         customer = self.customers.get(customer_id)
@@ -20,6 +75,7 @@ class CustomerNetwork:
         for k, v in kwargs.items():
             if hasattr(customer, k):
                 setattr(customer, k, v)
+        self.generation += 1
 
     def delete_customer(self, customer_id: str):
         if customer_id not in self.customers:
@@ -30,6 +86,7 @@ class CustomerNetwork:
         self.relations = [rel for rel in self.relations if rel.from_customer != customer_id and rel.to_customer != customer_id]
         for adj in self.adjacency_matrix.values():
             adj.pop(customer_id, None)
+        self.generation += 1
 
     # 关系管理
     def add_relation(self, relation: CustomerRelation):
@@ -37,11 +94,45 @@ class CustomerNetwork:
             raise ValueError("客户不存在")
         self.relations.append(relation)
         self.adjacency_matrix[relation.from_customer][relation.to_customer] = relation.weight
+        self.generation += 1
+
+    def add_relations(self, records: Iterable) -> List[Tuple[int, str]]:
+        """
+        批量新增关系，records 为 CustomerRelation 对象或字典。
+        一遍校验字段、权重与两端客户，不合法的行跳过并记录 (行号, 原因)；
+        合法的关系一次追加到关系列表并写入邻接表，generation 只递增一次。
+        """
+        errors, valid = [], []
+        customers = self.customers
+        for row, record in enumerate(records):
+            try:
+                relation = record if isinstance(record, CustomerRelation) else CustomerRelation(**record)
+            except TypeError as e:
+                errors.append((row, f"字段不合法: {e}"))
+                continue
+            ends = (relation.from_customer, relation.to_customer)
+            if not all(isinstance(end, str) and end for end in ends):
+                # 先于成员判断：JSON 数组等不可哈希的值在 in 判断时会抛出 TypeError
+                errors.append((row, "客户ID必须为非空字符串"))
+            elif isinstance(relation.weight, bool) or not isinstance(relation.weight, (int, float)):
+                errors.append((row, "权重必须为数字"))
+            elif relation.from_customer not in customers or relation.to_customer not in customers:
+                errors.append((row, f"客户不存在: {relation.from_customer} -> {relation.to_customer}"))
+            else:
+                valid.append(relation)
+        if valid:
+            adjacency = self.adjacency_matrix
+            for relation in valid:
+                adjacency[relation.from_customer][relation.to_customer] = relation.weight
+            self.relations.extend(valid)
+            self.generation += 1
+        return errors
 
     def delete_relation(self, from_id: str, to_id: str):
         self.relations = [rel for rel in self.relations if not (rel.from_customer == from_id and rel.to_customer == to_id)]
         if from_id in self.adjacency_matrix:
             self.adjacency_matrix[from_id].pop(to_id, None)
+        self.generation += 1
 
     # 影响力分析
     def calculate_customer_importance(self, method: str = "pagerank") -> Dict[str, float]:
@@ -73,8 +164,14 @@ class CustomerNetwork:
                     new_pr[to_cust] += damping * pr[from_cust] * weight
             pr = new_pr
         # 可选：将分数写回Customer对象
+        changed = False
         for cust_id, score in pr.items():
-            setattr(self.customers[cust_id], "score", round(score, 4))
+            score = round(score, 4)
+            if getattr(self.customers[cust_id], "score", None) != score:
+                setattr(self.customers[cust_id], "score", score)
+                changed = True
+        if changed:  # 分数写回客户属于数据变化
+            self.generation += 1
         return pr
 
     def _calculate_degree_centrality(self) -> Dict[str, float]:
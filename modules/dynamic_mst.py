@@ -0,0 +1,358 @@
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from spanning_tree_algorithms import UnionFind, as_edge_arrays, sort_edge_indices, _as_numpy
+
+_NONE = -1
+
+
+class LinkCutTree:
+    """
+    Link-Cut 树（数组实现，迭代 splay，无递归）：维护一个森林，
+    link / cut / connected / path_max 均摊 O(log n)。
+    每个节点带一个权值，path_max 返回路径上权值最大的节点。
+    """
+
+    def __init__(self):
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.parent: List[int] = []
+        self.flip = bytearray()  # 懒标记：子树需要左右翻转
+        self.weight: List[float] = []
+        self.best: List[int] = []  # splay 子树中权值最大的节点
+
+    def add_node(self, weight: float = float('-inf')) -> int:
+        x = len(self.weight)
+        self.left.append(_NONE)
+        self.right.append(_NONE)
+        self.parent.append(_NONE)
+        self.flip.append(0)
+        self.weight.append(weight)
+        self.best.append(x)
+        return x
+
+    def reset_node(self, x: int, weight: float):
+        """复用已脱离森林的节点"""
+        self.left[x] = self.right[x] = self.parent[x] = _NONE
+        self.flip[x] = 0
+        self.weight[x] = weight
+        self.best[x] = x
+
+    def _is_root(self, x: int) -> bool:
+        p = self.parent[x]
+        return p == _NONE or (self.left[p] != x and self.right[p] != x)
+
+    def _pull(self, x: int):
+        weight, best = self.weight, self.best
+        m = x
+        for c in (self.left[x], self.right[x]):
+            if c != _NONE and weight[best[c]] > weight[m]:
+                m = best[c]
+        best[x] = m
+
+    def _push(self, x: int):
+        if self.flip[x]:
+            l, r = self.left[x], self.right[x]
+            self.left[x], self.right[x] = r, l
+            if l != _NONE:
+                self.flip[l] ^= 1
+            if r != _NONE:
+                self.flip[r] ^= 1
+            self.flip[x] = 0
+
+    def _rotate(self, x: int):
+        left, right, parent = self.left, self.right, self.parent
+        p = parent[x]
+        g = parent[p]
+        if not self._is_root(p):
+            if left[g] == p:
+                left[g] = x
+            else:
+                right[g] = x
+        parent[x] = g
+        if left[p] == x:
+            left[p] = right[x]
+            if right[x] != _NONE:
+                parent[right[x]] = p
+            right[x] = p
+        else:
+            right[p] = left[x]
+            if left[x] != _NONE:
+                parent[left[x]] = p
+            left[x] = p
+        parent[p] = x
+        self._pull(p)
+        self._pull(x)
+
+    def _splay(self, x: int):
+        # 先自顶向下下推懒标记
+        stack = [x]
+        y = x
+        while not self._is_root(y):
+            y = self.parent[y]
+            stack.append(y)
+        for y in reversed(stack):
+            self._push(y)
+        parent = self.parent
+        while not self._is_root(x):
+            p = parent[x]
+            if not self._is_root(p):
+                g = parent[p]
+                if (self.left[g] == p) == (self.left[p] == x):
+                    self._rotate(p)
+                else:
+                    self._rotate(x)
+            self._rotate(x)
+
+    def _access(self, x: int):
+        last = _NONE
+        y = x
+        while y != _NONE:
+            self._splay(y)
+            self.right[y] = last
+            self._pull(y)
+            last = y
+            y = self.parent[y]
+        self._splay(x)
+
+    def _make_root(self, x: int):
+        self._access(x)
+        self.flip[x] ^= 1
+
+    def find_root(self, x: int) -> int:
+        self._access(x)
+        while True:
+            self._push(x)
+            if self.left[x] == _NONE:
+                break
+            x = self.left[x]
+        self._splay(x)
+        return x
+
+    def connected(self, u: int, v: int) -> bool:
+        return u == v or self.find_root(u) == self.find_root(v)
+
+    def link(self, u: int, v: int):
+        """连接两棵不同的树（调用方保证 u、v 不连通）"""
+        self._make_root(u)
+        self.parent[u] = v
+
+    def cut(self, u: int, v: int):
+        """删除树边 (u, v)（调用方保证该边存在）"""
+        self._make_root(u)
+        self._access(v)
+        # 此时 u 是 v 在 splay 中的左孩子
+        self.left[v] = _NONE
+        self.parent[u] = _NONE
+        self._pull(v)
+
+    def path_max(self, u: int, v: int) -> int:
+        """u 到 v 路径上权值最大的节点（调用方保证连通）"""
+        self._make_root(u)
+        self._access(v)
+        return self.best[v]
+
+
+class DynamicMST:
+    """
+    动态最小生成森林：边用 Link-Cut 树中的边节点表示，节点权值即边权。
+    - 插入边：端点不连通则直接连上；否则查询环上最大边，新边更小时替换，O(log n)
+    - 删除非树边：O(1)
+    - 删除树边：断开后交替遍历两侧分量找出较小的一侧，在其关联的非树边中取跨越两侧的
+      最小边作为替换边（最小生成树的割性质）。代价与较小分量的规模和度数成正比，
+      删除叶子附近的边很快，但最坏 O(n + m)，并非严格的多项式对数界
+    边权相同的边按边编号打破平局。
+    """
+
+    def __init__(self, n: int = 0, edges=None, weights=None):
+        self.lct = LinkCutTree()
+        self.vertices: Set[int] = set()
+        self.edges: Dict[int, Tuple[int, int, float, str]] = {}  # 边编号 -> (u, v, w, color)
+        self.tree_edges: Set[int] = set()
+        self.non_tree: Set[int] = set()
+        self.incident: Dict[int, Set[int]] = {}  # 顶点 -> 关联边编号
+        self._edge_node: Dict[int, int] = {}  # 树边编号 -> LCT 节点
+        self._node_edge: Dict[int, int] = {}  # LCT 节点 -> 树边编号
+        self._free_nodes: List[int] = []
+        self._next_edge = 0
+        self._vertex_node: Dict[int, int] = {}
+        self.total_weight = 0.0
+        self.blue_count = 0
+        for v in range(n):
+            self.add_vertex(v)
+        if edges is not None:
+            self._build(edges, weights)
+
+    def _build(self, edges, weights):
+        """初始构建：Kruskal 一遍选出树边，再一次性链接进 Link-Cut 树"""
+        edges = as_edge_arrays(edges)
+        w = _as_numpy(weights)
+        if len(w) != len(edges):
+            raise ValueError("权重数量与边数量不一致")
+        for v in set(edges.u) | set(edges.v):
+            self.add_vertex(v)
+        union = UnionFind(max(self._vertex_node, default=-1) + 1).union
+        for i in sort_edge_indices(w):
+            u, v, weight = edges.u[i], edges.v[i], float(w[i])
+            eid = self._new_edge(u, v, weight, edges.color(i))
+            if u != v and union(u, v):
+                self._link_edge(eid)
+            else:
+                self.non_tree.add(eid)
+
+    def __len__(self):
+        return len(self.edges)
+
+    def add_vertex(self, v: int):
+        if v in self.vertices:
+            return
+        self.vertices.add(v)
+        self.incident[v] = set()
+        if v not in self._vertex_node:  # 删除过的顶点在 LCT 中已是孤立节点，直接复用
+            self._vertex_node[v] = self.lct.add_node()
+
+    def remove_vertex(self, v: int) -> List[Tuple[str, int, int, str]]:
+        """删除顶点及其全部关联边，返回生成树变化列表"""
+        if v not in self.vertices:
+            raise ValueError("顶点不存在")
+        changes = []
+        for eid in list(self.incident[v]):
+            changes.extend(self.delete_edge(eid))
+        self.vertices.discard(v)
+        del self.incident[v]
+        return changes
+
+    def _new_edge(self, u: int, v: int, weight: float, color: str) -> int:
+        eid = self._next_edge
+        self._next_edge += 1
+        self.edges[eid] = (u, v, weight, color)
+        self.incident[u].add(eid)
+        self.incident[v].add(eid)
+        return eid
+
+    def _link_edge(self, eid: int):
+        u, v, weight, color = self.edges[eid]
+        if self._free_nodes:
+            node = self._free_nodes.pop()
+            self.lct.reset_node(node, weight)
+        else:
+            node = self.lct.add_node(weight)
+        self._edge_node[eid] = node
+        self._node_edge[node] = eid
+        self.lct.link(self._vertex_node[u], node)
+        self.lct.link(node, self._vertex_node[v])
+        self.tree_edges.add(eid)
+        self.total_weight += weight
+        self.blue_count += color == 'blue'
+
+    def _cut_edge(self, eid: int):
+        u, v, weight, color = self.edges[eid]
+        node = self._edge_node.pop(eid)
+        del self._node_edge[node]
+        self.lct.cut(self._vertex_node[u], node)
+        self.lct.cut(node, self._vertex_node[v])
+        self._free_nodes.append(node)
+        self.tree_edges.discard(eid)
+        self.total_weight -= weight
+        self.blue_count -= color == 'blue'
+
+    def connected(self, u: int, v: int) -> bool:
+        return self.lct.connected(self._vertex_node[u], self._vertex_node[v])
+
+    def insert_edge(self, u: int, v: int, weight: float,
+                    color: str = 'red') -> Tuple[int, List[Tuple[str, int, int, str]]]:
+        """
+        插入边，返回 (边编号, 生成树变化列表)，变化为 ('add' | 'remove', u, v, color)
+        """
+        if u not in self.vertices or v not in self.vertices:
+            raise ValueError("顶点不存在")
+        eid = self._new_edge(u, v, float(weight), color)
+        if u == v:
+            self.non_tree.add(eid)
+            return eid, []
+        nu, nv = self._vertex_node[u], self._vertex_node[v]
+        if not self.lct.connected(nu, nv):
+            self._link_edge(eid)
+            return eid, [self._change('add', eid)]
+        old = self._node_edge[self.lct.path_max(nu, nv)]
+        if self.edges[old][2] > weight:
+            self._cut_edge(old)
+            self.non_tree.add(old)
+            self._link_edge(eid)
+            return eid, [self._change('remove', old), self._change('add', eid)]
+        self.non_tree.add(eid)
+        return eid, []
+
+    def _change(self, op: str, eid: int) -> Tuple[str, int, int, str]:
+        u, v, _, color = self.edges[eid]
+        return op, u, v, color
+
+    def delete_edge(self, eid: int) -> List[Tuple[str, int, int, str]]:
+        """删除边，返回生成树变化列表"""
+        if eid not in self.edges:
+            raise ValueError("边不存在")
+        u, v, weight, _ = self.edges[eid]
+        changes = []
+        if eid in self.tree_edges:
+            self._cut_edge(eid)
+            changes.append(self._change('remove', eid))
+            replacement = self._find_replacement(u, v)
+            if replacement is not None:
+                self.non_tree.discard(replacement)
+                self._link_edge(replacement)
+                changes.append(self._change('add', replacement))
+        else:
+            self.non_tree.discard(eid)
+        del self.edges[eid]
+        self.incident[u].discard(eid)
+        self.incident[v].discard(eid)
+        return changes
+
+    def _component_iter(self, root: int) -> Iterator[int]:
+        """沿树边遍历 root 所在的连通分量"""
+        seen = {root}
+        stack = [root]
+        while stack:
+            x = stack.pop()
+            yield x
+            for eid in self.incident[x]:
+                if eid in self.tree_edges:
+                    a, b, _, _ = self.edges[eid]
+                    y = b if a == x else a
+                    if y not in seen:
+                        seen.add(y)
+                        stack.append(y)
+
+    def _smaller_side(self, u: int, v: int) -> Set[int]:
+        """交替遍历断开后的两个分量，先遍历完的一侧即较小分量，代价与较小分量成正比"""
+        sides = [(self._component_iter(u), set()), (self._component_iter(v), set())]
+        while True:
+            for walker, visited in sides:
+                x = next(walker, None)
+                if x is None:
+                    return visited
+                visited.add(x)
+
+    def _find_replacement(self, u: int, v: int) -> Optional[int]:
+        side = self._smaller_side(u, v)
+        best = None
+        for x in side:
+            for eid in self.incident[x]:
+                if eid in self.non_tree:
+                    a, b, weight, _ = self.edges[eid]
+                    if (a in side) != (b in side) and (best is None or (weight, eid) < best):
+                        best = (weight, eid)
+        return best[1] if best else None
+
+    def find_edge(self, u: int, v: int) -> Optional[int]:
+        """端点为 (u, v)（不分方向）的任意一条边的编号"""
+        for eid in self.incident.get(u, ()):
+            a, b, _, _ = self.edges[eid]
+            if (a, b) == (u, v) or (a, b) == (v, u):
+                return eid
+        return None
+
+    def tree(self) -> Iterator[Tuple[int, int, str, float]]:
+        """当前生成森林的边 (u, v, color, w)"""
+        for eid in self.tree_edges:
+            u, v, weight, color = self.edges[eid]
+            yield u, v, color, weight
@@ -0,0 +1,120 @@
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from modules.ordered_map import OrderedMap, bulk_load, create_ordered_map, sorted_order
+
+
+class PopularityLeaderboard:
+    """
+    热度榜：全局榜 + 每个类别一个分类榜，均为有序索引，键为 (-popularity, -sales, id)，
+    即热度降序、销量降序、ID 升序。默认 avl 后端带子树大小，rank/select 为 O(log n)；
+    其他后端没有顺序统计能力，排名与翻页退化为顺序扫描。
+    """
+
+    def __init__(self, backend: str = "avl"):
+        self.backend = backend
+        self.board: OrderedMap = create_ordered_map(backend)
+        self.category_boards: Dict[str, OrderedMap] = {}
+        self._entries: Dict[str, Tuple[tuple, str]] = {}  # id -> (榜单键, 类别)
+
+    @classmethod
+    def from_products(cls, products, backend: str = "avl") -> "PopularityLeaderboard":
+        """批量建榜：全部榜单键只排序一次，按序分发到各分类榜后自底向上建树（商品ID须唯一）"""
+        leaderboard = cls(backend)
+        products = list(products)
+        order = sorted_order([-p.popularity for p in products], [-p.sales for p in products],
+                             [p.id for p in products])
+        ranked = []
+        by_category: Dict[str, list] = {}
+        entries = leaderboard._entries
+        for i in order:
+            p = products[i]
+            item = (cls.sort_key(p), p.id)
+            ranked.append(item)
+            entries[p.id] = (item[0], p.category)
+            bucket = by_category.get(p.category)
+            if bucket is None:
+                bucket = by_category[p.category] = []
+            bucket.append(item)
+        leaderboard.board = bulk_load(backend, ranked)
+        for category, items in by_category.items():
+            leaderboard.category_boards[category] = bulk_load(backend, items)
+        return leaderboard
+
+    def __len__(self):
+        return len(self.board)
+
+    def __contains__(self, product_id: str):
+        return product_id in self._entries
+
+    @staticmethod
+    def sort_key(product) -> tuple:
+        return (-product.popularity, -product.sales, product.id)
+
+    def add(self, product):
+        if product.id in self._entries:
+            self.remove(product.id)
+        key = self.sort_key(product)
+        self._entries[product.id] = (key, product.category)
+        self.board.insert(key, product.id)
+        self.category_board(product.category).insert(key, product.id)
+
+    def remove(self, product_id: str) -> bool:
+        entry = self._entries.pop(product_id, None)
+        if entry is None:
+            return False
+        key, category = entry
+        self.board.delete(key)
+        self.category_boards[category].delete(key)
+        return True
+
+    def update(self, product):
+        """popularity / sales / category 变化后调用，O(log n)"""
+        entry = self._entries.get(product.id)
+        if entry is not None and entry == (self.sort_key(product), product.category):
+            return
+        self.add(product)
+
+    def category_board(self, category: str) -> OrderedMap:
+        """类别的分类榜，不存在时创建（类别二级索引直接引用它）"""
+        if category not in self.category_boards:
+            self.category_boards[category] = create_ordered_map(self.backend)
+        return self.category_boards[category]
+
+    def _board(self, category: Optional[str]) -> Optional[OrderedMap]:
+        if category is None:
+            return self.board
+        return self.category_boards.get(category)
+
+    def iter_ids(self, category: Optional[str] = None, offset: int = 0) -> Iterator[str]:
+        """从第 offset 名开始按热度降序惰性产出商品ID"""
+        board = self._board(category)
+        if board is None:
+            return iter(())
+        if offset and hasattr(board, "iter_from_rank"):
+            items = board.iter_from_rank(offset)
+        else:
+            items = islice(board.items(), offset, None)
+        return (pid for _, pid in items)
+
+    def page(self, offset: int = 0, limit: int = 10, category: Optional[str] = None) -> List[str]:
+        return list(islice(self.iter_ids(category, offset), limit))
+
+    def top_k(self, k: int, category: Optional[str] = None) -> List[str]:
+        return self.page(0, k, category)
+
+    def rank(self, product_id: str, category: Optional[str] = None) -> Optional[int]:
+        """商品在全局榜（或指定类别榜）中的名次，从 1 开始；不在榜中返回 None"""
+        entry = self._entries.get(product_id)
+        if entry is None:
+            return None
+        key, product_category = entry
+        if category is not None and category != product_category:
+            return None
+        board = self._board(category)
+        if hasattr(board, "rank"):
+            return board.rank(key) + 1
+        for i, (k, _) in enumerate(board.items(), 1):
+            if k == key:
+                return i
+        return None
@@ -1,53 +1,136 @@
 import bisect
+import heapq
+
+_TOMBSTONE = object()  # 删除标记，合并到最老的 SSTable 时才真正丢弃
+_MISSING = object()
+
 
 class LSMTree:
-    def __init__(self, memtable_limit=5):
-        self.memtable = []  # [(key, value)]，有序
-        self.sstables = []  # 每个sstable是有序的[(key, value)]列表
+    def __init__(self, memtable_limit=1024):
+        self.memtable = {}  # key -> value，刷盘时再排序
+        self.sstables = []  # 新 -> 旧，每个 sstable 是有序的 (keys, values) 两个并行列表
         self.memtable_limit = memtable_limit
+        self._mem_sorted = None  # memtable 有序键缓存，写入时失效
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def from_sorted(cls, items, memtable_limit=1024):
+        """由按键严格升序的 (key, value) 序列直接生成一个 SSTable，跳过 memtable 与逐级合并"""
+        tree = cls(memtable_limit)
+        keys, values = [], []
+        for key, value in items:
+            keys.append(key)
+            values.append(value)
+        if keys:
+            tree.sstables.append((keys, values))
+        tree._size = len(keys)
+        return tree
 
     def insert(self, key, value):
-        # 插入到memtable，保持有序
-        idx = bisect.bisect_left([k for k, _ in self.memtable], key)
-        if idx < len(self.memtable) and self.memtable[idx][0] == key:
-            self.memtable[idx] = (key, value)
-        else:
-            self.memtable.insert(idx, (key, value))
+        if self._lookup(key) is _MISSING:
+            self._size += 1
+        self.memtable[key] = value
+        self._mem_sorted = None
         # 刷盘
         if len(self.memtable) >= self.memtable_limit:
             self.flush_memtable()
 
+    def delete(self, key):
+        """写入删除标记，返回 key 删除前是否存在"""
+        if self._lookup(key) is _MISSING:
+            return False
+        self._size -= 1
+        self.memtable[key] = _TOMBSTONE
+        self._mem_sorted = None
+        if len(self.memtable) >= self.memtable_limit:
+            self.flush_memtable()
+        return True
+
     def flush_memtable(self):
-        # 刷到SSTable（合并到最前面）
+        # 刷到SSTable（放在最前面），再做分层合并
         if self.memtable:
-            self.sstables.insert(0, self.memtable)
-            self.memtable = []
+            keys = sorted(self.memtable)
+            values = [self.memtable[k] for k in keys]
+            self.sstables.insert(0, (keys, values))
+            self.memtable = {}
+            self._mem_sorted = None
+            self._compact()
 
-    def search(self, key):
+    def _compact(self):
+        # 类似二进制计数器：新表不小于次新表时两两合并，SSTable 数量保持 O(log n)
+        while len(self.sstables) > 1 and len(self.sstables[0][0]) >= len(self.sstables[1][0]):
+            newer = self.sstables.pop(0)
+            older = self.sstables.pop(0)
+            drop_tombstones = not self.sstables
+            self.sstables.insert(0, self._merge(newer, older, drop_tombstones))
+
+    @staticmethod
+    def _merge(newer, older, drop_tombstones):
+        keys, values = [], []
+        (nk, nv), (ok, ov) = newer, older
+        i = j = 0
+        while i < len(nk) or j < len(ok):
+            if j >= len(ok) or (i < len(nk) and nk[i] <= ok[j]):
+                key, value = nk[i], nv[i]
+                if j < len(ok) and ok[j] == key:
+                    j += 1  # 新值覆盖旧值
+                i += 1
+            else:
+                key, value = ok[j], ov[j]
+                j += 1
+            if drop_tombstones and value is _TOMBSTONE:
+                continue
+            keys.append(key)
+            values.append(value)
+        return keys, values
+
+    def _lookup(self, key):
         # 先查memtable
-        idx = bisect.bisect_left([k for k, _ in self.memtable], key)
-        if idx < len(self.memtable) and self.memtable[idx][0] == key:
-            return self.memtable[idx][1]
-        # 再查每个sstable
-        for sstable in self.sstables:
-            idx = bisect.bisect_left([k for k, _ in sstable], key)
-            if idx < len(sstable) and sstable[idx][0] == key:
-                return sstable[idx][1]
-        return None
+        value = self.memtable.get(key, _MISSING)
+        if value is not _MISSING:
+            return _MISSING if value is _TOMBSTONE else value
+        # 再由新到旧查每个sstable
+        for keys, values in self.sstables:
+            idx = bisect.bisect_left(keys, key)
+            if idx < len(keys) and keys[idx] == key:
+                value = values[idx]
+                return _MISSING if value is _TOMBSTONE else value
+        return _MISSING
+
+    def search(self, key):
+        value = self._lookup(key)
+        return None if value is _MISSING else value
+
+    def iter_range(self, low=None, high=None):
+        """多路归并 memtable 与各 SSTable，按键升序惰性产出 (key, value)，新数据覆盖旧数据"""
+        def scan(keys, values, age):
+            i = 0 if low is None else bisect.bisect_left(keys, low)
+            while i < len(keys):
+                if high is not None and keys[i] > high:
+                    return
+                yield keys[i], age, values[i]
+                i += 1
+
+        if self._mem_sorted is None:
+            keys = sorted(self.memtable)
+            self._mem_sorted = (keys, [self.memtable[k] for k in keys])
+        runs = [scan(*self._mem_sorted, 0)]
+        runs.extend(scan(keys, values, age) for age, (keys, values) in enumerate(self.sstables, 1))
+        last = _MISSING
+        # 相同 key 按 age 升序出现，第一个即最新版本
+        for key, _, value in heapq.merge(*runs, key=lambda item: (item[0], item[1])):
+            if last is not _MISSING and key == last:
+                continue
+            last = key
+            if value is not _TOMBSTONE:
+                yield key, value
+
+    def items(self):
+        return self.iter_range()
 
     def range_query(self, low, high):
         # 合并memtable和所有sstable的区间结果
-        result = []
-        def collect(table):
-            for k, v in table:
-                if low <= k <= high:
-                    result.append((k, v))
-        collect(self.memtable)
-        for sstable in self.sstables:
-            collect(sstable)
-        # 按key排序去重（最新的覆盖旧的）
-        result.sort()
-        dedup = {}
-        for k, v in result:
-            dedup[k] = v
-        return [(k, dedup[k]) for k in sorted(dedup) if low <= k <= high]
+        return [value for _, value in self.iter_range(low, high)]
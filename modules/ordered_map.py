@@ -0,0 +1,103 @@
+import gc
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.avl_tree import AVLTree
+from modules.bplustree import BPlusTree, BTree
+from modules.lsmtree import LSMTree
+
+
+class OrderedMap(ABC):
+    """有序映射的公共接口：modules 下的 AVLTree / BPlusTree / BTree / LSMTree 都实现了它"""
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def insert(self, key, value) -> None:
+        """插入，键已存在时覆盖"""
+
+    @abstractmethod
+    def search(self, key) -> Optional[Any]:
+        """点查，不存在返回 None"""
+
+    @abstractmethod
+    def delete(self, key) -> bool:
+        """删除，返回键删除前是否存在"""
+
+    @abstractmethod
+    def iter_range(self, low=None, high=None) -> Iterator[Tuple[Any, Any]]:
+        """按键升序惰性产出 [low, high] 内的 (key, value)，None 表示不设界"""
+
+    def range_query(self, low, high) -> list:
+        return [value for _, value in self.iter_range(low, high)]
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return self.iter_range()
+
+
+for _cls in (AVLTree, BPlusTree, BTree, LSMTree):
+    OrderedMap.register(_cls)
+
+# 后端名 -> 构造函数
+BACKENDS = {
+    "avl": AVLTree,
+    "bplustree": BPlusTree,
+    "btree": BTree,
+    "lsm": LSMTree,
+}
+
+
+def create_ordered_map(backend: str = "avl", **kwargs) -> OrderedMap:
+    """按名称创建有序映射后端，kwargs 透传给构造函数（如 t、memtable_limit）"""
+    if backend not in BACKENDS:
+        raise ValueError(f"不支持的有序索引后端: {backend}，可选: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](**kwargs)
+
+
+@contextmanager
+def paused_gc():
+    """
+    批量构建期间暂停循环垃圾回收：一次新建上百万个元组和树节点时，
+    分代 GC 会被反复触发并扫描整个堆，占去近一半构建时间；结束后恢复原状态
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def sorted_order(*columns: Sequence) -> List[int]:
+    """
+    多列字典序排序后的行下标（第一列为主键），与按元组 (col0[i], col1[i], ...) 排序的结果一致。
+    用 NumPy lexsort 代替百万个 Python 元组之间的逐个比较；字符串列先转成排名再参与排序。
+    """
+    keys = []
+    for column in reversed(columns):
+        array = np.asarray(column)
+        if array.dtype.kind in "UO":
+            _, array = np.unique(array, return_inverse=True)
+        keys.append(array)
+    return np.lexsort(keys).tolist()
+
+
+def bulk_load(backend: str, items, **kwargs) -> OrderedMap:
+    """
+    由按键严格升序的 (key, value) 序列批量构建有序映射。
+    后端提供 from_sorted 时直接自底向上建树，否则（如 btree）退化为逐个插入。
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"不支持的有序索引后端: {backend}，可选: {', '.join(BACKENDS)}")
+    cls = BACKENDS[backend]
+    if hasattr(cls, "from_sorted"):
+        return cls.from_sorted(items, **kwargs)
+    tree = cls(**kwargs)
+    for key, value in items:
+        tree.insert(key, value)
+    return tree
@@ -0,0 +1,301 @@
+import math
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from spanning_tree_algorithms import EdgeArrays
+
+
+def _to_edge_arrays(u, v, blue):
+    return EdgeArrays(array('i', u.astype(np.int32).tobytes()),
+                      array('i', v.astype(np.int32).tobytes()),
+                      bytearray(blue.astype(np.uint8).tobytes()))
+
+
+def build_product_edges(category_codes, max_edges_per_node=3, red_prob=0.5, blue_prob=0.1,
+                        seed=None, block_size=8192) -> EdgeArrays:
+    """
+    向量化生成商品关系边：同类别为红边（强相关），不同类别为蓝边，
+    每个商品最多 max_edges_per_node 条出边。
+    - 商品数不超过候选数时，对每个商品按顺序扫描其余所有商品（与逐对抛硬币的原实现一致）
+    - 商品数更多时，每个商品随机抽取固定数量的候选，避免 O(n^2) 的两两比较
+    每批 block_size 个商品一起用 NumPy 计算类别相等掩码、批量抽样和按行截断。
+    """
+    codes = np.asarray(category_codes)
+    n = len(codes)
+    if n < 2:
+        return EdgeArrays()
+    rng = np.random.default_rng(seed)
+    # 期望约 max_edges / p 次尝试才能凑满边数，取两倍余量
+    candidates = int(math.ceil(2 * max_edges_per_node / min(red_prob, blue_prob)))
+    full_scan = n - 1 <= candidates
+    width = n - 1 if full_scan else candidates
+    us, vs, blues = [], [], []
+    for start in range(0, n, block_size):
+        rows = np.arange(start, min(start + block_size, n))
+        if full_scan:
+            cols = np.broadcast_to(np.arange(n - 1), (len(rows), width))
+            targets = cols + (cols >= rows[:, None])  # 跳过自身
+        else:
+            targets = (rows[:, None] + rng.integers(1, n, size=(len(rows), width))) % n
+        same = codes[rows][:, None] == codes[targets]
+        hit = rng.random((len(rows), width)) < np.where(same, red_prob, blue_prob)
+        # 每行只保留前 max_edges_per_node 次命中
+        hit &= np.cumsum(hit, axis=1) <= max_edges_per_node
+        r, c = np.nonzero(hit)
+        us.append(rows[r])
+        vs.append(targets[r, c])
+        blues.append(~same[r, c])
+    return _to_edge_arrays(np.concatenate(us), np.concatenate(vs), np.concatenate(blues))
+
+
+def build_similarity_edges(products: List[dict], k: int = 5, n_trees: int = 8, seed=None):
+    """
+    近邻相似图：在商品特征向量上用随机投影森林求近似 k 近邻（见 modules.ann_index），
+    每对近邻连一条边（无向去重），边权为特征距离；同类别为红边，不同类别为蓝边。
+    返回 (EdgeArrays, 边权数组)。
+    """
+    from modules.ann_index import RandomProjectionForest, product_feature_matrix
+    n = len(products)
+    if n < 2:
+        return EdgeArrays(), np.empty(0)
+    forest = RandomProjectionForest(n_trees, seed=seed).fit(product_feature_matrix(products))
+    neighbors, distances = forest.knn_graph(min(k, n - 1))
+    rows = np.repeat(np.arange(n), neighbors.shape[1])
+    cols = neighbors.ravel()
+    weights = distances.ravel().astype(np.float64)
+    keep = cols >= 0
+    u = np.minimum(rows[keep], cols[keep])
+    v = np.maximum(rows[keep], cols[keep])
+    _, first = np.unique(u * n + v, return_index=True)
+    u, v, weights = u[first], v[first], weights[keep][first]
+    _, category = np.unique([p['category'] for p in products], return_inverse=True)
+    edges = _to_edge_arrays(u, v, category[u] != category[v])
+    return edges, np.round(weights, 6)
+
+
+class ProductGraph:
+    """
+    一次生成的商品关系图：商品数据 + 紧凑边数组，以及按需计算并缓存的边权。
+    distances 给定时（如近邻相似图）直接作为边权。
+    """
+
+    def __init__(self, products: List[dict], edges: EdgeArrays, distances: Optional[np.ndarray] = None):
+        self.products = products
+        self.edges = edges
+        self._distances = distances
+        # 图经 ProductGraphStore 在请求之间共享，边权在存储锁之外按需计算，只让一个请求去算
+        self._distances_lock = threading.Lock()
+
+    @property
+    def n(self):
+        return len(self.products)
+
+    def edge_distances(self) -> np.ndarray:
+        """各边的商品差异度（与 DataGenerator.product_distance 同一公式的向量化版本）"""
+        if self._distances is not None:
+            return self._distances
+        with self._distances_lock:
+            if self._distances is not None:
+                return self._distances
+
+            def column(name):
+                return np.array([p[name] for p in self.products])
+            u = np.frombuffer(self.edges.u, dtype=np.int32)
+            v = np.frombuffer(self.edges.v, dtype=np.int32)
+            log_price = np.log1p(column('price').astype(np.float64))
+            log_pop = np.log1p(column('popularity').astype(np.float64))
+            rating = column('rating').astype(np.float64)
+            _, brand = np.unique(column('brand'), return_inverse=True)
+            _, category = np.unique(column('category'), return_inverse=True)
+            distances = (np.abs(log_price[u] - log_price[v]) / math.log1p(2000)
+                         + (category[u] != category[v])
+                         + 0.5 * (brand[u] != brand[v])
+                         + np.abs(rating[u] - rating[v]) / 2.0
+                         + np.abs(log_pop[u] - log_pop[v]) / 10.0)
+            self._distances = np.round(distances, 6)
+            return self._distances
+
+
+class DynamicProductTree:
+    """
+    可增量更新的推荐生成树：以缓存的商品关系图为初始状态，用 DynamicMST 维护生成森林，
+    增删商品或关系边时只做局部调整，不再整体重跑 Kruskal。
+    mode 与 /api/recommend_tree 一致：'min'（红边权 0、蓝边权 1）、'max'（相反）、
+    'weighted'（商品差异度）；近邻相似图的边权依赖整体特征归一化，不支持增量。
+    """
+
+    MODES = ('min', 'max', 'weighted')
+
+    def __init__(self, graph: ProductGraph, mode: str = 'min', seed: Optional[int] = None,
+                 max_edges_per_node: int = 3):
+        from modules.dynamic_mst import DynamicMST
+        if mode not in self.MODES:
+            raise ValueError(f"增量模式不支持 {mode}")
+        self.mode = mode
+        self.max_edges_per_node = max_edges_per_node
+        self.products: List[dict] = list(graph.products)
+        self.removed = set()
+        self.rng = random.Random(seed)
+        if mode == 'weighted':
+            weights = graph.edge_distances()
+        else:
+            blue = np.frombuffer(graph.edges.blue, dtype=np.uint8)
+            weights = blue if mode == 'min' else 1 - blue
+        self.mst = DynamicMST(graph.n, graph.edges, weights)
+
+    def _weight(self, u: int, v: int, color: str) -> float:
+        if self.mode == 'weighted':
+            from data_generator import DataGenerator
+            return DataGenerator.product_distance(self.products[u], self.products[v])
+        return float((color == 'blue') == (self.mode == 'min'))
+
+    def _check(self, node: int):
+        if not isinstance(node, int) or node < 0 or node >= len(self.products) or node in self.removed:
+            raise ValueError(f"商品节点 {node} 不存在")
+
+    def add_edge(self, u: int, v: int) -> list:
+        """新增关系边，颜色按类别决定（同类红边，异类蓝边）"""
+        self._check(u)
+        self._check(v)
+        same = self.products[u]['category'] == self.products[v]['category']
+        color = 'red' if same else 'blue'
+        return self.mst.insert_edge(u, v, self._weight(u, v, color), color)[1]
+
+    def remove_edge(self, u: int, v: int) -> list:
+        eid = self.mst.find_edge(u, v)
+        if eid is None:
+            raise ValueError(f"边 {u}-{v} 不存在")
+        return self.mst.delete_edge(eid)
+
+    def add_product(self, product: dict) -> list:
+        """新增商品，并与随机若干个现有商品建立关系边"""
+        node = len(self.products)
+        alive = [i for i in range(node) if i not in self.removed] if self.removed else range(node)
+        self.products.append(product)
+        self.mst.add_vertex(node)
+        changes = []
+        for other in self.rng.sample(alive, min(self.max_edges_per_node, len(alive))):
+            changes.extend(self.add_edge(node, other))
+        return changes
+
+    def remove_product(self, node: int) -> list:
+        self._check(node)
+        self.removed.add(node)
+        return self.mst.remove_vertex(node)
+
+    def apply(self, delta: Dict) -> list:
+        """
+        依次应用一组变更：remove_edges、remove_products、add_products（新商品数量）、add_edges，
+        边写作 {"from": u, "to": v}；返回全部生成树变化 (op, u, v, color)
+        """
+        changes = []
+        for edge in delta.get('remove_edges', []):
+            changes.extend(self.remove_edge(edge['from'], edge['to']))
+        for node in delta.get('remove_products', []):
+            changes.extend(self.remove_product(node))
+        count = int(delta.get('add_products', 0))
+        if count > 0:
+            from data_generator import DataGenerator
+            for product in DataGenerator(self.rng.getrandbits(32)).generate_products(count):
+                changes.extend(self.add_product(product))
+        for edge in delta.get('add_edges', []):
+            changes.extend(self.add_edge(edge['from'], edge['to']))
+        return changes
+
+    def to_result(self, changes: Optional[list] = None) -> Dict:
+        """与 generate_product_edges_and_mst 相同的前端格式，另附本次变化"""
+        from data_generator import DataGenerator
+        tree = [(u, v, color) for u, v, color, _ in self.mst.tree()]
+        result = {
+            "nodes": [DataGenerator.tree_node(i, p) for i, p in enumerate(self.products) if i not in self.removed],
+            "edges": DataGenerator.tree_edges(tree),
+            "blue_count": self.mst.blue_count,
+        }
+        if self.mode == 'weighted':
+            result["total_weight"] = round(self.mst.total_weight, 4)
+        if changes is not None:
+            result["added"] = DataGenerator.tree_edges([c[1:] for c in changes if c[0] == 'add'])
+            result["removed"] = DataGenerator.tree_edges([c[1:] for c in changes if c[0] == 'remove'])
+        return result
+
+
+class ProductGraphStore:
+    """
+    商品关系图缓存，按 (n, seed, max_edges_per_node, similarity) 作键，LRU 淘汰。
+    同样参数的重复请求直接复用图，只重新运行生成树阶段。
+    get 自行加锁，且只在查找与写入缓存时持锁：建图在锁外进行，同一个键同时只建一次，
+    其他键的请求（包括缓存命中）不必等待。
+    """
+
+    MAX_N = 100_000  # 单个图的商品数上限，约 2 秒建图
+
+    def __init__(self, capacity: int = 8):
+        self.capacity = capacity
+        self._graphs: "OrderedDict[tuple, ProductGraph]" = OrderedDict()
+        self._building: Dict[tuple, Future] = {}  # 正在建图的键，同键的请求等待同一个结果
+        self._graphs_lock = threading.Lock()
+        self._trees: "OrderedDict[tuple, DynamicProductTree]" = OrderedDict()
+        self.lock = threading.Lock()  # 增量会话会被请求修改，调用方持锁访问 dynamic 及返回的会话
+
+    def __len__(self):
+        return len(self._graphs)
+
+    def get(self, n: int, seed: Optional[int] = 0, max_edges_per_node: int = 3,
+            similarity: bool = False) -> ProductGraph:
+        if isinstance(n, bool) or not isinstance(n, int) or not 1 <= n <= self.MAX_N:
+            raise ValueError(f"商品数 n 必须为 1 到 {self.MAX_N} 之间的整数")
+        key = (n, seed, max_edges_per_node, similarity)
+        with self._graphs_lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self._graphs.move_to_end(key)
+                return graph
+            future = self._building.get(key)
+            owner = future is None
+            if owner:
+                future = self._building[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            from data_generator import DataGenerator
+            graph = DataGenerator(seed).build_product_graph(n, max_edges_per_node, similarity)
+        except BaseException as e:
+            with self._graphs_lock:
+                self._building.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._graphs_lock:
+            self._graphs[key] = graph
+            if len(self._graphs) > self.capacity:
+                self._graphs.popitem(last=False)
+            self._building.pop(key, None)
+        future.set_result(graph)
+        return graph
+
+    def dynamic(self, n: int, seed: Optional[int] = 0, mode: str = 'min', max_edges_per_node: int = 3,
+                reset: bool = False) -> DynamicProductTree:
+        """
+        按 (n, seed, max_edges_per_node, mode) 取可增量更新的生成树会话，首次从缓存的图构建；
+        会话在后续变更之间保持状态，reset 为 True 时丢弃旧状态重新开始
+        """
+        key = (n, seed, max_edges_per_node, mode)
+        tree = None if reset else self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+            return tree
+        tree = DynamicProductTree(self.get(n, seed, max_edges_per_node), mode, seed, max_edges_per_node)
+        self._trees[key] = tree
+        if len(self._trees) > self.capacity:
+            self._trees.popitem(last=False)
+        return tree
+
+    def clear(self):
+        with self._graphs_lock:
+            self._graphs.clear()
+        self._trees.clear()
@@ -1,16 +1,82 @@
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from models import Product
 import heapq
-from collections import defaultdict
+import threading
+from itertools import islice
+from modules.ordered_map import OrderedMap, bulk_load, create_ordered_map, paused_gc, sorted_order
+from modules.leaderboard import PopularityLeaderboard
+from modules.category_index import CategoryIndex
+from modules.catalog_analytics import CatalogAnalytics
+from modules.product_store import ColumnarProductStore
+from modules.rwlock import RWLock
+
+# 复合键 (price, id) 中 id 的上下界，用于把价格区间转换成键区间
+_MIN_ID = ""
+_MAX_ID = "\U0010ffff"
 
 class ProductIndex:
-    def __init__(self):
-        self.products: Dict[str, Product] = {}  # id -> product
+    def __init__(self, price_backend: str = "avl", popularity_backend: str = "avl", columnar: bool = False):
+        """
+        price_backend / popularity_backend: 价格、热度有序索引的后端，
+        可选 avl、bplustree、btree、lsm（见 modules.ordered_map）
+        columnar: 商品本体存进 ColumnarProductStore（数值列 + 字符串去重），
+        以视图对象读写，内存占用远小于逐个 Product 对象
+        """
+        self.products: Dict[str, Product] = ColumnarProductStore() if columnar else {}  # id -> product
         self.name_index: Dict[str, str] = {}  # name -> id
-        self.category_index: Dict[str, List[str]] = defaultdict(list)  # category -> [product_ids]
-        self.price_index: List[tuple] = []  # (price, id) 用于价格区间查询
-        self.popularity_index: List[tuple] = []  # (popularity, id) 用于热度排序
+        self.price_backend = price_backend
+        self.category_index: Dict[str, CategoryIndex] = {}  # category -> 类别二级索引（成员 + 价格 + 热度）
+        self.price_index: OrderedMap = create_ordered_map(price_backend)  # (price, id) -> id 用于价格区间查询
+        self.popularity_index = PopularityLeaderboard(popularity_backend)  # 热度榜（全局 + 分类），用于热度排序与排名
         self.trie = {}  # 前缀树，用于商品名称搜索
+        self.analytics = CatalogAnalytics()  # 目录统计列与分类累计量，随增删改增量维护
+        self._similar_index = None  # 相似商品近邻索引，首次查询时构建，之后随商品变动增量维护
+        self._similar_lock = threading.Lock()  # 读锁下可能有多个查询同时触发构建，只让一个去建
+        self.generation = 0  # 每次修改递增，响应缓存以它判断数据是否变化
+        self.lock = RWLock()  # 多线程服务时的读写锁，由调用方（如 app 的视图装饰器）持有
+
+    @classmethod
+    def from_records(cls, records: Iterable, price_backend: str = "avl",
+                     popularity_backend: str = "avl", columnar: bool = False) -> "ProductIndex":
+        """
+        批量构建索引，records 为 Product 或商品字典。与逐条 insert 得到的索引等价，但：
+        - 价格键与热度榜键各只排序一次（NumPy 多列排序），有序索引自底向上批量建树（见 ordered_map.bulk_load）
+        - 前缀树按名称去重后一遍构建，每个名称只下行一次
+        商品ID重复时抛出 ValueError。
+        """
+        with paused_gc():
+            index = cls(price_backend, popularity_backend)
+            products, name_index = index.products, index.name_index
+            # 先用普通字典收集并建索引，列式存储最后整列一次写入
+            for record in records:
+                product = record if isinstance(record, Product) else Product(**record)
+                if product.id in products:
+                    raise ValueError(f"商品ID {product.id} 已存在")
+                products[product.id] = product
+                name_index[product.name] = product.id
+            items = list(products.values())
+            price_items = [((items[i].price, items[i].id), items[i].id)
+                           for i in sorted_order([p.price for p in items], [p.id for p in items])]
+            index.price_index = bulk_load(price_backend, price_items)
+            index.popularity_index = PopularityLeaderboard.from_products(items, popularity_backend)
+            # 类别二级索引：成员保持插入顺序，价格键从全局有序序列中按类别顺序分发
+            members: Dict[str, list] = {}
+            for p in items:
+                bucket = members.get(p.category)
+                if bucket is None:
+                    bucket = members[p.category] = []
+                bucket.append(p.id)
+            by_price: Dict[str, list] = {category: [] for category in members}
+            for item in price_items:
+                by_price[products[item[1]].category].append(item)
+            for category, ids in members.items():
+                index.category_index[category] = CategoryIndex.from_sorted(
+                    price_backend, index.popularity_index.category_board(category), ids, by_price[category])
+            index._build_trie(items)
+            index.analytics = CatalogAnalytics.from_products(items)
+            if columnar:
+                index.products = ColumnarProductStore(items)
+        return index
 
     def insert(self, product: Product):
         """插入商品"""
@@ -18,40 +84,48 @@ class ProductIndex:
             raise ValueError(f"商品ID {product.id} 已存在")
         self.products[product.id] = product
         self.name_index[product.name] = product.id
-        self.category_index[product.category].append(product.id)
-        heapq.heappush(self.price_index, (product.price, product.id))
-        heapq.heappush(self.popularity_index, (-product.popularity, product.id))  # 大顶堆
+        self.price_index.insert((product.price, product.id), product.id)
+        self.popularity_index.add(product)
+        self._category(product.category).add(product)
         self._insert_to_trie(product.name, product)
+        self.analytics.add(product)
+        self._sync_similar(product)
+        self.generation += 1
 
-    def delete(self, product_id: str):
-        """删除商品"""
+    def delete(self, product_id: str) -> Product:
+        """删除商品，返回被删除的商品"""
         if product_id not in self.products:
             raise ValueError("商品不存在")
         product = self.products[product_id]
-        self.category_index[product.category].remove(product_id)
+        self.category_index[product.category].remove(product)
         self.name_index.pop(product.name, None)
-        self.products.pop(product_id)
-        # 重新构建索引（简单实现，数据量大时建议用更高效的方式）
-        self.price_index = [(p, i) for (p, i) in self.price_index if i != product_id]
-        heapq.heapify(self.price_index)
-        self.popularity_index = [(-self.products[i].popularity, i) for i in self.products]
-        heapq.heapify(self.popularity_index)
-        
+        self.price_index.delete((product.price, product_id))
+        self.popularity_index.remove(product_id)
+        self.analytics.remove(product_id)
+        self._update_trie(product.name, product_id)
+        self._sync_similar(removed_id=product_id)
+        self.generation += 1
+        return self.products.pop(product_id)
 
     def update(self, product_id: str, **kwargs):
         """修改商品信息"""
         if product_id not in self.products:
             raise ValueError("商品不存在")
-        product = self.products[product_id]
+        # 先按旧值从各索引中移除，修改后再重新插入（列式存储下 delete 返回独立的 Product）
+        product = self.delete(product_id)
         for k, v in kwargs.items():
             if hasattr(product, k):
                 setattr(product, k, v)
-        # 重新构建相关索引
-        self.delete(product_id)
         self.insert(product)
 
+    def _category(self, category: str) -> CategoryIndex:
+        if category not in self.category_index:
+            self.category_index[category] = CategoryIndex(
+                self.price_backend, self.popularity_index.category_board(category))
+        return self.category_index[category]
+
     def _insert_to_trie(self, name: str, product: Product):
-        """将商品名称插入前缀树"""
+        """将商品名称插入前缀树，名称终点节点的 ids 记录以它为全名的商品"""
         node = self.trie
         for char in name.lower():
             if char not in node:
@@ -63,20 +137,116 @@ class ProductIndex:
                 heapq.heappush(products, (product.popularity, product.id))
             elif product.popularity > products[0][0]:
                 heapq.heapreplace(products, (product.popularity, product.id))
+        if node is not self.trie:
+            node.setdefault("ids", []).append(product.id)
+
+    def _build_trie(self, products: List[Product]):
+        """
+        一遍构建前缀树：同名商品先合并，只保留各名称热度最高的 10 个候选
+        （更低的不可能进入该名称路径上任何节点的 Top-10），每个不同名称只下行一次
+        """
+        groups: Dict[str, list] = {}
+        for product in products:
+            name = product.name.lower()
+            group = groups.get(name)
+            if group is None:
+                group = groups[name] = []
+            group.append((product.popularity, product.id))
+        heappush, heapreplace = heapq.heappush, heapq.heapreplace
+        for name, group in groups.items():
+            ids = [pid for _, pid in group]
+            if len(group) > 10:
+                group = heapq.nlargest(10, group, key=lambda item: item[0])
+            node = self.trie
+            for char in name:
+                child = node.get(char)
+                if child is None:
+                    child = node[char] = {"products": []}
+                node = child
+                heap = child["products"]
+                for item in group:
+                    if len(heap) < 10:
+                        heappush(heap, item)
+                    elif item[0] > heap[0][0]:
+                        heapreplace(heap, item)
+            if node is not self.trie:
+                node["ids"] = ids
+
+    def _update_trie(self, name: str, product_id: str, popularity: Optional[int] = None):
+        """
+        商品热度变为 popularity（为 None 表示商品被删除）后，自底向上修正名称路径上各节点的 Top-10：
+        - 不在节点堆中的商品，只有热度上升才可能挤进去
+        - 在堆中且热度上升，或堆未满（堆里就是子树的全部商品），原地改值
+        - 在已满的堆中且热度下降或被删除，原本排第 11 的商品可能补上来，
+          由该节点的终点商品与各子节点的 Top-10 重新算出
+        """
+        path = []
+        node = self.trie
+        for char in name.lower():
+            node = node.get(char)
+            if node is None:
+                return
+            path.append(node)
+        if not path:
+            return
+        if popularity is None and product_id in path[-1].get("ids", ()):
+            path[-1]["ids"].remove(product_id)
+        for node in reversed(path):
+            heap = node["products"]
+            entry = next((item for item in heap if item[1] == product_id), None)
+            if entry is None:
+                if popularity is not None:
+                    if len(heap) < 10:
+                        heapq.heappush(heap, (popularity, product_id))
+                    elif popularity > heap[0][0]:
+                        heapq.heapreplace(heap, (popularity, product_id))
+                continue
+            heap.remove(entry)
+            if popularity is not None and (popularity >= entry[0] or len(heap) < 9):
+                heap.append((popularity, product_id))
+            elif len(heap) == 9:
+                candidates = [(self.products[pid].popularity, pid) for pid in node.get("ids", ())]
+                for key, child in node.items():
+                    if key not in ("products", "ids"):
+                        candidates.extend(child["products"])
+                heap[:] = heapq.nlargest(10, candidates)
+            heapq.heapify(heap)
 
     def search_by_price_range(self, min_price: float, max_price: float) -> List[Product]:
         """按价格区间搜索商品"""
-        result = []
-        for price, pid in self.price_index:
-            if min_price <= price <= max_price:
-                result.append(self.products[pid])
+        result = [self.products[pid] for _, pid in
+                  self.price_index.iter_range((min_price, _MIN_ID), (max_price, _MAX_ID))]
         return sorted(result, key=lambda x: x.popularity, reverse=True)
 
-    def search_by_category(self, category: str) -> List[Product]:
-        """按类别搜索商品"""
-        if category not in self.category_index:
+    def search_by_category(self, category: str, sort_by: Optional[str] = None,
+                           min_price: Optional[float] = None, max_price: Optional[float] = None,
+                           offset: int = 0, limit: Optional[int] = None) -> List[Product]:
+        """
+        按类别搜索商品，全部由该类别的二级索引完成，不做集合求交
+        sort_by: None（插入顺序）、"price"（价格升序）、"popularity"（热度降序）
+        min_price / max_price: 可选的类别内价格区间
+        """
+        bucket = self.category_index.get(category)
+        if bucket is None:
             return []
-        return [self.products[pid] for pid in self.category_index[category]]
+        stop = offset + limit if limit is not None else None
+        has_price = min_price is not None or max_price is not None
+        low = (min_price, _MIN_ID) if min_price is not None else None
+        high = (max_price, _MAX_ID) if max_price is not None else None
+        if sort_by == "popularity":
+            if has_price:
+                # 类别 + 价格区间的候选集再按热度榜键排序
+                products = [self.products[pid] for _, pid in bucket.by_price.iter_range(low, high)]
+                products.sort(key=PopularityLeaderboard.sort_key)
+                return products[offset:stop]
+            # 热度榜支持按名次直接定位，offset 不需要逐个跳过
+            pids = self.popularity_index.iter_ids(category, offset)
+            offset, stop = 0, limit
+        elif sort_by == "price" or has_price:
+            pids = (pid for _, pid in bucket.by_price.iter_range(low, high))
+        else:
+            pids = iter(bucket)
+        return [self.products[pid] for pid in islice(pids, offset, stop)]
 
     def search_by_prefix(self, prefix: str, limit: int = 10) -> List[Product]:
         """按前缀搜索商品（热度Top-K）"""
@@ -101,21 +271,85 @@ class ProductIndex:
     def update_stock(self, product_id: str, new_stock: int):
         if product_id not in self.products:
             raise ValueError("商品不存在")
-        self.products[product_id].stock = new_stock
+        product = self.products[product_id]
+        product.stock = new_stock
+        self.analytics.update(product)
+        self.generation += 1
 
     def update_price(self, product_id: str, new_price: float):
         if product_id not in self.products:
             raise ValueError("商品不存在")
-        self.products[product_id].price = new_price
-        # 重新构建价格索引
-        self.price_index = [(p, i) for (p, i) in self.price_index if i != product_id]
-        heapq.heappush(self.price_index, (new_price, product_id))
+        product = self.products[product_id]
+        bucket = self.category_index[product.category]
+        self.price_index.delete((product.price, product_id))
+        bucket.remove(product)
+        product.price = new_price
+        self.price_index.insert((new_price, product_id), product_id)
+        bucket.add(product)
+        self.analytics.update(product)
+        self._sync_similar(product)
+        self.generation += 1
+
+    def update_popularity(self, product_id: str, popularity: Optional[int] = None, sales: Optional[int] = None):
+        """修改热度/销量，只在热度榜中重新定位该商品，O(log n)"""
+        if product_id not in self.products:
+            raise ValueError("商品不存在")
+        product = self.products[product_id]
+        if popularity is not None:
+            product.popularity = popularity
+        if sales is not None:
+            product.sales = sales
+        self.popularity_index.update(product)
+        if sales is not None:
+            self.analytics.update(product)
+        if popularity is not None:  # 销量不是相似度特征，也不影响前缀搜索的排序
+            self._update_trie(product.name, product_id, popularity)
+            self._sync_similar(product)
+        self.generation += 1
+
+    def top_popular(self, limit: int = 10, category: Optional[str] = None) -> List[Product]:
+        """热度最高的 limit 个商品（可限定类别），直接按热度榜顺序读取"""
+        return [self.products[pid] for pid in self.popularity_index.top_k(limit, category)]
+
+    def popularity_rank(self, product_id: str, category: Optional[str] = None) -> Optional[int]:
+        """商品的热度名次（从 1 开始），category 指定时为类别内名次"""
+        return self.popularity_index.rank(product_id, category)
+
+    def similar_products(self, product_id: str, k: int = 10) -> List[Product]:
+        """与该商品最相似的 k 个商品（价格、评分、热度、类别、品牌特征上的近似最近邻）"""
+        if product_id not in self.products:
+            raise ValueError("商品不存在")
+        index = self._similar_index
+        if index is None:
+            with self._similar_lock:
+                index = self._similar_index
+                if index is None:
+                    from modules.ann_index import SimilarProductIndex
+                    index = self._similar_index = SimilarProductIndex(list(self.products.values()))
+        return [self.products[pid] for pid, _ in index.similar(product_id, k)]
+
+    def _sync_similar(self, product: Optional[Product] = None, removed_id: Optional[str] = None):
+        """
+        商品变动同步到已建好的相似商品索引（调用方持有写锁）：逐行更新特征，
+        只有累计改动过多或出现新的类别、品牌时才丢弃，等下次查询重建
+        """
+        index = self._similar_index
+        if index is None:
+            return
+        if removed_id is not None:
+            index.remove(removed_id)
+        if product is not None and not index.upsert(product):
+            index = None
+        self._similar_index = None if index is None or index.stale else index
 
     def get_product_statistics(self) -> Dict:
+        """首页统计，价格与库存取自 analytics 的累计量，O(类别数)"""
+        summary = self.analytics.summary()
         return {
             "total_products": len(self.products),
             "categories": {cat: len(pids) for cat, pids in self.category_index.items()},
-            "average_price": sum(p.price for p in self.products.values()) / len(self.products) if self.products else 0,
-            "total_stock": sum(p.stock for p in self.products.values()),
-            "top_categories": sorted(self.category_index.items(), key=lambda x: len(x[1]), reverse=True)[:5]
+            "average_price": summary["average_price"],
+            "total_stock": summary["total_stock"],
+            "top_categories": sorted(((cat, len(bucket)) for cat, bucket in self.category_index.items()),
+                                     key=lambda x: x[1], reverse=True)[:5]
         }
@@ -0,0 +1,60 @@
+"""
+商品本体内存报告：比较 Product（dataclass，带 __dict__）、SlottedProduct（__slots__）
+与 ColumnarProductStore（列式）三种表示的每商品字节数，以及整个 ProductIndex 的占用。
+用 tracemalloc 统计构建后仍存活的分配；记录在统计窗口内逐批生成，
+因此字符串的真实占用也计入（列式存储对重复字符串去重）。
+
+用法：python -m modules.product_memory_report --n 200000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from bulk_generator import BulkDataGenerator
+from models import Product, SlottedProduct
+from modules.product_index import ProductIndex
+from modules.product_store import ColumnarProductStore
+
+
+def _records(n, seed):
+    for batch in BulkDataGenerator(seed).products(n):
+        yield from batch.records()
+
+
+def measure(build):
+    """build() 构建后仍被引用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return current
+
+
+def run(n, seed=0):
+    rows = [
+        ("Product 字典", lambda: {r["id"]: Product(**r) for r in _records(n, seed)}),
+        ("SlottedProduct 字典", lambda: {r["id"]: SlottedProduct(**r) for r in _records(n, seed)}),
+        ("ColumnarProductStore", lambda: ColumnarProductStore(Product(**r) for r in _records(n, seed))),
+        ("ProductIndex", lambda: ProductIndex.from_records(_records(n, seed))),
+        ("ProductIndex(columnar)", lambda: ProductIndex.from_records(_records(n, seed), columnar=True)),
+    ]
+    return [(name, measure(build)) for name, build in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商品表示的内存占用对比")
+    parser.add_argument("--n", type=int, default=200000, help="商品数量")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'表示':<26}{'总计(MB)':>12}{'每商品(B)':>12}")
+    for name, nbytes in run(args.n, args.seed):
+        print(f"{name:<26}{nbytes / 2 ** 20:>12.1f}{nbytes / args.n:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import sys
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from models import Product
+
+# 数值列及其 dtype
+NUMERIC_FIELDS = {
+    "price": np.float64,
+    "popularity": np.int64,
+    "stock": np.int64,
+    "sales": np.int64,
+    "rating": np.float64,
+}
+# 取值很少的字符串列：字典编码为 uint16 编号
+CODED_FIELDS = ("brand", "category", "status")
+# 自由文本列：用 sys.intern 去重后共用同一个 str 对象（描述、图片地址、日期大量重复），
+# 驻留表不持有引用，不再被任何行使用的字符串照常释放
+INTERNED_FIELDS = ("name", "description", "image_url", "created_date")
+FIELDS = ("id", "name", "brand", "category", "price", "popularity", "stock", "status",
+          "sales", "rating", "description", "image_url", "created_date")
+_CAST = {name: (float if dtype is np.float64 else int) for name, dtype in NUMERIC_FIELDS.items()}
+
+
+class ProductRow:
+    """
+    列式存储中一行的轻量视图，读写属性直接落在列上，用法与 Product 相同。
+    视图按商品ID定位行，商品被删除后视图失效（访问属性抛出 KeyError）。
+    """
+
+    __slots__ = ("_store", "id")
+
+    def __init__(self, store: "ColumnarProductStore", product_id: str):
+        self._store = store
+        self.id = product_id
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, (ProductRow, Product)):
+            return self._values() == tuple(getattr(other, name) for name in FIELDS)
+        return NotImplemented
+
+    __hash__ = None
+    __repr__ = Product.__repr__
+
+
+def _numeric_property(name: str, cast):
+    def getter(self):
+        store = self._store
+        return cast(store._numeric[name][store._rows[self.id]])
+
+    def setter(self, value):
+        store = self._store
+        store._numeric[name][store._rows[self.id]] = value
+    return property(getter, setter)
+
+
+def _coded_property(name: str):
+    def getter(self):
+        store = self._store
+        return store._vocab[name][store._codes[name][store._rows[self.id]]]
+
+    def setter(self, value):
+        store = self._store
+        store._codes[name][store._rows[self.id]] = store._encode(name, value)
+    return property(getter, setter)
+
+
+def _interned_property(name: str):
+    def getter(self):
+        store = self._store
+        return store._strings[name][store._rows[self.id]]
+
+    def setter(self, value):
+        store = self._store
+        store._strings[name][store._rows[self.id]] = store._intern(value)
+    return property(getter, setter)
+
+
+for _name, _cast in _CAST.items():
+    setattr(ProductRow, _name, _numeric_property(_name, _cast))
+for _name in CODED_FIELDS:
+    setattr(ProductRow, _name, _coded_property(_name))
+for _name in INTERNED_FIELDS:
+    setattr(ProductRow, _name, _interned_property(_name))
+
+
+class ColumnarProductStore(MutableMapping):
+    """
+    列式商品存储，可替代 ProductIndex.products 的 id -> Product 字典：
+    - 价格、热度、库存、销量、评分为 NumPy 数组（按容量倍增）
+    - 品牌、类别、状态字典编码为 uint16；名称、描述、图片、日期按值去重
+    - 读取返回 ProductRow 视图，写入 store[id] = product 时把字段拷进列
+    删除只把行标记为空闲，空闲行超过存活行时整体压缩一次。
+    """
+
+    def __init__(self, products: Iterable = (), capacity: int = 1024):
+        self._rows: Dict[str, int] = {}  # 商品ID -> 行号
+        self._ids: List[Optional[str]] = []  # 行号 -> 商品ID，空闲行为 None
+        self._numeric = {name: np.zeros(capacity, dtype=dtype) for name, dtype in NUMERIC_FIELDS.items()}
+        self._codes = {name: np.zeros(capacity, dtype=np.uint16) for name in CODED_FIELDS}
+        self._vocab: Dict[str, List[str]] = {name: [] for name in CODED_FIELDS}
+        self._vocab_index: Dict[str, Dict[str, int]] = {name: {} for name in CODED_FIELDS}
+        self._strings: Dict[str, List[str]] = {name: [] for name in INTERNED_FIELDS}
+        self._dead = 0
+        self.extend(products)
+
+    # ---------------- 编码 ----------------
+
+    def _encode(self, name: str, value: str) -> int:
+        index = self._vocab_index[name]
+        code = index.get(value)
+        if code is None:
+            if len(index) > np.iinfo(np.uint16).max:
+                raise ValueError(f"{name} 取值过多，无法字典编码")
+            code = index[value] = len(index)
+            self._vocab[name].append(value)
+        return code
+
+    @staticmethod
+    def _intern(value):
+        return sys.intern(value) if type(value) is str else value
+
+    # ---------------- 行管理 ----------------
+
+    @property
+    def _capacity(self) -> int:
+        return len(self._numeric["price"])
+
+    def _reserve(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2)
+        for columns in (self._numeric, self._codes):
+            for name, column in columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:len(self._ids)] = column[:len(self._ids)]
+                columns[name] = grown
+
+    def _compact(self):
+        """丢弃空闲行，存活行保持原有相对顺序"""
+        live = np.array([pid is not None for pid in self._ids], dtype=bool)
+        keep = np.nonzero(live)[0]
+        for columns in (self._numeric, self._codes):
+            for name, column in columns.items():
+                column[:len(keep)] = column[keep]
+        keep_list = keep.tolist()
+        for name, values in self._strings.items():
+            self._strings[name] = [values[i] for i in keep_list]
+        self._ids = [self._ids[i] for i in keep_list]
+        self._rows = {pid: row for row, pid in enumerate(self._ids)}
+        self._dead = 0
+
+    def extend(self, products: Iterable):
+        """批量追加（商品ID须不在库中），数值列按整列一次写入"""
+        products = [p for p in products]
+        if not products:
+            return
+        rows = self._rows
+        ids = {p.id for p in products}
+        if len(ids) < len(products) or any(pid in rows for pid in ids):
+            raise ValueError("商品ID重复或已存在")
+        start = len(self._ids)
+        self._reserve(start + len(products))
+        stop = start + len(products)
+        for name, column in self._numeric.items():
+            column[start:stop] = [getattr(p, name) for p in products]
+        for name, column in self._codes.items():
+            encode = self._encode
+            column[start:stop] = [encode(name, getattr(p, name)) for p in products]
+        intern = self._intern
+        for name, values in self._strings.items():
+            values.extend(intern(getattr(p, name)) for p in products)
+        for row, p in enumerate(products, start):
+            rows[p.id] = row
+            self._ids.append(p.id)
+
+    def _write(self, row: int, values: dict):
+        for name, column in self._numeric.items():
+            column[row] = values[name]
+        for name, column in self._codes.items():
+            column[row] = self._encode(name, values[name])
+        for name, column in self._strings.items():
+            column[row] = self._intern(values[name])
+
+    # ---------------- 映射接口 ----------------
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __contains__(self, product_id):
+        return product_id in self._rows
+
+    def __getitem__(self, product_id: str) -> ProductRow:
+        if product_id not in self._rows:
+            raise KeyError(product_id)
+        return ProductRow(self, product_id)
+
+    def __setitem__(self, product_id: str, product):
+        # 先读出全部字段：product 可能是本库中已删除行的视图，压缩后行号会变化
+        values = {name: getattr(product, name) for name in FIELDS}
+        row = self._rows.get(product_id)
+        if row is None:
+            if self._dead > max(1024, len(self._rows)):
+                self._compact()
+            row = len(self._ids)
+            self._reserve(row + 1)
+            self._ids.append(product_id)
+            for column in self._strings.values():
+                column.append(None)
+            self._rows[product_id] = row
+        self._write(row, values)
+
+    def __delitem__(self, product_id: str):
+        row = self._rows.pop(product_id)
+        self._ids[row] = None
+        self._dead += 1
+
+    def pop(self, product_id: str, *default):
+        """删除并返回独立的 Product 对象（不再依赖本库的行）"""
+        if product_id not in self._rows:
+            if default:
+                return default[0]
+            raise KeyError(product_id)
+        product = self.materialize(product_id)
+        del self[product_id]
+        return product
+
+    def materialize(self, product_id: str) -> Product:
+        row = self[product_id]
+        return Product(**{name: getattr(row, name) for name in FIELDS})
+
+    # ---------------- 列访问 ----------------
+
+    def live_rows(self) -> np.ndarray:
+        """存活行的行号"""
+        if not self._dead:
+            return np.arange(len(self._ids))
+        return np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+
+    def column(self, name: str) -> np.ndarray:
+        """存活商品的一列（拷贝）；编码列返回 uint16 编号，对应取值见 vocabulary"""
+        rows = self.live_rows()
+        if name in self._numeric:
+            return self._numeric[name][rows]
+        if name in self._codes:
+            return self._codes[name][rows]
+        raise ValueError(f"{name} 不是数值列或编码列")
+
+    def vocabulary(self, name: str) -> List[str]:
+        return list(self._vocab[name])
+
+    def nbytes(self) -> int:
+        """列数组占用的字节数（不含字符串对象本身）"""
+        arrays = list(self._numeric.values()) + list(self._codes.values())
+        return sum(a.nbytes for a in arrays)
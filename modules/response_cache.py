@@ -0,0 +1,110 @@
+"""
+读接口的 HTTP 响应缓存（ETag / If-None-Match）：
+缓存键 = 路径 + 查询参数 + 相关引擎的 generation 计数器（引擎每次修改都会递增）。
+ETag 直接由缓存键算出，不需要先生成响应体：客户端带来的 ETag 与当前键一致时立即返回 304；
+其他客户端的同样请求命中缓存时直接复用已编码的响应体。缓存按总字节数做 LRU 淘汰。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Iterable, Optional
+
+from flask import Response, make_response, request
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = 64 * 2 ** 20, max_entry_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8  # 单个过大的响应不缓存
+        self._entries: "OrderedDict[str, tuple[bytes, int, str]]" = OrderedDict()  # etag -> (body, status, mimetype)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 进程级随机前缀：重启后计数器从 0 开始，避免与旧进程发出的 ETag 碰撞
+        self._salt = os.urandom(8)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def etag(self, view: str, generations: Iterable[int]) -> str:
+        args = sorted(request.args.items(multi=True))
+        key = repr((view, request.path, args, tuple(generations))).encode("utf-8")
+        return hashlib.blake2b(key, digest_size=12, key=self._salt).hexdigest()
+
+    def _store(self, etag: str, body: bytes, status: int, mimetype: str):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[etag] = (body, status, mimetype)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes and self._entries:
+                _, (old, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old)
+
+    def _lookup(self, etag: str):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def new_epoch(self):
+        """引擎被整体替换（generation 重新从 0 计数）时调用：清空缓存并更换前缀，旧 ETag 全部失效"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._salt = os.urandom(8)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits,
+                "misses": self.misses, "not_modified": self.not_modified}
+
+    def cached(self, engines: Callable[[], Iterable]):
+        """
+        视图装饰器。engines 返回该接口依赖的引擎（调用时才取，便于引擎被替换或惰性加载），
+        只缓存 200 响应；流式响应不缓存，但仍带 ETag。
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                etag = self.etag(view.__name__, (engine.generation for engine in engines()))
+                if etag in request.if_none_match:
+                    self.not_modified += 1
+                    return self._tag(Response(status=304), etag)
+                entry = self._lookup(etag)
+                if entry is not None:
+                    self.hits += 1
+                    body, status, mimetype = entry
+                    return self._tag(Response(body, status=status, mimetype=mimetype), etag)
+                self.misses += 1
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if not response.is_streamed:
+                    self._store(etag, response.get_data(), response.status_code, response.mimetype)
+                return self._tag(response, etag)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _tag(response: Response, etag: str) -> Response:
+        response.set_etag(etag)
+        # 浏览器每次轮询都带上 ETag 来验证，数据未变时只收到 304
+        response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -0,0 +1,91 @@
+import threading
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from typing import Callable, Iterable
+
+
+class RWLock:
+    """
+    读写锁：多个读者可以同时持有，写者独占。
+    写者优先：有写者在等待时新的读者先排队，避免持续的读请求把写者饿死。
+    不可重入，同一线程持有读锁时不要再申请写锁。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+@contextmanager
+def lock_all(engines: Iterable, write: bool):
+    """按固定顺序（对象 id）对多个引擎加锁，避免不同请求交叉加锁导致死锁"""
+    locks = sorted({id(lock): lock for lock in (engine.lock for engine in engines)}.items())
+    with ExitStack() as stack:
+        for _, lock in locks:
+            stack.enter_context(lock.write() if write else lock.read())
+        yield
+
+
+def _locked(engines: Callable[[], Iterable], write: bool):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with lock_all(engines(), write):
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reading(engines: Callable[[], Iterable]):
+    """视图装饰器：执行期间持有各引擎的读锁。engines 在调用时求值，便于惰性加载的引擎"""
+    return _locked(engines, write=False)
+
+
+def writing(engines: Callable[[], Iterable]):
+    """视图装饰器：执行期间持有各引擎的写锁"""
+    return _locked(engines, write=True)
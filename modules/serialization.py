@@ -0,0 +1,153 @@
+"""
+API 响应序列化：
+- ModelSerializer 为每种模型预编译字段提取器（operator.attrgetter 一次取出全部字段）
+- dumps 优先使用 orjson（已安装时），否则退回标准库 json，输出均为 UTF-8 字节
+- 每个实体编码后的 JSON 片段按ID缓存（LRU），字段值变化时自动重新编码，删除时显式失效
+- 大列表用 stream 分块产出，配合 Flask 的流式响应边编码边发送
+"""
+import dataclasses
+import json
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from flask import Response
+
+from models import MarketingTask
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+# 列表超过该长度时改用分块流式响应
+STREAM_THRESHOLD = 2000
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data) -> Any:
+    """解析 JSON 字节或字符串，格式错误时抛出 ValueError"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ModelSerializer:
+    """
+    按固定字段序列化某类模型对象（dataclass、__slots__ 对象或列式存储视图均可）。
+    fragment 缓存以 key 字段为键，保存 (字段值元组, 编码结果)；
+    命中时只比较字段值，相同则直接复用编码结果，不同说明实体已被修改，重新编码。
+    """
+
+    def __init__(self, fields: Sequence[str], key: str = "id", capacity: int = 100000):
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self._get = attrgetter(*self.fields)
+        self._key = attrgetter(key)
+        self.capacity = capacity
+        self._cache: "OrderedDict[Any, Tuple[tuple, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def to_dict(self, obj) -> dict:
+        return dict(zip(self.fields, self._get(obj)))
+
+    def fragment(self, obj) -> bytes:
+        """单个实体的 JSON 字节"""
+        return self._encode(self._key(obj), self._get(obj))
+
+    def _encode(self, key, values: tuple) -> bytes:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == values:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return cached[1]
+        encoded = dumps(dict(zip(self.fields, values)))
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (values, encoded)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        return encoded
+
+    def invalidate(self, key: Optional[Any] = None):
+        """丢弃某个实体的缓存片段，key 为 None 时全部清空"""
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def encode_list(self, objs: Iterable) -> bytes:
+        return b"[" + b",".join(self.fragment(obj) for obj in objs) + b"]"
+
+    def stream(self, objs: Iterable, chunk_size: int = 500) -> Iterator[bytes]:
+        """
+        分块产出 JSON 数组，每块拼接 chunk_size 个实体。
+        字段值在调用时一次取出，之后只做编码：流式响应在视图返回（释放引擎读锁）后才发送，
+        不能再去读可能被其他线程修改的实体对象
+        """
+        rows = [(self._key(obj), self._get(obj)) for obj in objs]
+        return self._stream_rows(rows, chunk_size)
+
+    def _stream_rows(self, rows, chunk_size: int) -> Iterator[bytes]:
+        yield b"["
+        chunk = []
+        first = True
+        for key, values in rows:
+            chunk.append(self._encode(key, values))
+            if len(chunk) == chunk_size:
+                yield (b"" if first else b",") + b",".join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield (b"" if first else b",") + b",".join(chunk)
+        yield b"]"
+
+    def response(self, objs: Sequence, status: int = 200) -> Response:
+        """列表响应：小列表一次编码，超过 STREAM_THRESHOLD 时分块流式发送"""
+        if len(objs) > STREAM_THRESHOLD:
+            return Response(self.stream(objs), status=status, mimetype="application/json")
+        return json_response(self.encode_list(objs), status)
+
+
+def json_response(body, status: int = 200) -> Response:
+    """body 可以是已编码的字节，也可以是待编码的对象"""
+    if not isinstance(body, (bytes, bytearray)):
+        body = dumps(body)
+    return Response(body, status=status, mimetype="application/json")
+
+
+def raw(fragment: bytes) -> "_Raw":
+    return _Raw(fragment)
+
+
+class _Raw:
+    __slots__ = ("fragment",)
+
+    def __init__(self, fragment: bytes):
+        self.fragment = fragment
+
+
+def compose(obj: dict) -> bytes:
+    """编码顶层字典，值为 raw(...) 的部分直接嵌入已编码的片段，不再解码重编"""
+    parts = []
+    for key, value in obj.items():
+        encoded = value.fragment if isinstance(value, _Raw) else dumps(value)
+        parts.append(dumps(key) + b":" + encoded)
+    return b"{" + b",".join(parts) + b"}"
+
+
+PRODUCT_JSON = ModelSerializer(("id", "name", "brand", "category", "price", "description", "image_url",
+                                "status", "sales", "rating", "popularity", "stock"))
+CUSTOMER_JSON = ModelSerializer(("id", "name", "type", "purchase_power", "activity_level", "join_date",
+                                 "gender", "age", "phone", "email", "region", "score"))
+TASK_JSON = ModelSerializer(tuple(f.name for f in dataclasses.fields(MarketingTask)))
@@ -0,0 +1,352 @@
+"""
+内存引擎快照：把 ProductIndex / CustomerNetwork / TaskScheduler 的数据序列化为紧凑的二进制文件，
+启动时 mmap 映射回来，索引在第一次使用时才构建。
+
+文件格式（小端）：
+    头部 32 字节：magic(8) | version(u32) | 目录长度(u32) | 数据长度(u64) | crc32(u32) | 保留(u32)
+    目录：JSON，记录每张表的行数和每列的类型、偏移、长度
+    数据：各列连续存放，按 8 字节对齐；crc32 覆盖目录 + 数据
+列类型：
+    i8 / f8  —— 定长数值列，mmap 后直接 np.frombuffer，零拷贝
+    str      —— 全部字符串拼接后 UTF-8 编码，另存 int64 字符偏移
+    cat      —— 重复度高的字符串列（类别、品牌、状态等）字典编码：去重后的词表按 str 存放，
+                另存 int32 编码
+    json     —— 含 None 或混合类型的列，每个值单独 JSON 编码后按 str 列存放
+
+用法：python -m modules.snapshot build --out state.snap --products 1000000 --customers 100000
+      python -m modules.snapshot info state.snap
+"""
+import argparse
+import dataclasses
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+from models import Customer, CustomerRelation, MarketingTask, Product
+
+MAGIC = b"ECSNAP\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQII")
+
+PRODUCT_FIELDS = [f.name for f in dataclasses.fields(Product)]
+CUSTOMER_FIELDS = ["id", "name", "type", "purchase_power", "activity_level", "join_date",
+                   "gender", "age", "phone", "email", "region", "score"]
+RELATION_FIELDS = [f.name for f in dataclasses.fields(CustomerRelation)]
+TASK_FIELDS = [f.name for f in dataclasses.fields(MarketingTask)]
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏、版本不符或格式错误"""
+
+
+def _field(item, name):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def _column_kind(values: list) -> str:
+    if all(type(v) is int for v in values):
+        return "i8"
+    if all(type(v) in (int, float) for v in values):
+        return "f8"
+    if all(type(v) is str for v in values):
+        return "str"
+    return "json"
+
+
+def _encode_strings(values: List[str]):
+    text = "".join(values)
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    return offsets.tobytes(), text.encode("utf-8")
+
+
+def write_snapshot(path: str, tables: Dict[str, Dict[str, list]]) -> int:
+    """
+    tables: 表名 -> {列名: 值列表}，同一张表各列等长。
+    先写临时文件再原子替换，已 mmap 旧文件的进程不受影响。返回文件字节数。
+    """
+    toc = {"version": VERSION, "tables": {}}
+    chunks: List[bytes] = []
+    offset = 0
+
+    def add(data: bytes) -> dict:
+        nonlocal offset
+        entry = {"offset": offset, "length": len(data)}
+        chunks.append(data)
+        pad = -len(data) % 8
+        if pad:
+            chunks.append(b"\x00" * pad)
+        offset += len(data) + pad
+        return entry
+
+    for table, columns in tables.items():
+        count = len(next(iter(columns.values()))) if columns else 0
+        meta = {"count": count, "columns": {}}
+        for name, values in columns.items():
+            if len(values) != count:
+                raise SnapshotError(f"表 {table} 的列 {name} 长度不一致")
+            kind = _column_kind(values)
+            if kind == "str" and count:
+                vocab = {}
+                codes = [vocab.setdefault(v, len(vocab)) for v in values]
+                if len(vocab) * 4 <= count:
+                    kind = "cat"
+            if kind in ("i8", "f8"):
+                entry = add(np.asarray(values, dtype="<" + kind).tobytes())
+            elif kind == "cat":
+                offsets, data = _encode_strings(list(vocab))
+                entry = add(np.asarray(codes, dtype="<i4").tobytes())
+                entry["vocab"] = add(data)
+                entry["vocab"]["offsets"] = add(offsets)
+                entry["vocab"]["count"] = len(vocab)
+            else:
+                if kind == "json":
+                    values = [json.dumps(v, ensure_ascii=False) for v in values]
+                offsets, data = _encode_strings(values)
+                entry = add(data)
+                entry["offsets"] = add(offsets)
+            entry["kind"] = kind
+            meta["columns"][name] = entry
+        toc["tables"][table] = meta
+
+    toc_bytes = json.dumps(toc, ensure_ascii=False).encode("utf-8")
+    toc_bytes += b" " * (-len(toc_bytes) % 8)
+    crc = zlib.crc32(toc_bytes)
+    for chunk in chunks:
+        crc = zlib.crc32(chunk, crc)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(toc_bytes), offset, crc, 0))
+        f.write(toc_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+    return _HEADER.size + len(toc_bytes) + offset
+
+
+def engine_tables(product_index=None, customer_network=None, task_scheduler=None) -> Dict[str, Dict[str, list]]:
+    """从三个内存引擎中按列抽取数据"""
+    tables = {}
+    if product_index is not None:
+        tables["products"] = _columns(product_index.products.values(), PRODUCT_FIELDS)
+    if customer_network is not None:
+        tables["customers"] = _columns(customer_network.customers.values(), CUSTOMER_FIELDS)
+        tables["relations"] = _columns(customer_network.relations, RELATION_FIELDS)
+    if task_scheduler is not None:
+        tables["tasks"] = _columns(task_scheduler.task_map.values(), TASK_FIELDS)
+        pairs = [(before, after) for after, befores in task_scheduler.dependencies.items() for before in befores]
+        tables["dependencies"] = {"before": [b for b, _ in pairs], "after": [a for _, a in pairs]}
+        tables["completed"] = {"id": sorted(task_scheduler.completed_tasks)}
+    return tables
+
+
+def _columns(rows: Iterable, fields: List[str]) -> Dict[str, list]:
+    rows = list(rows)
+    return {name: [_field(r, name) for r in rows] for name in fields}
+
+
+def save_engines(path: str, product_index=None, customer_network=None, task_scheduler=None) -> int:
+    return write_snapshot(path, engine_tables(product_index, customer_network, task_scheduler))
+
+
+class SnapshotTable:
+    """快照中的一张表：数值列为 mmap 上的零拷贝视图，字符串列首次访问时解码并缓存"""
+
+    def __init__(self, snapshot: "Snapshot", meta: dict):
+        self._snapshot = snapshot
+        self._meta = meta
+        self._cache: Dict[str, object] = {}
+
+    def __len__(self):
+        return self._meta["count"]
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._meta["columns"])
+
+    def column(self, name: str):
+        """i8 / f8 列返回 NumPy 数组（只读视图），str / cat / json 列返回 list"""
+        if name not in self._cache:
+            entry = self._meta["columns"][name]
+            kind = entry["kind"]
+            if kind in ("i8", "f8"):
+                self._cache[name] = self._snapshot._array(entry, "<" + kind)
+            elif kind == "cat":
+                vocab = self._snapshot._strings(entry["vocab"], entry["vocab"]["count"])
+                self._cache[name] = [vocab[c] for c in self._snapshot._array(entry, "<i4").tolist()]
+            else:
+                values = self._snapshot._strings(entry, self._meta["count"])
+                if kind == "json":
+                    values = [json.loads(v) for v in values]
+                self._cache[name] = values
+        return self._cache[name]
+
+    def records(self) -> List[dict]:
+        names = self.names
+        columns = [self.column(n) for n in names]
+        columns = [c.tolist() if isinstance(c, np.ndarray) else c for c in columns]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+class Snapshot:
+    """只读打开快照文件：校验头部与 crc32 后 mmap 映射，表和列均按需读取"""
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        if len(buf) < _HEADER.size:
+            raise SnapshotError("快照文件过短")
+        magic, version, toc_len, data_len, crc, _ = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise SnapshotError("不是快照文件")
+        if version != VERSION:
+            raise SnapshotError(f"快照版本 {version} 不受支持（当前 {VERSION}）")
+        self._data_start = _HEADER.size + toc_len
+        if len(buf) != self._data_start + data_len:
+            raise SnapshotError("快照文件长度与头部不符")
+        if verify and zlib.crc32(buf[_HEADER.size:]) != crc:
+            raise SnapshotError("快照校验和不匹配")
+        self.toc = json.loads(bytes(buf[_HEADER.size:self._data_start]))
+        self._buf = buf
+        self._tables: Dict[str, SnapshotTable] = {}
+
+    def __contains__(self, table: str):
+        return table in self.toc["tables"]
+
+    def table(self, name: str) -> SnapshotTable:
+        if name not in self._tables:
+            if name not in self.toc["tables"]:
+                raise SnapshotError(f"快照中没有表 {name}")
+            self._tables[name] = SnapshotTable(self, self.toc["tables"][name])
+        return self._tables[name]
+
+    def _slice(self, entry: dict) -> memoryview:
+        start = self._data_start + entry["offset"]
+        return self._buf[start:start + entry["length"]]
+
+    def _array(self, entry: dict, dtype: str) -> np.ndarray:
+        return np.frombuffer(self._slice(entry), dtype=dtype)
+
+    def _strings(self, entry: dict, count: int) -> List[str]:
+        text = str(self._slice(entry), "utf-8")
+        offsets = self._array(entry["offsets"], "<i8").tolist()
+        return [text[offsets[i]:offsets[i + 1]] for i in range(count)]
+
+
+# ---------------- 从快照恢复引擎 ----------------
+
+def _table_records(snapshot: Snapshot, name: str) -> List[dict]:
+    return snapshot.table(name).records() if name in snapshot else []
+
+
+def restore_product_index(snapshot: Snapshot, columnar: bool = False):
+    from modules.product_index import ProductIndex
+    return ProductIndex.from_records((Product(**r) for r in _table_records(snapshot, "products")),
+                                     columnar=columnar)
+
+
+def restore_customer_network(snapshot: Snapshot):
+    from modules.customer_network import CustomerNetwork
+    return CustomerNetwork.from_records(
+        (Customer(**r) for r in _table_records(snapshot, "customers")),
+        (CustomerRelation(**r) for r in _table_records(snapshot, "relations")))
+
+
+def restore_task_scheduler(snapshot: Snapshot):
+    from modules.task_scheduler import TaskScheduler
+    dependencies, completed = [], []
+    if "dependencies" in snapshot:
+        deps = snapshot.table("dependencies")
+        dependencies = zip(deps.column("before"), deps.column("after"))
+    if "completed" in snapshot:
+        completed = snapshot.table("completed").column("id")
+    return TaskScheduler.from_records(
+        (MarketingTask(**r) for r in _table_records(snapshot, "tasks")), dependencies, completed)
+
+
+class LazyEngine:
+    """
+    引擎的惰性代理：第一次访问属性时才调用 factory 构建真正的引擎，之后直接转发。
+    启动时只需映射快照文件，索引构建推迟到第一个用到它的请求。
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_engine", None)
+        object.__setattr__(self, "_init_lock", threading.Lock())
+
+    @property
+    def loaded(self) -> bool:
+        return object.__getattribute__(self, "_engine") is not None
+
+    def _get(self):
+        engine = object.__getattribute__(self, "_engine")
+        if engine is None:
+            with object.__getattribute__(self, "_init_lock"):
+                engine = object.__getattribute__(self, "_engine")
+                if engine is None:
+                    engine = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_engine", engine)
+        return engine
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+    def __len__(self):
+        return len(self._get())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内存引擎快照工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="用列式批量生成器生成数据并直接写成快照")
+    build.add_argument("--out", default="state.snap")
+    build.add_argument("--products", type=int, default=1_000_000)
+    build.add_argument("--customers", type=int, default=10_000)
+    build.add_argument("--relations", type=int, default=50_000)
+    build.add_argument("--tasks", type=int, default=1_000)
+    build.add_argument("--seed", type=int, default=0)
+    info = sub.add_parser("info", help="查看快照头部与目录，并计时 mmap 打开")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from bulk_generator import BulkDataGenerator, concat
+        gen = BulkDataGenerator(args.seed)
+        start = time.perf_counter()
+        tables = {"products": _columns(
+            (r for b in gen.products(args.products) for r in b.records()), PRODUCT_FIELDS)}
+        customers = concat(list(gen.customers(args.customers)))
+        tables["customers"] = _columns(customers.records(), CUSTOMER_FIELDS)
+        tables["relations"] = _columns(
+            (r for b in gen.relations(customers, args.relations) for r in b.records()), RELATION_FIELDS)
+        tasks = gen.tasks(args.tasks)
+        tables["tasks"] = _columns(tasks.records(), [f for f in TASK_FIELDS if f in tasks.keys])
+        pairs = gen.dependency_pairs(tasks)
+        tables["dependencies"] = {"before": [b for b, _ in pairs], "after": [a for _, a in pairs]}
+        size = write_snapshot(args.out, tables)
+        print(f"写入 {args.out}: {size / 2**20:.1f} MB，耗时 {time.perf_counter() - start:.2f}s")
+    else:
+        start = time.perf_counter()
+        snapshot = Snapshot(args.path)
+        elapsed = time.perf_counter() - start
+        for name, meta in snapshot.toc["tables"].items():
+            kinds = ", ".join(f"{c}:{e['kind']}" for c, e in meta["columns"].items())
+            print(f"{name:<14}{meta['count']:>12,} 行  {kinds}")
+        print(f"打开并校验耗时 {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
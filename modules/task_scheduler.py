@@ -1,6 +1,24 @@
 import heapq
-from typing import List, Dict, Optional, Set
+from collections import defaultdict, deque
+from itertools import chain
+from typing import Callable, Iterable, List, Dict, Optional, Set, Tuple
 from models import MarketingTask
+from modules.ordered_map import paused_gc
+from modules.rwlock import RWLock
+
+
+class DependencyCycleError(ValueError):
+    """依赖关系存在环；cycle 为环上的任务ID，按依赖方向排列（最后一个依赖第一个之前的任务闭合成环）"""
+
+    def __init__(self, cycle: List[str], blocked: int):
+        self.cycle = cycle
+        self.blocked = blocked
+        super().__init__(f"依赖关系存在环: {' -> '.join(cycle + cycle[:1])}（共 {blocked} 个任务无法排序）")
+
+
+# MarketingTask.status 的取值
+PENDING, IN_PROGRESS, COMPLETED = "Pending", "In Progress", "Completed"
+
 
 class TaskScheduler:
     def __init__(self):
@@ -9,15 +27,118 @@ class TaskScheduler:
         self.dependents: Dict[str, Set[str]] = {}
         self.completed_tasks: Set[str] = set()
         self.ready_heap: List[tuple] = []  # (priority, created_date, task_id)
+        self.generation = 0  # 每次修改递增，响应缓存以它判断数据是否变化
+        self.lock = RWLock()  # 多线程服务时的读写锁，由调用方（如 app 的视图装饰器）持有
+
+    @classmethod
+    def from_records(cls, tasks: Iterable, dependencies: Iterable[Tuple[str, str]] = (),
+                     completed: Iterable[str] = ()) -> "TaskScheduler":
+        """
+        批量构建，tasks 为任务对象或字典，dependencies 为 (before_id, after_id)。
+        逐条 add_dependency 每次都要 DFS 查环并重建就绪堆；这里先填充全部依赖，
+        再用一次 Kahn 拓扑排序检查整张图是否无环，最后 heapify 一次建堆。
+        任务ID重复、依赖不合法或存在环时抛出 ValueError。
+        """
+        with paused_gc():
+            scheduler = cls()
+            task_map, deps, dependents = scheduler.task_map, scheduler.dependencies, scheduler.dependents
+            for record in tasks:
+                task = record if isinstance(record, MarketingTask) else MarketingTask(**record)
+                if task.id in task_map:
+                    raise ValueError(f"任务ID {task.id} 已存在")
+                task_map[task.id] = task
+                deps[task.id] = set()
+                dependents[task.id] = set()
+            for before_id, after_id in dependencies:
+                if before_id not in task_map or after_id not in task_map:
+                    raise ValueError(f"依赖的任务不存在: {before_id} -> {after_id}")
+                if before_id == after_id:
+                    raise ValueError(f"不能依赖自身: {before_id}")
+                deps[after_id].add(before_id)
+                dependents[before_id].add(after_id)
+            remaining = scheduler._topological_remainder()
+            if remaining:
+                raise DependencyCycleError(_find_cycle(remaining, deps.__getitem__), len(remaining))
+            scheduler.completed_tasks.update(tid for tid in completed if tid in task_map)
+            for task in task_map.values():
+                # 快照保存时仍在执行的任务没有执行完，恢复后重新排队
+                if task.status == IN_PROGRESS:
+                    task.status, task.assigned_to = PENDING, None
+            scheduler._refresh_ready_heap()
+        return scheduler
+
+    def _topological_remainder(self) -> List[str]:
+        """Kahn 拓扑排序，返回无法排出的任务（位于环上或依赖环），无环时为空列表"""
+        indegree = {tid: len(befores) for tid, befores in self.dependencies.items()}
+        return _kahn_remainder(indegree, self.dependents.__getitem__)
+
+    def import_plan(self, tasks: Iterable = (), dependencies: Iterable[Tuple[str, str]] = ()) -> Dict[str, int]:
+        """
+        批量导入任务与依赖 (before_id, after_id)，依赖两端可以是已有任务或本批新任务。
+        逐条 insert / add_dependency 每次都要 DFS 查环并重建就绪堆；这里先整体校验
+        （任务ID不重复、依赖两端存在且不依赖自身），再对已有依赖 + 新依赖做一次 Kahn 拓扑排序，
+        有环时抛出 DependencyCycleError 并给出一个具体的环。任何错误都不会留下部分导入的数据。
+        通过后一次写入，就绪堆只重建一次，generation 只递增一次。返回新增的任务数与依赖数。
+        """
+        with paused_gc():
+            new_tasks: Dict[str, MarketingTask] = {}
+            for row, record in enumerate(tasks):
+                try:
+                    task = record if isinstance(record, MarketingTask) else MarketingTask(**record)
+                except TypeError as e:
+                    raise ValueError(f"第 {row} 个任务字段不合法: {e}")
+                if task.id in self.task_map or task.id in new_tasks:
+                    raise ValueError(f"任务ID {task.id} 已存在")
+                new_tasks[task.id] = task
+            empty = ()
+            edges = set()
+            for before_id, after_id in dependencies:
+                for tid in (before_id, after_id):
+                    if tid not in self.task_map and tid not in new_tasks:
+                        raise ValueError(f"依赖的任务不存在: {before_id} -> {after_id}")
+                if before_id == after_id:
+                    raise ValueError(f"不能依赖自身: {before_id}")
+                if before_id not in self.dependencies.get(after_id, empty):
+                    edges.add((before_id, after_id))
+
+            # 一次 Kahn：已有依赖图无环，只需把新任务与新依赖叠加上去整体检查
+            new_befores, new_afters = defaultdict(list), defaultdict(list)
+            for before_id, after_id in edges:
+                new_befores[after_id].append(before_id)
+                new_afters[before_id].append(after_id)
+            indegree = {tid: len(befores) for tid, befores in self.dependencies.items()}
+            indegree.update((tid, 0) for tid in new_tasks)
+            for after_id, befores in new_befores.items():
+                indegree[after_id] += len(befores)
+            remaining = _kahn_remainder(
+                indegree, lambda tid: chain(self.dependents.get(tid, empty), new_afters.get(tid, empty)))
+            if remaining:
+                cycle = _find_cycle(remaining,
+                                    lambda tid: chain(self.dependencies.get(tid, empty), new_befores.get(tid, empty)))
+                raise DependencyCycleError(cycle, len(remaining))
+
+            for tid, task in new_tasks.items():
+                self.task_map[tid] = task
+                self.dependencies[tid] = set()
+                self.dependents[tid] = set()
+            for before_id, after_id in edges:
+                self.dependencies[after_id].add(before_id)
+                self.dependents[before_id].add(after_id)
+            if new_tasks or edges:
+                self.generation += 1
+                self._refresh_ready_heap()
+        return {"tasks": len(new_tasks), "dependencies": len(edges)}
 
     def _refresh_ready_heap(self):
-        """重建最大堆，只包含所有依赖已完成的任务"""
-        self.ready_heap = []
-        for task_id, task in self.task_map.items():
-            if task_id in self.completed_tasks:
-                continue
-            if all(dep in self.completed_tasks for dep in self.dependencies.get(task_id, set())):
-                heapq.heappush(self.ready_heap, (-task.priority, task.created_date, task_id))
+        """重建最大堆，只包含所有依赖已完成、且未在执行中的任务；先收集再 heapify，O(n)"""
+        completed = self.completed_tasks
+        empty = set()
+        heap = [(-task.priority, task.created_date, task_id)
+                for task_id, task in self.task_map.items()
+                if task_id not in completed and task.status != IN_PROGRESS
+                and all(dep in completed for dep in self.dependencies.get(task_id, empty))]
+        heapq.heapify(heap)
+        self.ready_heap = heap
 
     def insert(self, task: MarketingTask):
         if task.id in self.task_map:
@@ -25,6 +146,7 @@ class TaskScheduler:
         self.task_map[task.id] = task
         self.dependencies.setdefault(task.id, set())
         self.dependents.setdefault(task.id, set())
+        self.generation += 1
         self._refresh_ready_heap()
 
     def delete(self, task_id: str):
@@ -38,6 +160,7 @@ class TaskScheduler:
         self.dependents.pop(task_id, None)
         self.task_map.pop(task_id)
         self.completed_tasks.discard(task_id)
+        self.generation += 1
         self._refresh_ready_heap()
 
     def update(self, task_id: str, **kwargs):
@@ -48,6 +171,7 @@ class TaskScheduler:
             if hasattr(task, key):
                 setattr(task, key, value)
         task.priority = task.urgency * task.influence
+        self.generation += 1
         self._refresh_ready_heap()
 
     def add_dependency(self, before_id: str, after_id: str):
@@ -59,11 +183,13 @@ class TaskScheduler:
             raise ValueError("添加该依赖会导致环")
         self.dependencies[after_id].add(before_id)
         self.dependents[before_id].add(after_id)
+        self.generation += 1
         self._refresh_ready_heap()
 
     def remove_dependency(self, before_id: str, after_id: str):
         self.dependencies.get(after_id, set()).discard(before_id)
         self.dependents.get(before_id, set()).discard(after_id)
+        self.generation += 1
         self._refresh_ready_heap()
 
     def _has_path(self, start: str, end: str) -> bool:
@@ -85,10 +211,39 @@ class TaskScheduler:
             _, _, task_id = heapq.heappop(self.ready_heap)
             if task_id not in self.completed_tasks:
                 self.completed_tasks.add(task_id)
+                self.task_map[task_id].status = COMPLETED
+                self.generation += 1
                 self._refresh_ready_heap()
                 return self.task_map[task_id]
         return None
 
+    # 执行引擎（modules.task_executor）的状态变更。就绪堆在每次读取前都会重建，这里不逐次重建
+    def start(self, task_id: str, worker: str) -> bool:
+        """任务开始执行：In Progress，记录执行者；任务已被删除或已完成时返回 False"""
+        task = self.task_map.get(task_id)
+        if task is None or task_id in self.completed_tasks:
+            return False
+        task.status, task.assigned_to = IN_PROGRESS, worker
+        self.generation += 1
+        return True
+
+    def complete(self, task_id: str):
+        """任务执行完成，依赖它的任务随之可以就绪"""
+        task = self.task_map.get(task_id)
+        if task is None:
+            return
+        task.status = COMPLETED
+        self.completed_tasks.add(task_id)
+        self.generation += 1
+
+    def release(self, task_id: str):
+        """任务执行失败：退回 Pending，可以再次被调度"""
+        task = self.task_map.get(task_id)
+        if task is None:
+            return
+        task.status, task.assigned_to = PENDING, None
+        self.generation += 1
+
     def top_k_tasks(self, k: int) -> List[MarketingTask]:
         self._refresh_ready_heap()
         topk = heapq.nsmallest(k, self.ready_heap)
@@ -111,5 +266,35 @@ class TaskScheduler:
             "total_tasks": total,
             "completed_tasks": completed,
             "pending_tasks": pending,
+            "in_progress_tasks": sum(1 for task in self.task_map.values() if task.status == IN_PROGRESS),
             "completion_rate": completed / total if total > 0 else 0
         }
+
+
+def _kahn_remainder(indegree: Dict[str, int], successors: Callable[[str], Iterable[str]]) -> List[str]:
+    """Kahn 拓扑排序（原地修改 indegree），返回入度始终不为 0 的任务：它们位于环上或依赖环"""
+    queue = deque(tid for tid, d in indegree.items() if d == 0)
+    while queue:
+        for after_id in successors(queue.popleft()):
+            indegree[after_id] -= 1
+            if indegree[after_id] == 0:
+                queue.append(after_id)
+    return [tid for tid, d in indegree.items() if d > 0]
+
+
+def _find_cycle(remaining: Iterable[str], predecessors: Callable[[str], Iterable[str]]) -> List[str]:
+    """
+    从 Kahn 剩下的任务中找出一个环：剩下的任务都至少有一个同样剩下的前驱，
+    沿前驱一直回溯必然回到走过的任务，截取这一段再反转，就是按依赖方向排列的环
+    """
+    remaining = set(remaining)
+    node = next(iter(remaining))
+    position: Dict[str, int] = {}
+    path: List[str] = []
+    while node not in position:
+        position[node] = len(path)
+        path.append(node)
+        node = next(before for before in predecessors(node) if before in remaining)
+    cycle = path[position[node]:]
+    cycle.reverse()
+    return cycle
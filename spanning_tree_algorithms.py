@@ -1,163 +1,229 @@
+from array import array
+
+import numpy as np
+
+
 # UnionFind class 不相交集
 class UnionFind:
     def __init__(self, n):
-        self.parent = list(range(n))  # 每个节点的父节点
-        self.rank = [0] * n  # 用来优化合并的秩
-    
+        self.parent = array('i', range(n))  # 每个节点的父节点（紧凑 int32 数组）
+        self.rank = bytearray(n)  # 用来优化合并的秩（按秩合并时秩不超过 log n）
+
+    def copy(self):
+        """复制当前状态，用于在多次求解之间复用同一个中间阶段"""
+        uf = UnionFind.__new__(UnionFind)
+        uf.parent = array('i', self.parent)
+        uf.rank = bytearray(self.rank)
+        return uf
+
     def find(self, x):  # 查找操作，获得根节点
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x])  # 路径压缩
-        return self.parent[x]
-    
-    def union(self, x, y):  # 合并操作
+        # 迭代 + 路径减半：没有递归开销，也不会触发 RecursionError
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):  # 合并操作，返回是否真的合并了两个集合
         rootX = self.find(x)
         rootY = self.find(y)
-        
-        if rootX != rootY:
-            # 合并时使用秩优化
-            if self.rank[rootX] > self.rank[rootY]:
-                self.parent[rootY] = rootX
-            elif self.rank[rootX] < self.rank[rootY]:
-                self.parent[rootX] = rootY
-            else:
-                self.parent[rootY] = rootX
-                self.rank[rootX] += 1
-
-
-def merge_sort(arr):  
-    if len(arr) > 1:
-        mid = len(arr) // 2
-        left = arr[:mid]
-        right = arr[mid:]
-        merge_sort(left)
-        merge_sort(right)
-        
-        i = j = k = 0
-        while i < len(left) and j < len(right):
-            # 按照权重排序
-            # 比如a问红色边权重为0，蓝色边权重为1
-            # 比如b问红色边权重为1，蓝色边权重为0
-            if left[i][3] < right[j][3]:  
-                arr[k] = left[i]
-                i += 1
+
+        if rootX == rootY:
+            return False
+        # 合并时使用秩优化
+        if self.rank[rootX] > self.rank[rootY]:
+            self.parent[rootY] = rootX
+        elif self.rank[rootX] < self.rank[rootY]:
+            self.parent[rootX] = rootY
+        else:
+            self.parent[rootY] = rootX
+            self.rank[rootX] += 1
+        return True
+
+
+class EdgeArrays:
+    """
+    边的紧凑存储：u、v 为 int32 并行数组，blue 为颜色位（1 蓝 0 红）。
+    1000 万条边只占约 90MB，而 (u, v, color) 元组列表要 1GB 以上。
+    迭代时仍产出 (u, v, color) 元组，兼容原有调用方。
+    """
+    __slots__ = ("u", "v", "blue")
+
+    def __init__(self, u=None, v=None, blue=None):
+        self.u = u if u is not None else array('i')
+        self.v = v if v is not None else array('i')
+        self.blue = blue if blue is not None else bytearray()
+
+    @classmethod
+    def from_tuples(cls, edges):
+        arrays = cls()
+        for u, v, color in edges:
+            arrays.append(u, v, color)
+        return arrays
+
+    def append(self, u, v, color):
+        self.u.append(u)
+        self.v.append(v)
+        self.blue.append(1 if color == 'blue' else 0)
+
+    def color(self, i):
+        return 'blue' if self.blue[i] else 'red'
+
+    def by_color(self):
+        """返回 (红色边下标, 蓝色边下标) 两个 int32 数组，保持原始顺序"""
+        blue = self.blue
+        red_idx = array('i', (i for i in range(len(blue)) if not blue[i]))
+        blue_idx = array('i', (i for i in range(len(blue)) if blue[i]))
+        return red_idx, blue_idx
+
+    def __len__(self):
+        return len(self.u)
+
+    def __iter__(self):
+        for u, v, b in zip(self.u, self.v, self.blue):
+            yield u, v, 'blue' if b else 'red'
+
+
+def as_edge_arrays(edges):
+    """接受 EdgeArrays 或 (u, v, color) 元组序列，统一转换成 EdgeArrays"""
+    return edges if isinstance(edges, EdgeArrays) else EdgeArrays.from_tuples(edges)
+
+
+def _kruskal_pass(uf, edges, order, mst, need=None):
+    """按 order 给出的边下标依次尝试加入生成树，返回新加入的蓝色边数；
+    mst 达到 need 条边（即 n-1，生成树已完整）时提前结束"""
+    us, vs, blue = edges.u, edges.v, edges.blue
+    union = uf.union
+    blue_count = 0
+    if need is not None and len(mst) >= need:
+        return 0
+    for i in order:
+        u, v = us[i], vs[i]
+        if union(u, v):  # 如果不形成环则合并两个集合
+            if blue[i]:
+                mst.append((u, v, 'blue'))
+                blue_count += 1
             else:
-                arr[k] = right[j]
-                j += 1
-            k += 1
-        
-        while i < len(left):
-            arr[k] = left[i]
-            i += 1
-            k += 1
-        while j < len(right):
-            arr[k] = right[j]
-            j += 1
-            k += 1
-    return arr
+                mst.append((u, v, 'red'))
+            if len(mst) == need:
+                break
+    return blue_count
+
 
+def _as_numpy(weights):
+    if isinstance(weights, np.ndarray):
+        return weights
+    if isinstance(weights, (bytes, bytearray)):
+        return np.frombuffer(weights, dtype=np.uint8)
+    if isinstance(weights, array):
+        return np.frombuffer(weights, dtype=np.dtype(weights.typecode))
+    return np.asarray(weights)
+
+
+def sort_edge_indices(weights):
+    """
+    按权重稳定排序边下标，返回 int32 数组：
+    - 小范围整数权重（如红/蓝 0/1）：平移到 uint16 后用 stable argsort，
+      NumPy 对 16 位以内整数走基数排序，是 O(m) 的计数/分桶过程
+    - 实数权重（如商品相似度）：numpy.argsort，O(m log m) 但在 C 层完成
+    """
+    w = _as_numpy(weights)
+    if w.size == 0:
+        return array('i')
+    if w.dtype.kind in 'biu' or np.array_equal(w, np.round(w)):
+        lo, hi = w.min(), w.max()
+        if hi - lo < (1 << 16):
+            order = np.argsort((w - lo).astype(np.uint16), kind='stable')
+            return array('i', order.astype(np.int32).tobytes())
+    order = np.argsort(w, kind='stable')
+    return array('i', order.astype(np.int32).tobytes())
+
+
+def kruskal_weighted(n, edges, weights):
+    """
+    一般带权最小生成树（图不连通时为最小生成森林）
+    edges: EdgeArrays 或 (u, v, color) 元组序列；weights: 与边一一对应的权重
+    返回 (mst, total_weight)，mst 元素为 (u, v, color, weight)
+    """
+    edges = as_edge_arrays(edges)
+    w = _as_numpy(weights)
+    if len(w) != len(edges):
+        raise ValueError("权重数量与边数量不一致")
+    order = sort_edge_indices(w)
+    wl = array('d', w.astype(np.float64).tobytes())
+    us, vs, blue = edges.u, edges.v, edges.blue
+    union = UnionFind(n).union
+    mst = []
+    total_weight = 0.0
+    need = n - 1
+    for i in order:
+        if len(mst) == need:
+            break  # 已经接受 n-1 条边，剩余的边不可能再被选中
+        if union(us[i], vs[i]):
+            mst.append((us[i], vs[i], 'blue' if blue[i] else 'red', wl[i]))
+            total_weight += wl[i]
+    return mst, total_weight
 
 
 def kruskal_min_blue_edges(n, edges):  # 未改进的算法
-    # 在每条边中加入权重信息，红色边权重为0，蓝色边权重为1
+    # 红色边权重为0，蓝色边权重为1（即颜色位本身）
     # 此时的kruskal算法即优先选择红色边（权重为0，更小）
-    weighted_edges = []
-    for u, v, color in edges:
-        weight = 0 if color == 'red' else 1  # 红色边权重为0，蓝色边权重为1
-        weighted_edges.append((u, v, color, weight))
+    edges = as_edge_arrays(edges)
 
-    # 使用Merge Sort对边进行排序
-    sorted_edges = merge_sort(weighted_edges)
+    # 权重只有0/1两种，用线性时间的分桶排序代替Merge Sort
+    sorted_edges = sort_edge_indices(edges.blue)
 
     uf = UnionFind(n)  # 初始化并查集
     mst = []  # 最小生成树
-    blue_count = 0  # 蓝色边数量
-    
-    for u, v, color, weight in sorted_edges:
-        if uf.find(u) != uf.find(v):  # 如果不形成环
-            uf.union(u, v)  # 合并两个集合
-            mst.append((u, v, color))  # 将该边加入生成树
-            if color == 'blue':  # 如果是蓝色边
-                blue_count += 1
-    
+    blue_count = _kruskal_pass(uf, edges, sorted_edges, mst, n - 1)  # 蓝色边数量
     return mst, blue_count
 
 
 def kruskal_min_blue_edges_improve(n, edges):  # 改进后的算法
-    # 改进后不使用merge排序，而是直接检测是否是蓝色边/红色边
-    red_edges = [e for e in edges if e[2] == 'red']
-    blue_edges = [e for e in edges if e[2] == 'blue']
+    # 改进后不使用merge排序，而是直接按颜色位把边下标分成两组
+    edges = as_edge_arrays(edges)
+    red_edges, blue_edges = edges.by_color()
 
     uf = UnionFind(n)  # 初始化并查集
     mst = []  # 最小生成树
-    blue_count = 0  # 蓝色边数量
-    
-    # 先处理所有红色边
-    for u, v, color in red_edges:
-        if uf.find(u) != uf.find(v):  # 如果不形成环
-            uf.union(u, v)  # 合并两个集合
-            mst.append((u, v, color))  # 将该边加入生成树
-    
-    # 之后处理蓝色边
-    for u, v, color in blue_edges:
-        if uf.find(u) != uf.find(v):  # 如果不形成环
-            uf.union(u, v)  # 合并两个集合
-            mst.append((u, v, color))  # 将该边加入生成树
-            blue_count +=1
 
+    # 先处理所有红色边，之后处理蓝色边；生成树完整后提前结束
+    _kruskal_pass(uf, edges, red_edges, mst, n - 1)
+    blue_count = _kruskal_pass(uf, edges, blue_edges, mst, n - 1)
     return mst, blue_count
 
 
 def kruskal_max_blue_edges(n, edges):
-    # 在每条边中加入权重信息，红色边权重为1，蓝色边权重为0
+    # 红色边权重为1，蓝色边权重为0
     # 此时的kruskal算法即优先选择蓝色边（权重为0，更小）
-    weighted_edges = []
-    for u, v, color in edges:
-        weight = 0 if color == 'blue' else 1  # 蓝色边权重为0，红色边权重为1
-        weighted_edges.append((u, v, color, weight))
+    edges = as_edge_arrays(edges)
 
-    # 使用Merge Sort对边进行排序
-    sorted_edges = merge_sort(weighted_edges)
+    # 权重只有0/1两种，用线性时间的分桶排序代替Merge Sort
+    sorted_edges = sort_edge_indices(1 - _as_numpy(edges.blue))
 
     uf = UnionFind(n)  # 初始化并查集
     mst = []  # 最小生成树
-    blue_count = 0  # 蓝色边数量
-    
-    for u, v, color, weight in sorted_edges:
-        if uf.find(u) != uf.find(v):  # 如果不形成环
-            uf.union(u, v)  # 合并两个集合
-            mst.append((u, v, color))  # 将该边加入生成树
-            if color == 'blue':  # 如果是蓝色边
-                blue_count += 1
-    
+    blue_count = _kruskal_pass(uf, edges, sorted_edges, mst, n - 1)  # 蓝色边数量
     return mst, blue_count
 
 
 def first_kruskal(n, edges):
     # 第1次Kruskal：优先使用红色边，然后使用蓝色边，找到所必须的蓝色边
-    red_edges = [e for e in edges if e[2] == 'red']
-    blue_edges = [e for e in edges if e[2] == 'blue']
-    
+    edges = as_edge_arrays(edges)
+    red_edges, blue_edges = edges.by_color()
+
     uf = UnionFind(n)
-    required_blue = set()
-    total_edges = 0
-    
-    # 先处理所有红色边
-    for u, v, _ in red_edges:
-        if uf.find(u) != uf.find(v):
-            uf.union(u, v)
-            total_edges += 1
-    
-    # 处理蓝色边
-    for u, v, _ in blue_edges:
-        if uf.find(u) != uf.find(v):
-            uf.union(u, v)
-            required_blue.add((u, v))
-            total_edges += 1
-    
+    mst = []
+
+    # 先处理所有红色边，再处理蓝色边
+    _kruskal_pass(uf, edges, red_edges, mst, n - 1)
+    _kruskal_pass(uf, edges, blue_edges, mst, n - 1)
+    required_blue = {(u, v) for u, v, color in mst if color == 'blue'}
+
     # 检查是否形成了生成树
-    if total_edges != n - 1:
-        return None, None  # 无法形成生成树
-    
+    if len(mst) != n - 1:
+        return None  # 无法形成生成树
+
     return required_blue
 
 
@@ -179,34 +245,28 @@ def second_kruskal(n, edges, required_blue, k):
         all_edges.append((u, v, 'blue'))  # 做图用，因此储存
         blue_count += 1
     
-    # 收集剩余的蓝色边和红色边，将其分别放在不同的数组中
-    remaining_blue = []
-    red_edges = []
-    for u, v, color in edges:
-        if color == 'blue':
-            if (u, v) not in required_blue and (v, u) not in required_blue:
-                remaining_blue.append((u, v))
-        else:
-            red_edges.append((u, v))
-    
+    # 收集剩余的蓝色边和红色边的下标，将其分别放在不同的数组中
+    edges = as_edge_arrays(edges)
+    us, vs = edges.u, edges.v
+    red_edges, blue_idx = edges.by_color()
+    remaining_blue = array('i', (i for i in blue_idx
+                                 if (us[i], vs[i]) not in required_blue
+                                 and (vs[i], us[i]) not in required_blue))
+
     # 优先选择蓝色变，尝试添加剩余的蓝色边，直到达到k-b1条
-    for u, v in remaining_blue:
+    for i in remaining_blue:
         if blue_count >= k:
             break
-        if uf.find(u) != uf.find(v):
-            uf.union(u, v)
-            all_edges.append((u, v, 'blue'))  # 做图用，因此储存
+        if uf.union(us[i], vs[i]):
+            all_edges.append((us[i], vs[i], 'blue'))  # 做图用，因此储存
             blue_count += 1
-    
+
     # 如果蓝色边数量不足k，返回False，说明不可以生成恰好k条蓝边的树
     if blue_count < k:
         return False
     
     # 最后添加红色边，直到形成生成树
-    for u, v in red_edges:
-        if uf.find(u) != uf.find(v):
-            uf.union(u, v)
-            all_edges.append((u, v, 'red'))  # 做图用，因此储存
+    _kruskal_pass(uf, edges, red_edges, all_edges, n - 1)  # 做图用，因此储存
     
     # 检查是否所有节点都连通
     root = uf.find(0)
@@ -218,18 +278,96 @@ def second_kruskal(n, edges, required_blue, k):
 
 
 
-def kruskal_two_stage(n, edges, k):
-    required_blue = first_kruskal(n, edges)
-    if required_blue is None:
-        print(f"无法形成生成树")
-        return False
-    
-    all_edges = second_kruskal(n, edges, required_blue, k)
+class ExactBlueSpanningTree:
+    """
+    恰好 k 条蓝色边的生成树引擎。构造时一次性完成两阶段 Kruskal：
+    1. 先用红色边建森林，再用蓝色边补全，得到必需蓝边 B1（min_blue = |B1|）
+    2. 以 B1 为起点继续加入其余蓝色边，得到包含 B1 的极大蓝色森林 B1 + X（max_blue = |B1| + |X|）
+    对 [min_blue, max_blue] 内的任意 k，取 B1 加 X 的前 k - min_blue 条，再用红色边补全即可
+    （拟阵交换性保证红色边一定能补全）。第 2 阶段起点的并查集状态会被保存并在每次求解时复用，
+    因此一张图可以回答任意多个 k，每个 k 只需一次线性补全。
+    """
 
-    if second_kruskal(n, edges, required_blue, k):
-        print(f"存在符合条件的生成树，包含{k}条蓝色边")
-        return(all_edges)
-    
-    else:
-        print(f"不存在符合条件的生成树")
-        return False
+    def __init__(self, n, edges):
+        self.n = n
+        self.edges = as_edge_arrays(edges)
+        us, vs = self.edges.u, self.edges.v
+        self.red_edges, blue_edges = self.edges.by_color()
+
+        # 阶段1：红色边优先，再用蓝色边连通，找出必需蓝边
+        uf = UnionFind(n)
+        accepted = 0
+        for i in self.red_edges:
+            if uf.union(us[i], vs[i]):
+                accepted += 1
+        self.required_blue = array('i')
+        for i in blue_edges:
+            if uf.union(us[i], vs[i]):
+                self.required_blue.append(i)
+        self.connected = accepted + len(self.required_blue) == n - 1 or n <= 1
+
+        # 阶段2：从必需蓝边出发的并查集状态，保存下来供每个 k 复用
+        base = UnionFind(n)
+        for i in self.required_blue:
+            base.union(us[i], vs[i])
+        self._base = base
+        extra = base.copy()
+        required = set(self.required_blue)
+        self.extra_blue = array('i', (i for i in blue_edges
+                                      if i not in required and extra.union(us[i], vs[i])))
+
+    @property
+    def min_blue(self):
+        return len(self.required_blue) if self.connected else None
+
+    @property
+    def max_blue(self):
+        return len(self.required_blue) + len(self.extra_blue) if self.connected else None
+
+    def feasible_range(self):
+        """可行的蓝边数区间 (min_blue, max_blue)，图不连通时返回 None"""
+        if not self.connected:
+            return None
+        return self.min_blue, self.max_blue
+
+    def is_feasible(self, k):
+        return self.connected and self.min_blue <= k <= self.max_blue
+
+    def solve(self, k):
+        """返回恰好 k 条蓝色边的生成树 [(u, v, color)]，不可行时返回 None"""
+        if k is None or not self.is_feasible(k):
+            return None
+        us, vs = self.edges.u, self.edges.v
+        uf = self._base.copy()
+        tree = [(us[i], vs[i], 'blue') for i in self.required_blue]
+        for i in self.extra_blue[:k - self.min_blue]:
+            uf.union(us[i], vs[i])
+            tree.append((us[i], vs[i], 'blue'))
+        _kruskal_pass(uf, self.edges, self.red_edges, tree, self.n - 1)
+        return tree
+
+    def solve_many(self, ks=None):
+        """一次回答多个 k，ks 为 None 时返回可行区间内所有 k 的生成树；不可行的 k 不出现在结果中"""
+        if not self.connected:
+            return {}
+        if ks is None:
+            ks = range(self.min_blue, self.max_blue + 1)
+        return {k: self.solve(k) for k in ks if self.is_feasible(k)}
+
+    def diagnose(self, k):
+        """k 不可行时给出原因，可行时返回 None"""
+        if not self.connected:
+            return "图不连通，无法形成生成树"
+        if k is None:
+            return "未指定蓝色边数量k"
+        if k < self.min_blue:
+            return f"至少需要{self.min_blue}条蓝色边才能连通"
+        if k > self.max_blue:
+            return f"最多只能使用{self.max_blue}条蓝色边"
+        return None
+
+
+def kruskal_two_stage(n, edges, k):
+    """恰好 k 条蓝色边的生成树，不存在时返回 False（需要原因或多个 k 时直接使用 ExactBlueSpanningTree）"""
+    tree = ExactBlueSpanningTree(n, edges).solve(k)
+    return tree if tree is not None else False
@@ -0,0 +1,66 @@
+"""
+生成树算法基准：在大规模随机图（默认 10^6 个节点、10^7 条边）上测量
+紧凑边数组的构建时间、内存占用，以及各 Kruskal 变体的运行时间。
+
+用法：python spanning_tree_benchmark.py --nodes 1000000 --edges 10000000 --seed 42
+"""
+import argparse
+import resource
+import time
+from array import array
+
+import numpy as np
+
+from spanning_tree_algorithms import (EdgeArrays, kruskal_max_blue_edges, kruskal_min_blue_edges,
+                                      kruskal_min_blue_edges_improve, kruskal_two_stage,
+                                      kruskal_weighted)
+
+
+def random_edge_arrays(n, m, blue_ratio=0.3, seed=42):
+    """用 NumPy 批量生成随机边，再转成紧凑的 int32 数组"""
+    rng = np.random.default_rng(seed)
+    u = rng.integers(0, n, size=m, dtype=np.int32)
+    v = rng.integers(0, n, size=m, dtype=np.int32)
+    # 加一条链保证连通，使生成树一定存在
+    chain = np.arange(n - 1, dtype=np.int32)
+    u[:n - 1], v[:n - 1] = chain, chain + 1
+    blue = (rng.random(m) < blue_ratio).astype(np.uint8)
+    order = rng.permutation(m)
+    return EdgeArrays(array('i', u[order].tobytes()), array('i', v[order].tobytes()),
+                      bytearray(blue[order].tobytes()))
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"{label:<32}{time.perf_counter() - start:>10.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成树算法基准测试")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--edges", type=int, default=10_000_000)
+    parser.add_argument("--k", type=int, default=None, help="kruskal_two_stage 的蓝边数，默认取最少与最多之间的中点")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    n, m = args.nodes, args.edges
+    edges = timed(f"生成 {m:,} 条边", random_edge_arrays, n, m, 0.3, args.seed)
+    edge_bytes = edges.u.itemsize * len(edges.u) * 2 + len(edges.blue)
+    print(f"边数组内存: {edge_bytes / 2**20:.1f} MB")
+
+    _, min_blue = timed("kruskal_min_blue_edges_improve", kruskal_min_blue_edges_improve, n, edges)
+    timed("kruskal_min_blue_edges", kruskal_min_blue_edges, n, edges)
+    _, max_blue = timed("kruskal_max_blue_edges", kruskal_max_blue_edges, n, edges)
+    weights = np.random.default_rng(args.seed).random(m)
+    _, total = timed("kruskal_weighted(实数权重)", kruskal_weighted, n, edges, weights)
+    print(f"最小生成树总权重: {total:.2f}")
+    k = args.k if args.k is not None else (min_blue + max_blue) // 2
+    timed(f"kruskal_two_stage(k={k})", kruskal_two_stage, n, edges, k)
+    print(f"最少蓝边: {min_blue}  最多蓝边: {max_blue}")
+    print(f"峰值内存: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
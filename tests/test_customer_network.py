@@ -0,0 +1,70 @@
+"""CustomerNetwork 批量导入与 /relations/batch 接口的逐行错误报告"""
+import pytest
+
+from models import Customer
+from modules.customer_network import CustomerNetwork
+
+
+def _customer(cid):
+    return Customer(cid, f"客户{cid}", "普通", 100, 0.5, "2024-01-01")
+
+
+@pytest.fixture
+def network():
+    network = CustomerNetwork()
+    network.add_customers([_customer("C1"), _customer("C2")])
+    return network
+
+
+def test_add_relations_reports_unhashable_ids_per_row(network):
+    generation = network.generation
+    errors = network.add_relations([
+        {"from_customer": ["C1"], "to_customer": "C2", "weight": 1.0, "relation_type": "好友"},
+        {"from_customer": "C1", "to_customer": {"id": "C2"}, "weight": 1.0, "relation_type": "好友"},
+        {"from_customer": "", "to_customer": "C2", "weight": 1.0, "relation_type": "好友"},
+        {"from_customer": "C1", "to_customer": "C2", "weight": 2.0, "relation_type": "好友"},
+    ])
+    assert [row for row, _ in errors] == [0, 1, 2]
+    assert all(msg == "客户ID必须为非空字符串" for _, msg in errors)
+    assert network.adjacency_matrix["C1"] == {"C2": 2.0}
+    assert len(network.relations) == 1
+    assert network.generation == generation + 1
+
+
+def test_add_relations_reports_non_object_rows(network):
+    errors = network.add_relations([["C1", "C2", 1.0, "好友"], "C1", 3, None])
+    assert [row for row, _ in errors] == [0, 1, 2, 3]
+    assert all(msg.startswith("字段不合法") for _, msg in errors)
+    assert network.relations == []
+
+
+def test_relations_batch_route_returns_row_errors():
+    import app as server
+
+    with server.customer_network.lock.write():
+        server.customer_network.add_customers([_customer("BATCH-A"), _customer("BATCH-B")])
+    response = server.app.test_client().post("/relations/batch", json=[
+        {"from_customer": ["BATCH-A"], "to_customer": "BATCH-B", "weight": 1.0, "relation_type": "好友"},
+        ["BATCH-A", "BATCH-B"],
+        {"from_customer": "BATCH-A", "to_customer": "BATCH-B", "weight": 1.0, "relation_type": "好友"},
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "partial"
+    assert body["added"] == 1
+    assert [e["row"] for e in body["errors"]] == [0, 1]
+
+
+def test_api_customers_lists_serialized_customers():
+    import app as server
+
+    with server.customer_network.lock.write():
+        server.customer_network.add_customers([_customer("LIST-A")])
+    response = server.app.test_client().get("/api/customers")
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    body = response.get_json()
+    assert len(body) == len(server.customer_network.customers)
+    listed = next(c for c in body if c["id"] == "LIST-A")
+    assert listed["name"] == "客户LIST-A"
+    assert listed["purchase_power"] == 100
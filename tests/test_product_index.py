@@ -0,0 +1,53 @@
+"""ProductIndex 前缀搜索在热度更新、删除之后的排序"""
+import pytest
+
+from models import Product
+from modules.product_index import ProductIndex
+
+
+def _product(i, popularity, name=None):
+    return Product(id=f"P{i:02d}", name=name or f"apple {i:02d}", brand="b", category="c", price=10.0,
+                   popularity=popularity, stock=1, status="在售", sales=0, rating=4.0,
+                   description="", image_url="", created_date="2024-01-01")
+
+
+@pytest.fixture(params=["insert", "bulk"])
+def index(request):
+    products = [_product(i, 100 + i) for i in range(15)] + [_product(90, 500, name="banana")]
+    if request.param == "bulk":
+        return ProductIndex.from_records(products)
+    index = ProductIndex()
+    for product in products:
+        index.insert(product)
+    return index
+
+
+def _prefix(index, prefix, limit=10):
+    return [p.id for p in index.search_by_prefix(prefix, limit)]
+
+
+def test_prefix_search_follows_popularity_drop(index):
+    assert _prefix(index, "app")[0] == "P14"
+    index.update_popularity("P14", popularity=0)
+    result = _prefix(index, "app")
+    assert "P14" not in result
+    assert result == [f"P{i:02d}" for i in range(13, 3, -1)]
+    # 整名节点同样修正
+    assert _prefix(index, "apple 14") == ["P14"]
+
+
+def test_prefix_search_follows_popularity_rise(index):
+    assert "P00" not in _prefix(index, "app")
+    index.update_popularity("P00", popularity=1000)
+    assert _prefix(index, "app")[0] == "P00"
+    assert _prefix(index, "apple 0", 3) == ["P00", "P09", "P08"]
+
+
+def test_prefix_search_after_delete_and_update(index):
+    index.delete("P14")
+    index.update("P13", stock=5)
+    result = _prefix(index, "a", 20)
+    assert "P14" not in result
+    assert len(result) == len(set(result)) == 10
+    assert result[0] == "P13"
+    assert _prefix(index, "ban") == ["P90"]
@@ -0,0 +1,37 @@
+"""商品查询接口的参数校验：非法的分页与 Top-K 参数返回 400 JSON，而不是 500"""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client():
+    import app as server
+
+    return server.app.test_client()
+
+
+@pytest.fixture(scope="module")
+def product_id():
+    import app as server
+
+    return next(iter(server.product_index.products))
+
+
+@pytest.mark.parametrize("query", ["offset=x", "offset=-1", "limit=abc", "limit=-3", "min_price=abc"])
+def test_search_rejects_bad_paging(client, query):
+    response = client.get(f"/products/search?{query}")
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+@pytest.mark.parametrize("k", ["zz", "-1"])
+def test_top_k_routes_reject_bad_k(client, product_id, k):
+    for path in ("/products/leaderboard", f"/products/{product_id}/similar"):
+        response = client.get(f"{path}?k={k}")
+        assert response.status_code == 400
+        assert response.get_json()["status"] == "error"
+
+
+def test_valid_parameters_still_work(client, product_id):
+    assert len(client.get("/products/search?offset=1&limit=2").get_json()) == 2
+    assert len(client.get("/products/leaderboard?k=3").get_json()) == 3
+    assert len(client.get(f"/products/{product_id}/similar?k=2").get_json()) == 2